@@ -0,0 +1,276 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+# ==========================================
+# FDS BATCH POST-PROCESSOR
+# ==========================================
+# Finds every FDS run (CHID) in the given folders through its .smv file and,
+# on a process pool, loads its output CSVs and works out:
+#   ASET         Available Safe Egress Time: the first time any tenability
+#                criterion is broken (visibility, temperature, HRR)
+#   performance  wall time per simulated second, time steps, and the time
+#                spent in each solver routine (from <CHID>_cpu.csv)
+# then prints a comparison table and writes fds_report.json.
+#
+# FDS CSVs have two header rows, units then names (_cpu.csv has names only).
+# read_fds_csv() takes the names from the last header row and parses the
+# numeric body with NumPy's C reader. Text columns (the wall-clock stamps
+# in _steps.csv) are parsed separately.
+#
+# Devices are matched to criteria by their QUANTITY in the input file (INPF
+# in the .smv), or by units when the input file isn't there.
+#
+# "Available Safe Egress Time.txt" records an ASET of 4 s, from a device
+# "Viz_Hazard". These CSVs don't reproduce it, and no visibility limit does
+# either. Neither input file has a Viz_Hazard device (they have Vis_HeadHeight,
+# Temp_Ceiling and Vis_Door), so the note comes from another version of the
+# model. With the defaults below:
+#   battery_runaway    2.4 s  Vis_HeadHeight drops from 30 m to 6.5 m in one
+#                             step; Temp_Ceiling passes 60 C at 3.3 s
+#   battery_retrofit  13.5 s  Vis_Door < 10 m (any limit from 7.6 to 22 m
+#                             gives 13.5 s, the figure in the note)
+# The defaults are left as they are instead of being tuned to hit 4 s.
+#
+# Usage: python fds_postprocess.py
+#        python fds_postprocess.py sweep_dir/ --criterion "VISIBILITY<5" --criterion "TEMPERATURE>60"
+
+REPORT_NAME = "fds_report.json"
+# (quantity, source, comparison, limit): a device / HRR beyond the limit is untenable
+TENABILITY = [
+    ("VISIBILITY", "devc", "<", 10.0),     # m
+    ("TEMPERATURE", "devc", ">", 60.0),    # C
+    ("HRR", "hrr", ">", 500.0),            # kW
+]
+UNIT_QUANTITY = {"m": "VISIBILITY", "C": "TEMPERATURE"}  # Fallback device matching
+TOP_ROUTINES = 5
+CRITERION = re.compile(r"^\s*([A-Za-z_ ]+?)\s*([<>])\s*([-+0-9.eE]+)\s*$")
+
+
+# ==========================================
+# READERS
+# ==========================================
+def read_fds_csv(path, header_rows=2):
+    """(units, names, {name: array}) for an FDS CSV. Numeric columns are
+    float64; text columns stay as strings. _cpu.csv has names only
+    (header_rows=1, units come back empty)."""
+    with open(path, 'r', newline='') as f:
+        units = [u.strip() for u in next(csv.reader([f.readline()]))] if header_rows == 2 else []
+        names = [n.strip() for n in next(csv.reader([f.readline()]))]
+        first = f.readline()
+    numeric = []
+    for n, cell in enumerate(next(csv.reader([first])) if first.strip() else []):
+        try:
+            float(cell)
+            numeric.append(n)
+        except ValueError:
+            pass
+    cols = {}
+    if first.strip():
+        data = np.loadtxt(path, delimiter=",", skiprows=header_rows, usecols=numeric, ndmin=2, dtype=np.float64)
+        for k, n in enumerate(numeric):
+            cols[names[n]] = data[:, k]
+        for n in sorted(set(range(len(names))) - set(numeric)):
+            cols[names[n]] = np.loadtxt(path, delimiter=",", skiprows=header_rows, usecols=[n], dtype=str, ndmin=1)
+    return units, names, cols
+
+
+def read_smv_run(smv_path):
+    """CHID, input file and CSV paths listed in a .smv file."""
+    folder = os.path.dirname(os.path.abspath(smv_path))
+    with open(smv_path, 'r', errors='replace') as f:
+        lines = f.read().splitlines()
+    run = {"smv": os.path.abspath(smv_path), "chid": os.path.splitext(os.path.basename(smv_path))[0],
+           "fds": None, "csv": {}}
+    for n, line in enumerate(lines[:-1]):
+        key = line.strip()
+        if key == "CHID":
+            run["chid"] = lines[n + 1].strip()
+        elif key == "INPF":
+            run["fds"] = os.path.join(folder, lines[n + 1].strip())
+        elif key == "CSVF" and n + 2 < len(lines):
+            run["csv"][lines[n + 1].strip()] = os.path.join(folder, lines[n + 2].strip())
+    # The cpu file isn't listed in the .smv
+    run["csv"].setdefault("cpu", os.path.join(folder, run["chid"] + "_cpu.csv"))
+    return run
+
+
+def device_quantities(fds_path):
+    """{DEVC ID: QUANTITY} from an FDS input file."""
+    out = {}
+    if not fds_path or not os.path.exists(fds_path):
+        return out
+    with open(fds_path, 'r', errors='replace') as f:
+        text = f.read()
+    for group in re.findall(r"&DEVC\b(.*?)/", text, flags=re.S):
+        dev_id = re.search(r"\bID\s*=\s*'([^']*)'", group)
+        quantity = re.search(r"\bQUANTITY\s*=\s*'([^']*)'", group)
+        if dev_id and quantity:
+            out[dev_id.group(1)] = quantity.group(1).upper()
+    return out
+
+
+# ==========================================
+# ANALYSIS
+# ==========================================
+def first_crossing(t, values, op, limit):
+    """First time values go beyond limit, or None."""
+    bad = values < limit if op == "<" else values > limit
+    idx = np.flatnonzero(bad)
+    return (float(t[idx[0]]), float(values[idx[0]])) if len(idx) else None
+
+
+def aset(run, criteria):
+    """ASET and the time each criterion was first broken (and where)."""
+    series = {}  # quantity -> [(device, t, values)]
+    devc_path = run["csv"].get("devc")
+    if devc_path and os.path.exists(devc_path):
+        units, names, cols = read_fds_csv(devc_path)
+        quantities = device_quantities(run["fds"])
+        for name, unit in zip(names[1:], units[1:]):
+            quantity = quantities.get(name) or UNIT_QUANTITY.get(unit)
+            if quantity:
+                series.setdefault(quantity, []).append((name, cols[names[0]], cols[name]))
+    hrr_path = run["csv"].get("hrr")
+    hrr = read_fds_csv(hrr_path)[2] if hrr_path and os.path.exists(hrr_path) else {}
+    if "HRR" in hrr:
+        series.setdefault("HRR", []).append(("HRR", hrr["Time"], hrr["HRR"]))
+
+    results = []
+    for quantity, source, op, limit in criteria:
+        hits = []
+        for device, t, values in series.get(quantity, []):
+            hit = first_crossing(t, values, op, limit)
+            if hit:
+                hits.append((hit[0], device, hit[1]))
+        first = min(hits) if hits else None
+        results.append({"criterion": f"{quantity} {op} {limit:g}", "devices": len(series.get(quantity, [])),
+                        "time": first[0] if first else None, "device": first[1] if first else None,
+                        "value": first[2] if first else None})
+    times = [r["time"] for r in results if r["time"] is not None]
+    broken = min(results, key=lambda r: r["time"] if r["time"] is not None else np.inf)
+    return {"aset_s": min(times) if times else None,
+            "limiting": broken["criterion"] if times else None, "criteria": results}
+
+
+def _wall_seconds(stamps):
+    return np.array([datetime.fromisoformat(s.strip()).timestamp() for s in stamps])
+
+
+def performance(run):
+    """Solver cost: wall time per simulated second and time per routine."""
+    out = {}
+    steps_path = run["csv"].get("steps")
+    if steps_path and os.path.exists(steps_path):
+        _, _, cols = read_fds_csv(steps_path)
+        sim = cols["Simulation Time"]
+        wall = _wall_seconds(cols["Wall Time"])
+        span = float(sim[-1] - sim[0]) if len(sim) > 1 else 0.0
+        out.update(time_steps=int(cols["Time Step"][-1]), simulated_s=round(float(sim[-1]), 3),
+                   wall_s=round(float(wall[-1] - wall[0]), 1),
+                   wall_per_sim_s=round(float(wall[-1] - wall[0]) / span, 3) if span else None,
+                   mean_step_s=round(float(np.mean(cols["Step Size"])), 5))
+    cpu_path = run["csv"].get("cpu")
+    if cpu_path and os.path.exists(cpu_path):
+        _, names, cols = read_fds_csv(cpu_path, header_rows=1)
+        total_name = next((n for n in names if n.startswith("Total")), None)
+        routines = {n: float(cols[n].sum()) for n in names[1:] if n != total_name}
+        total = float(cols[total_name].sum()) if total_name else sum(routines.values())
+        out["cpu_total_s"] = round(total, 1)
+        out["routines"] = {n: {"seconds": round(s, 2), "share": round(s / total, 4) if total else None}
+                           for n, s in sorted(routines.items(), key=lambda kv: -kv[1]) if s > 0}
+    return out
+
+
+def analyse(smv_path, criteria=TENABILITY):
+    """Everything for one run (process-pool task)."""
+    t0 = time.perf_counter()
+    run = read_smv_run(smv_path)
+    result = {"chid": run["chid"], "smv": run["smv"]}
+    try:
+        result.update(aset(run, criteria))
+        result["performance"] = performance(run)
+    except Exception as e:  # One bad run shouldn't sink the sweep
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["analysis_s"] = round(time.perf_counter() - t0, 4)
+    return result
+
+
+# ==========================================
+# REPORT
+# ==========================================
+def _fmt(v, spec="{:.1f}"):
+    return "-" if v is None else spec.format(v)
+
+
+def print_tables(results, criteria):
+    print("\n--- ASET (s) ---")
+    heads = [f"{q} {op} {limit:g}" for q, _, op, limit in criteria]
+    print(f"{'CHID':24} {'ASET':>7}  " + "  ".join(f"{h:>18}" for h in heads))
+    for r in results:
+        if "error" in r:
+            print(f"{r['chid']:24} ERROR {r['error']}")
+            continue
+        by_name = {c["criterion"]: c for c in r["criteria"]}
+        print(f"{r['chid']:24} {_fmt(r['aset_s']):>7}  " + "  ".join(
+            f"{_fmt(by_name[h]['time']):>18}" for h in heads))
+
+    print("\n--- SOLVER PERFORMANCE ---")
+    print(f"{'CHID':24} {'sim s':>8} {'wall s':>8} {'wall/sim':>9} {'steps':>7}  top routines")
+    for r in results:
+        p = r.get("performance") or {}
+        top = ", ".join(f"{n} {v['share']:.0%}" for n, v in list(p.get("routines", {}).items())[:TOP_ROUTINES])
+        print(f"{r['chid']:24} {_fmt(p.get('simulated_s')):>8} {_fmt(p.get('wall_s')):>8} "
+              f"{_fmt(p.get('wall_per_sim_s'), '{:.2f}'):>9} {_fmt(p.get('time_steps'), '{:d}'):>7}  {top or '-'}")
+
+
+def parse_criterion(text):
+    m = CRITERION.match(text)
+    if not m:
+        raise argparse.ArgumentTypeError(f"Expected QUANTITY<limit or QUANTITY>limit, got {text!r}")
+    quantity = m.group(1).strip().upper()
+    return (quantity, "hrr" if quantity == "HRR" else "devc", m.group(2), float(m.group(3)))
+
+
+def discover(folders):
+    return sorted({os.path.abspath(p) for folder in folders for p in glob.glob(os.path.join(folder, "*.smv"))})
+
+
+def main(args):
+    criteria = args.criterion or TENABILITY
+    smv_files = discover(args.folders or [os.path.dirname(os.path.abspath(__file__))])
+    if not smv_files:
+        print("No .smv files found.")
+        return
+    t0 = time.perf_counter()
+    if args.workers == 1 or len(smv_files) == 1:
+        results = [analyse(p, criteria) for p in smv_files]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(analyse, smv_files, [criteria] * len(smv_files)))
+    print(f"Analysed {len(results)} runs in {time.perf_counter() - t0:.2f}s")
+    print_tables(results, criteria)
+
+    report = {"criteria": [{"quantity": q, "source": s, "op": op, "limit": limit} for q, s, op, limit in criteria],
+              "results": results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ASET and solver performance for a set of FDS runs.")
+    parser.add_argument("folders", nargs="*", help="Folders holding .smv files (default: this one)")
+    parser.add_argument("--criterion", action="append", type=parse_criterion, default=None,
+                        help='Tenability limit, e.g. "VISIBILITY<10" (repeatable; replaces the defaults)')
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument("--output", default=REPORT_NAME)
+    main(parser.parse_args())
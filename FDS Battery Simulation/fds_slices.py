@@ -0,0 +1,256 @@
+import argparse
+import os
+
+import numpy as np
+
+# ==========================================
+# FDS SLICE READER
+# ==========================================
+# Reads the slice (.sf) outputs of an FDS run without Smokeview. The .smv
+# file indexes them (SLCF entries: mesh, IJK bounds, quantity, units) and
+# holds each mesh's grid lines (TRNX / TRNY / TRNZ), so cells map to x, y, z.
+#
+# A .sf file is Fortran unformatted, sequential: every record is wrapped in
+# 4-byte length markers. Three 30-char records (quantity, short name,
+# units) and the IJK bounds make up the header, then each frame is a time
+# record followed by a data record of ni*nj*nk float32 (i fastest):
+#   [4][30 chars][4] x3  [4][i1 i2 j1 j2 k1 k2][4]  ([4][t][4] [4][data][4]) x nt
+# Frames have a fixed size, so the file is memory-mapped and the data is a
+# NumPy view of shape (nt, ni, nj, nk) whose strides step over the markers:
+# nothing is read until it is indexed. A probe time series, data[:, i, j, k],
+# touches one float per frame; a time range touches only its frames.
+#
+# The .sf.bnd files hold "time min max" per written frame, so value_range()
+# answers from them and scans only frames they don't cover.
+#
+# Usage: python fds_slices.py battery_runaway.smv
+#        python fds_slices.py battery_runaway.smv --quantity TEMPERATURE --probe 1.5 1.5 1.8
+
+HEADER_TEXT = 30          # Characters in each of the three name records
+MARKER = 4                # Fortran record length marker (int32)
+HEADER_BYTES = 3 * (HEADER_TEXT + 2 * MARKER) + (6 * 4 + 2 * MARKER)
+FLOAT = np.dtype('<f4')   # FDS writes little-endian float32
+
+
+# ==========================================
+# .SMV INDEX
+# ==========================================
+def _grid_lines(lines, start):
+    """Coordinates of a TRNX/TRNY/TRNZ block: a flag line, then 'index x'."""
+    out = []
+    for line in lines[start + 2:]:
+        parts = line.split()
+        if len(parts) != 2:
+            break
+        out.append(float(parts[1]))
+    return np.array(out)
+
+
+def read_smv(path):
+    """Meshes and slices listed in a .smv file. Slice file paths are made
+    absolute (they sit next to the .smv)."""
+    folder = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r', errors='replace') as f:
+        lines = f.read().splitlines()
+
+    meshes, slices = [], []
+    for n, line in enumerate(lines):
+        key = line.split()[0] if line.strip() and not line.startswith(' ') else None
+        if key == "GRID":
+            meshes.append({"name": line.split()[1] if len(line.split()) > 1 else f"MESH_{len(meshes) + 1}"})
+        elif key in ("TRNX", "TRNY", "TRNZ") and meshes:
+            meshes[-1]["xyz"[("TRNX", "TRNY", "TRNZ").index(key)]] = _grid_lines(lines, n)
+        elif key in ("SLCF", "SLCC"):
+            head, _, rest = line.partition("&")
+            ijk = [int(v) for v in rest.split("!")[0].split()[:6]]
+            slices.append({"file": os.path.join(folder, lines[n + 1].strip()), "mesh": int(head.split()[1]),
+                           "ijk": ijk, "quantity": lines[n + 2].strip(), "short": lines[n + 3].strip(),
+                           "units": lines[n + 4].strip(), "cell_centered": key == "SLCC"})
+    return meshes, slices
+
+
+# ==========================================
+# SLICE FILE
+# ==========================================
+class SliceFile:
+    """One memory-mapped .sf file. grid: the mesh's {"x", "y", "z"} lines
+    (optional, for the *_xyz helpers)."""
+
+    def __init__(self, path, grid=None):
+        self.path = path
+        self.grid = grid
+        self._mm = np.memmap(path, dtype=np.uint8, mode='r')
+        names = [self._record(i * (HEADER_TEXT + 2 * MARKER), HEADER_TEXT).tobytes().decode(errors='replace').strip()
+                 for i in range(3)]
+        self.quantity, self.short, self.units = names
+        ijk = self._record(3 * (HEADER_TEXT + 2 * MARKER), 24).view('<i4')
+        self.ijk = [int(v) for v in ijk]
+        i1, i2, j1, j2, k1, k2 = self.ijk
+        self.shape = (i2 - i1 + 1, j2 - j1 + 1, k2 - k1 + 1)
+        ni, nj, nk = self.shape
+        count = ni * nj * nk
+
+        # Frame: [4][t][4][4][data][4]
+        self.frame_bytes = 3 * MARKER + FLOAT.itemsize + count * FLOAT.itemsize + MARKER
+        self.n_frames = max(0, (len(self._mm) - HEADER_BYTES) // self.frame_bytes)
+        if self.n_frames:
+            self._record(HEADER_BYTES, FLOAT.itemsize)
+            self._record(HEADER_BYTES + 2 * MARKER + FLOAT.itemsize, count * FLOAT.itemsize)
+
+        buf = self._mm.base if self._mm.base is not None else self._mm
+        self.times = np.ndarray((self.n_frames,), FLOAT, buffer=buf,
+                                offset=self._mm.offset + HEADER_BYTES + MARKER, strides=(self.frame_bytes,))
+        # (nt, ni, nj, nk); file order is i fastest, then j, then k
+        self.data = np.ndarray((self.n_frames, ni, nj, nk), FLOAT, buffer=buf,
+                               offset=self._mm.offset + HEADER_BYTES + 3 * MARKER + FLOAT.itemsize,
+                               strides=(self.frame_bytes, 4, 4 * ni, 4 * ni * nj))
+        self._bounds = None
+
+    def _record(self, pos, size):
+        """Payload of the record at pos, after checking both length markers."""
+        lead = self._mm[pos:pos + MARKER].view('<i4')[0]
+        tail = self._mm[pos + MARKER + size:pos + 2 * MARKER + size].view('<i4')[0]
+        if lead != size or tail != size:
+            raise ValueError(f"{self.path}: bad record at byte {pos} (markers {lead}/{tail}, expected {size})")
+        return self._mm[pos + MARKER:pos + MARKER + size]
+
+    def __repr__(self):
+        return (f"SliceFile({os.path.basename(self.path)!r}, {self.quantity}, [{self.units}], "
+                f"{self.n_frames} frames x {self.shape})")
+
+    # ------------------------------------------
+    # LAZY SELECTION (views, nothing is read)
+    # ------------------------------------------
+    def frames(self, t0=None, t1=None):
+        """Frame index range [lo, hi) with t0 <= time <= t1."""
+        lo = 0 if t0 is None else int(np.searchsorted(self.times, t0, side='left'))
+        hi = self.n_frames if t1 is None else int(np.searchsorted(self.times, t1, side='right'))
+        return lo, hi
+
+    def select(self, t0=None, t1=None, i=None, j=None, k=None):
+        """View of the data between t0 and t1 (seconds) and over the given
+        cell ranges; i / j / k are (start, stop) index pairs within the slice
+        or single indices."""
+        lo, hi = self.frames(t0, t1)
+        index = [slice(lo, hi)]
+        for sel in (i, j, k):
+            if sel is None:
+                index.append(slice(None))
+            elif isinstance(sel, tuple):
+                index.append(slice(*sel))
+            else:
+                index.append(sel)
+        return self.data[tuple(index)]
+
+    def probe(self, i, j, k, t0=None, t1=None):
+        """(times, values) at one cell; reads one float per frame."""
+        lo, hi = self.frames(t0, t1)
+        return np.array(self.times[lo:hi]), np.array(self.data[lo:hi, i, j, k])
+
+    # ------------------------------------------
+    # COORDINATES
+    # ------------------------------------------
+    def cell_coords(self):
+        """x, y, z of the slice's grid points (needs the .smv grid)."""
+        if self.grid is None:
+            raise ValueError("No grid: open the slice through FdsRun to use coordinates")
+        i1, i2, j1, j2, k1, k2 = self.ijk
+        return self.grid["x"][i1:i2 + 1], self.grid["y"][j1:j2 + 1], self.grid["z"][k1:k2 + 1]
+
+    def nearest(self, x, y, z):
+        """Slice-local (i, j, k) of the grid point nearest to x, y, z."""
+        return tuple(int(np.abs(c - v).argmin()) for c, v in zip(self.cell_coords(), (x, y, z)))
+
+    def probe_xyz(self, x, y, z, t0=None, t1=None):
+        return self.probe(*self.nearest(x, y, z), t0=t0, t1=t1)
+
+    # ------------------------------------------
+    # MIN / MAX
+    # ------------------------------------------
+    def bounds(self):
+        """(time, min, max) rows from the .sf.bnd file (empty if missing)."""
+        if self._bounds is None:
+            path = self.path + ".bnd"
+            rows = np.loadtxt(path, ndmin=2) if os.path.exists(path) and os.path.getsize(path) else None
+            self._bounds = rows[:, :3] if rows is not None else np.empty((0, 3))
+        return self._bounds
+
+    def value_range(self, t0=None, t1=None):
+        """(min, max) over the frames between t0 and t1. Frames listed in the
+        .bnd file use its values; the rest are scanned."""
+        lo, hi = self.frames(t0, t1)
+        if hi <= lo:
+            return np.nan, np.nan
+        rows = self.bounds()
+        times = np.asarray(self.times[lo:hi])
+        known = np.zeros(hi - lo, bool)
+        vmin, vmax = np.inf, -np.inf
+        if len(rows):
+            pos = np.searchsorted(rows[:, 0], times)
+            pos = np.clip(pos, 0, len(rows) - 1)
+            # .bnd times are printed with 7 digits
+            known = np.isclose(rows[pos, 0], times, rtol=1e-6, atol=1e-6)
+            if known.any():
+                vmin, vmax = rows[pos[known], 1].min(), rows[pos[known], 2].max()
+        for f in np.flatnonzero(~known):
+            frame = self.data[lo + f]
+            vmin, vmax = min(vmin, float(frame.min())), max(vmax, float(frame.max()))
+        return float(vmin), float(vmax)
+
+
+# ==========================================
+# RUN (ALL SLICES OF ONE .SMV)
+# ==========================================
+class FdsRun:
+    def __init__(self, smv_path):
+        self.smv_path = smv_path
+        self.meshes, self.slices = read_smv(smv_path)
+        self._open = {}
+
+    def open(self, n):
+        """SliceFile for entry n of self.slices (opened once)."""
+        if n not in self._open:
+            info = self.slices[n]
+            mesh = self.meshes[info["mesh"] - 1] if 0 < info["mesh"] <= len(self.meshes) else None
+            self._open[n] = SliceFile(info["file"], mesh)
+        return self._open[n]
+
+    def slice(self, quantity):
+        """First slice whose quantity or short name matches (case-insensitive)."""
+        for n, info in enumerate(self.slices):
+            if quantity.upper() in (info["quantity"].upper(), info["short"].upper()):
+                return self.open(n)
+        raise KeyError(f"No slice of {quantity} in {self.smv_path}")
+
+
+def summary(run):
+    for n, info in enumerate(run.slices):
+        if not os.path.exists(info["file"]):
+            print(f"  {os.path.basename(info['file'])}: missing")
+            continue
+        sf = run.open(n)
+        lo, hi = sf.value_range()
+        t = sf.times
+        span = f"{t[0]:.1f}-{t[-1]:.1f} s" if sf.n_frames else "no frames"
+        print(f"  {os.path.basename(sf.path)}: {sf.quantity} [{sf.units}], {sf.n_frames} frames ({span}), "
+              f"cells {sf.shape}, range {lo:.4g} to {hi:.4g}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect FDS slice files listed in a .smv file.")
+    parser.add_argument("smv", help="e.g. battery_runaway.smv")
+    parser.add_argument("--quantity", default=None, help="Slice quantity for --probe (e.g. TEMPERATURE)")
+    parser.add_argument("--probe", nargs=3, type=float, default=None, metavar=("X", "Y", "Z"))
+    parser.add_argument("--t0", type=float, default=None)
+    parser.add_argument("--t1", type=float, default=None)
+    args = parser.parse_args()
+
+    run = FdsRun(args.smv)
+    print(f"{args.smv}: {len(run.meshes)} mesh(es), {len(run.slices)} slice(s)")
+    summary(run)
+    if args.probe:
+        sf = run.slice(args.quantity or run.slices[0]["quantity"])
+        times, values = sf.probe_xyz(*args.probe, t0=args.t0, t1=args.t1)
+        print(f"\n{sf.quantity} [{sf.units}] at {tuple(args.probe)} (cell {sf.nearest(*args.probe)}):")
+        for t, v in zip(times, values):
+            print(f"  {t:8.2f} s  {v:.4g}")
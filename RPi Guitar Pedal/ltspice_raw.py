@@ -0,0 +1,395 @@
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# ==========================================
+# LTSPICE .RAW READER + WAVEFORM ANALYSIS
+# ==========================================
+# Reads LTspice binary .raw files (Draft1.raw, Draft1.op.raw) without
+# LTspice. The header is text (UTF-16LE from LTspice XVII on, plain ASCII
+# before): Plotname, Flags, No. Variables, No. Points and one line per
+# variable, ending at "Binary:". Then come No. Points records, one value
+# per variable:
+#   real       first variable float64, the rest float32 (transient: time)
+#   double     every variable float64
+#   complex    every variable complex128 (.ac)
+# The layout is checked against the file size. Records have a fixed size,
+# so the binary part is memory-mapped as a NumPy structured array and each
+# trace is a strided view of it. Nothing is read until it is used.
+#
+# LTspice marks some time points by flipping their sign, so time is always
+# taken as |t|, over the range being read. A .step sweep writes every run
+# into one file ("stepped"), and each new run starts where time drops back
+# to zero. For stepped files, finding those points is the one pass over the
+# whole time column, done in chunks of SCAN_CHUNK points. The step values
+# come from the .log next to the .raw.
+#
+# The analyses work on the tail of each run (the last PERIODS periods of
+# the test tone, after start-up has settled). The tail is found by bisecting
+# the time column, and only that slice of the file is read. Without --f0 the
+# tone comes from the input's zero crossings over the last F0_TAIL of the
+# run. The tail is resampled to a uniform grid for the FFT (LTspice's time
+# step is variable) and gives:
+#   gain_db    output / input RMS
+#   thd_pct    total harmonic distortion of the output (H2..H{HARMONICS})
+#   crest      output peak / RMS: a clean sine gives 1.414, and clipping
+#              flattens the peaks and lowers it
+# decimate() gives min/max envelopes for plotting long runs.
+#
+# Usage: python ltspice_raw.py Draft1.raw
+#        python ltspice_raw.py sweep_dir/ --input "V(n002)" --output "V(n007)" --f0 1000
+
+REPORT_NAME = "ltspice_report.json"
+INPUT_TRACE = "V(n002)"    # Draft1.asc: V1 (SINE 0.1 V, 1 kHz) through R1
+OUTPUT_TRACE = "V(n007)"   # Draft1.asc: across R5, after C2
+PERIODS = 5                # Test-tone periods analysed, at the end of each run
+SAMPLES_PER_PERIOD = 256   # Uniform resampling for the FFT
+HARMONICS = 9
+F0_TAIL = 0.5              # Fraction of each run (at its end) searched for the test tone without --f0
+SCAN_CHUNK = 1 << 16       # Points per read when finding the .step runs
+PLOT_POINTS = 2000
+
+
+# ==========================================
+# HEADER + LAYOUT
+# ==========================================
+def read_header(path):
+    """Header fields, variables and the offset of the binary data."""
+    with open(path, 'rb') as f:
+        head = f.read(2)
+        encoding = 'utf-16-le' if len(head) == 2 and head[1] == 0 else 'latin-1'
+        f.seek(0)
+        raw = b""
+        for marker in ("Binary:\n", "Values:\n"):
+            end = -1
+            while end < 0:
+                chunk = f.read(1 << 16)
+                if not chunk:
+                    break
+                raw += chunk
+                end = raw.find(marker.encode(encoding))
+            if end >= 0:
+                break
+            f.seek(0)
+            raw = b""
+        if end < 0:
+            raise ValueError(f"{path}: no Binary: section (not an LTspice .raw file?)")
+    if marker == "Values:\n":
+        raise ValueError(f"{path}: ASCII .raw files aren't supported (re-run without -ascii)")
+
+    header = {"path": path, "offset": end + len(marker.encode(encoding)), "variables": []}
+    in_vars = False
+    for line in raw[:end].decode(encoding).splitlines():
+        if in_vars and line[:1] in ("\t", " ") and line.strip():
+            parts = line.split()
+            header["variables"].append({"name": parts[1], "kind": parts[2] if len(parts) > 2 else ""})
+            continue
+        key, _, value = line.partition(":")
+        key = key.strip()
+        in_vars = key == "Variables"
+        if key:
+            header[key] = value.strip()
+    header["flags"] = header.get("Flags", "").lower().split()
+    header["n_vars"] = int(header.get("No. Variables", len(header["variables"])))
+    header["n_points"] = int(header.get("No. Points", 0))
+    return header
+
+
+def record_dtype(header, data_bytes):
+    """Structured dtype of one record, picked from the flags and checked
+    against the data size."""
+    names = [v["name"] for v in header["variables"]]
+    flags = header["flags"]
+    if "complex" in flags:
+        layouts = [['<c16'] * len(names)]
+    elif "double" in flags:
+        layouts = [['<f8'] * len(names)]
+    else:
+        layouts = [['<f8'] + ['<f4'] * (len(names) - 1), ['<f4'] * len(names)]
+    for types in layouts:
+        dtype = np.dtype({"names": names, "formats": types})
+        if header["n_points"] and data_bytes >= header["n_points"] * dtype.itemsize \
+                and data_bytes % dtype.itemsize == 0:
+            return dtype
+    raise ValueError(f"{header['path']}: {data_bytes} data bytes don't fit {header['n_points']} points "
+                     f"of {len(names)} variables (flags: {' '.join(flags)})")
+
+
+def magnitude(x):
+    """|x| of axis values (the real part for .ac frequencies)."""
+    return np.abs(np.real(x))
+
+
+# ==========================================
+# RAW FILE
+# ==========================================
+class RawFile:
+    """One memory-mapped .raw file. data is a structured array (one field
+    per variable) over the file; traces are views of it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = read_header(path)
+        self.plotname = self.header.get("Plotname", "")
+        self.flags = self.header["flags"]
+        self.names = [v["name"] for v in self.header["variables"]]
+        data_bytes = os.path.getsize(path) - self.header["offset"]
+        self.dtype = record_dtype(self.header, data_bytes)
+        # An aborted run can leave fewer points than the header promises
+        self.n_points = min(self.header["n_points"], data_bytes // self.dtype.itemsize)
+        self.data = np.memmap(path, dtype=self.dtype, mode='r', offset=self.header["offset"],
+                              shape=(self.n_points,))
+        self._axes = {}
+        self._runs = None
+
+    def __repr__(self):
+        return (f"RawFile({os.path.basename(self.path)!r}, {self.plotname}, {len(self.names)} variables, "
+                f"{self.n_points} points, {len(self.runs())} run(s))")
+
+    def trace(self, name, run=None):
+        """Values of one variable (a view), optionally of one step run.
+        Names are matched case-insensitively."""
+        field = self._field(name)
+        values = self.data[field]
+        if run is not None:
+            lo, hi = self.runs()[run]
+            values = values[lo:hi]
+        return values
+
+    def _field(self, name):
+        for n in self.names:
+            if n.lower() == name.lower():
+                return n
+        raise KeyError(f"No trace {name} in {self.path} (has {', '.join(self.names)})")
+
+    def axis(self, run=None):
+        """The x axis (time, frequency, sweep variable) of one run, or of the
+        whole file, as |values| (LTspice flags points with its sign). Only
+        that range is read and copied."""
+        if run not in self._axes:
+            lo, hi = (0, self.n_points) if run is None else self.runs()[run]
+            self._axes[run] = magnitude(self.data[self.names[0]][lo:hi])
+        return self._axes[run]
+
+    def extent(self, run):
+        """Length of one run's x axis (last |value| - first)."""
+        lo, hi = self.runs()[run]
+        x = self.data[self.names[0]]
+        return float(magnitude(x[hi - 1]) - magnitude(x[lo]))
+
+    def tail(self, run, span):
+        """(|x|, index slice) of the last `span` of one run's x axis, plus the
+        point before it. Found by bisection, so only the pages it probes and
+        the slice itself are read."""
+        lo, hi = self.runs()[run]
+        x = self.data[self.names[0]]
+        start = magnitude(x[hi - 1]) - span
+        a, b = lo, hi - 1
+        while a < b:
+            mid = (a + b) // 2
+            if magnitude(x[mid]) < start:
+                a = mid + 1
+            else:
+                b = mid
+        window = slice(max(a - 1, lo), hi)
+        return magnitude(x[window]), window
+
+    def runs(self):
+        """[(lo, hi)] point ranges of the .step runs (one range if not stepped)."""
+        if self._runs is None:
+            starts = [0]
+            if "stepped" in self.flags and self.n_points > 1:
+                x = self.data[self.names[0]]
+                last = None
+                for lo in range(0, self.n_points, SCAN_CHUNK):
+                    chunk = magnitude(x[lo:lo + SCAN_CHUNK])
+                    if last is not None and chunk[0] < last:
+                        starts.append(lo)
+                    starts += (np.flatnonzero(chunk[1:] < chunk[:-1]) + lo + 1).tolist()
+                    last = chunk[-1]
+            self._runs = list(zip(starts, starts[1:] + [self.n_points]))
+        return self._runs
+
+    def step_labels(self):
+        """'.step' parameter text per run from the .log, or None."""
+        log = os.path.splitext(self.path)[0] + ".log"
+        if not os.path.exists(log):
+            return None
+        with open(log, 'rb') as f:
+            raw = f.read()
+        text = raw.decode('utf-16-le' if raw[1:2] == b"\x00" else 'latin-1', errors='replace')
+        labels = [m.group(1).strip() for m in re.finditer(r"^\s*\.step\s+(.*)$", text, flags=re.M)]
+        return labels if len(labels) == len(self.runs()) else None
+
+
+# ==========================================
+# ANALYSIS
+# ==========================================
+def tail_window(t, f0, periods=PERIODS):
+    """Index range [lo, hi) of the last whole periods of f0 in t."""
+    span = periods / f0
+    if t[-1] - t[0] < span:
+        raise ValueError(f"Run is {t[-1] - t[0]:.4g} s, shorter than {periods} periods of {f0:g} Hz")
+    lo = int(np.searchsorted(t, t[-1] - span, side='left'))
+    return max(lo - 1, 0), len(t)
+
+
+def resample(t, y, t0, t1, n):
+    """y on n uniform points in [t0, t1) (linear, from LTspice's variable steps)."""
+    grid = t0 + (t1 - t0) * np.arange(n) / n
+    return np.interp(grid, t, y)
+
+
+def spectrum(t, y, f0, periods=PERIODS):
+    """Amplitude of each harmonic of f0 (index 0 is DC) over the last
+    periods. The window holds a whole number of periods, so harmonic k sits
+    exactly in bin k * periods and no window function is needed."""
+    lo, hi = tail_window(t, f0, periods)
+    t, y = t[lo:hi], np.asarray(y[lo:hi], dtype=np.float64)
+    n = periods * SAMPLES_PER_PERIOD
+    u = resample(t, y, t[-1] - periods / f0, t[-1], n)
+    amp = np.abs(np.fft.rfft(u)) * 2 / n
+    amp[0] /= 2
+    return amp[::periods][:SAMPLES_PER_PERIOD // 2], u
+
+
+def thd(harmonics, count=HARMONICS):
+    """THD in % from harmonic amplitudes (H2..Hcount over H1)."""
+    if harmonics[1] == 0:
+        return np.nan
+    return float(100 * np.sqrt(np.sum(harmonics[2:count + 1] ** 2)) / harmonics[1])
+
+
+def estimate_f0(t, y):
+    """Test-tone frequency from the rising zero crossings of a trace (for
+    files without --f0). Pass it the tail of a run, after start-up."""
+    n = 1 << 14
+    u = resample(t, np.asarray(y, dtype=np.float64), t[0], t[-1], n)
+    u -= u.mean()
+    i = np.flatnonzero((u[:-1] < 0) & (u[1:] >= 0))
+    if len(i) < 2:
+        raise ValueError(f"Under two periods of the test tone in the last {t[-1] - t[0]:.4g} s; pass --f0")
+    # Crossing times, interpolated between grid points
+    tc = t[0] + (t[-1] - t[0]) / n * (i + u[i] / (u[i] - u[i + 1]))
+    return float((len(i) - 1) / (tc[-1] - tc[0]))
+
+
+def decimate(t, y, points=PLOT_POINTS):
+    """(t, min, max) envelopes on `points` buckets, for plotting long runs
+    without losing spikes."""
+    if len(t) <= points:
+        y = np.asarray(y)
+        return np.asarray(t), y, y
+    edges = np.linspace(0, len(t), points + 1).astype(np.int64)[:-1]
+    y = np.asarray(y)
+    return np.asarray(t)[edges], np.minimum.reduceat(y, edges), np.maximum.reduceat(y, edges)
+
+
+def analyse_run(raw, run, input_trace, output_trace, f0=None):
+    if not f0:
+        t, window = raw.tail(run, F0_TAIL * raw.extent(run))
+        f0 = estimate_f0(t, raw.trace(input_trace)[window])
+    t, window = raw.tail(run, PERIODS / f0)
+    vin, vout = raw.trace(input_trace)[window], raw.trace(output_trace)[window]
+    lo, hi = raw.runs()[run]
+    h_out, u_out = spectrum(t, vout, f0)
+    h_in, u_in = spectrum(t, vin, f0)
+    ac_out = u_out - h_out[0]
+    rms_in = np.sqrt(np.mean((u_in - h_in[0]) ** 2))
+    rms_out = np.sqrt(np.mean(ac_out ** 2))
+    return {"run": run, "points": hi - lo, "f0_hz": round(f0, 3),
+            "gain_db": round(float(20 * np.log10(rms_out / rms_in)), 3) if rms_in and rms_out else None,
+            "thd_pct": round(thd(h_out), 4), "thd_in_pct": round(thd(h_in), 4),
+            "out_pp": round(float(ac_out.max() - ac_out.min()), 6), "out_dc": round(float(h_out[0]), 6),
+            "crest": round(float(np.abs(ac_out).max() / rms_out), 4) if rms_out else None,
+            "harmonics_db": [round(float(20 * np.log10(h / h_out[1])), 1) if h > 0 else None
+                             for h in h_out[2:HARMONICS + 1]]}
+
+
+def analyse(path, input_trace=INPUT_TRACE, output_trace=OUTPUT_TRACE, f0=None):
+    """Every run of one .raw file (process-pool task)."""
+    t0 = time.perf_counter()
+    result = {"file": os.path.abspath(path)}
+    try:
+        raw = RawFile(path)
+        result.update(plotname=raw.plotname, points=raw.n_points, variables=len(raw.names))
+        if raw.names[0].lower() != "time":
+            result["skipped"] = f"not a transient ({raw.plotname})"
+        else:
+            labels = raw.step_labels()
+            result["runs"] = []
+            for run in range(len(raw.runs())):
+                r = analyse_run(raw, run, input_trace, output_trace, f0)
+                r["step"] = labels[run] if labels else None
+                result["runs"].append(r)
+    except Exception as e:  # One bad file shouldn't sink the batch
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["analysis_s"] = round(time.perf_counter() - t0, 4)
+    return result
+
+
+# ==========================================
+# BATCH
+# ==========================================
+def discover(paths):
+    files = set()
+    for p in paths:
+        if os.path.isdir(p):
+            files.update(glob.glob(os.path.join(p, "*.raw")))
+        else:
+            files.add(p)
+    return sorted(os.path.abspath(f) for f in files)
+
+
+def _fmt(v, spec):
+    return "-" if v is None or v != v else spec.format(v)
+
+
+def print_table(results):
+    print(f"\n{'file':28} {'step':24} {'f0 Hz':>8} {'gain dB':>8} {'THD %':>8} {'crest':>6} {'out pp':>8}")
+    for r in results:
+        name = os.path.basename(r["file"])
+        if "error" in r or "skipped" in r:
+            print(f"{name:28} {r.get('error') or r['skipped']}")
+            continue
+        for run in r["runs"]:
+            step = run["step"] or f"run {run['run']}"
+            print(f"{name:28} {step[:24]:24} {run['f0_hz']:>8.1f} {_fmt(run['gain_db'], '{:.2f}'):>8} "
+                  f"{_fmt(run['thd_pct'], '{:.3f}'):>8} {_fmt(run['crest'], '{:.3f}'):>6} {run['out_pp']:>8.4f}")
+
+
+def main(args):
+    files = discover(args.paths or [os.path.dirname(os.path.abspath(__file__))])
+    if not files:
+        print("No .raw files found.")
+        return
+    t0 = time.perf_counter()
+    tasks = (files, [args.input] * len(files), [args.output] * len(files), [args.f0] * len(files))
+    if args.workers == 1 or len(files) == 1:
+        results = list(map(analyse, *tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(analyse, *tasks))
+    print(f"Analysed {len(files)} files in {time.perf_counter() - t0:.2f}s")
+    print_table(results)
+
+    with open(args.report, 'w') as f:
+        json.dump({"input": args.input, "output": args.output, "results": results}, f, indent=2)
+    print(f"\nReport saved to {args.report}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read LTspice .raw files and measure gain / THD per step run.")
+    parser.add_argument("paths", nargs="*", help=".raw files or folders of them (default: this folder)")
+    parser.add_argument("--input", default=INPUT_TRACE, help="Input trace (default: %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_TRACE, help="Output trace (default: %(default)s)")
+    parser.add_argument("--f0", type=float, default=None, help="Test-tone frequency, Hz (default: from the input)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument("--report", default=REPORT_NAME)
+    main(parser.parse_args())
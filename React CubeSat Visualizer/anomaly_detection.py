@@ -0,0 +1,189 @@
+import numpy as np
+
+from orbit_propagation import shadow_edges, sunlit_at
+from telemetry_ingest import iter_chunks
+
+# ==========================================
+# FULL-RESOLUTION ANOMALY / FAULT DETECTION
+# ==========================================
+# Runs over every telemetry row (not the downsampled samples) in chunks, so
+# a dip between two kept samples is still found. Rules:
+#   anomaly - battery below anomaly_volts (the classify() threshold)
+#   fault   - sunlit with solar current below fault_solar; sunlit comes
+#             from the shadow transition times, not per-row propagation
+#   zscore  - battery more than Z_LIMIT standard deviations from the mean of
+#             the previous ROLL_WINDOW rows (sudden jumps / spikes)
+#   rate    - battery changing faster than VOLT_RATE_LIMIT V/s
+# Flagged rows are merged into intervals (rows of one rule less than
+# MERGE_GAP_S apart), so the output stays small for long missions:
+#   (kind, severity, start, end, start_row, end_row, rows, score)
+# start / end are POSIX seconds, rows the number of flagged rows and score
+# the worst exceedance (volts / mA below the threshold, |z|, |dV/dt|).
+#
+# Rolling statistics carry the last ROLL_WINDOW rows across chunks, and open
+# intervals carry over too, so chunking doesn't change the result.
+
+DETECT_CHUNK_ROWS = 65536
+ROLL_WINDOW = 64          # Rows in the trailing window
+ROLL_MIN_ROWS = 16        # Valid rows needed before z-scores count
+Z_LIMIT = 6.0
+Z_MIN_STD = 0.005         # V; floor so a flat signal doesn't divide by ~0
+VOLT_RATE_LIMIT = 0.02    # V/s
+MERGE_GAP_S = 60.0
+
+KINDS = ("fault", "anomaly", "rate", "zscore")
+SEVERITY = {"fault": 3, "anomaly": 2, "rate": 2, "zscore": 1}
+DETECT_PARAMS = (ROLL_WINDOW, ROLL_MIN_ROWS, Z_LIMIT, Z_MIN_STD, VOLT_RATE_LIMIT, MERGE_GAP_S)
+
+
+def forward_fill(times, carry):
+    """Unparseable timestamps take the previous row's time (carry: the last
+    time of the previous chunk); leading ones with nothing before them take
+    the first parsed time."""
+    ext = np.concatenate([[carry], times])
+    idx = np.where(np.isnan(ext), 0, np.arange(len(ext)))
+    np.maximum.accumulate(idx, out=idx)
+    out = ext[idx][1:]
+    bad = np.isnan(out)
+    if bad.any() and not bad.all():
+        out[bad] = out[~bad][0]
+    return out
+
+
+def rolling_zscores(tail, values):
+    """|z| of each value against the ROLL_WINDOW values before it; tail is
+    the previous chunk's last ROLL_WINDOW values. NaN values are skipped,
+    rows with too little history get z = 0."""
+    ext = np.concatenate([tail, values])
+    valid = ~np.isnan(ext)
+    ref = ext[valid][0] if valid.any() else 0.0  # shift: keeps the variance sums well-conditioned
+    x = np.where(valid, ext - ref, 0.0)
+    c = np.concatenate([[0], np.cumsum(valid)])
+    s1 = np.concatenate([[0.0], np.cumsum(x)])
+    s2 = np.concatenate([[0.0], np.cumsum(x * x)])
+    k = len(tail) + np.arange(len(values))   # ext index of each value
+    lo = np.maximum(0, k - ROLL_WINDOW)
+    n = c[k] - c[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (s1[k] - s1[lo]) / n
+        std = np.sqrt(np.maximum((s2[k] - s2[lo]) / n - mean * mean, 0.0))
+        z = np.abs(x[k] - mean) / np.maximum(std, Z_MIN_STD)
+    z[(n < ROLL_MIN_ROWS) | ~valid[k]] = 0.0
+    return z
+
+
+class IntervalMerger:
+    """Turns one rule's flagged rows into intervals, chunk by chunk. The
+    last interval of a chunk stays open until a later flag is too far away."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.open = None  # [start, end, start_row, end_row, rows, score]
+        self.closed = []
+
+    def feed(self, rows, secs, mask, score):
+        idx = np.flatnonzero(mask)
+        if not len(idx):
+            return
+        t = secs[idx]
+        cut = np.flatnonzero(np.diff(t) > MERGE_GAP_S) + 1
+        starts = np.concatenate([[0], cut])
+        groups = zip(np.minimum.reduceat(t, starts), np.maximum.reduceat(t, starts),
+                     rows[idx[starts]], rows[idx[np.append(cut, len(idx)) - 1]],
+                     np.diff(np.append(starts, len(idx))), np.maximum.reduceat(score[idx], starts))
+        for g in groups:
+            g = [float(g[0]), float(g[1]), int(g[2]), int(g[3]), int(g[4]), float(g[5])]
+            if self.open is not None and g[0] - self.open[1] <= MERGE_GAP_S:
+                o = self.open
+                self.open = [min(o[0], g[0]), max(o[1], g[1]), o[2], g[3], o[4] + g[4], max(o[5], g[5])]
+            else:
+                self.flush()
+                self.open = g
+
+    def flush(self):
+        if self.open is not None:
+            self.closed.append(self.open)
+            self.open = None
+
+
+def detect_events(file_name, satellite, eph, ts, anomaly_volts, fault_solar, row_time=None,
+                  resume=None, chunk_rows=DETECT_CHUNK_ROWS):
+    """Event intervals over every row of file_name, as a list of dicts
+    sorted by start. row_time (t0, seconds per row) places rows of a log
+    without a time column on the pipeline's synthetic timeline. resume:
+    start at a stream_downsample resume point (--append)."""
+    mergers = {kind: IntervalMerger(kind) for kind in KINDS}
+    tail = np.empty(0)
+    last_t, last_v = np.nan, np.nan  # Last valid battery reading (rate rule)
+    carry_t = np.nan
+    n_rows = 0
+
+    for rows, times, volts, solar in iter_chunks(file_name, chunk_rows, resume):
+        n_rows += len(rows)
+        if times is None:
+            t0, dt = row_time
+            secs = t0 + dt * rows
+        else:
+            secs = forward_fill(times, carry_t)
+            if np.isnan(secs).all():
+                continue
+            carry_t = secs[-1]
+
+        lo, hi = float(np.min(secs)), float(np.max(secs))
+        edges, state0 = shadow_edges(satellite, eph, ts, lo, hi)
+        sunlit = sunlit_at(secs, edges, state0)
+
+        with np.errstate(invalid='ignore'):
+            low = volts < anomaly_volts
+            fault = sunlit & (solar < fault_solar)
+        z = rolling_zscores(tail, volts)
+        tail = np.concatenate([tail, volts])[-ROLL_WINDOW:]
+
+        # Rate of change between consecutive valid readings (carried over)
+        ok = ~np.isnan(volts)
+        tv = np.concatenate([[last_t], secs[ok]])
+        vv = np.concatenate([[last_v], volts[ok]])
+        dt_v = np.diff(tv)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rate = np.where(dt_v > 0, np.abs(np.diff(vv)) / dt_v, 0.0)
+        rate = np.nan_to_num(rate)
+        rate_full = np.zeros(len(volts))
+        rate_full[ok] = rate
+        if ok.any():
+            last_t, last_v = tv[-1], vv[-1]
+
+        mergers["anomaly"].feed(rows, secs, low, np.nan_to_num(anomaly_volts - volts))
+        mergers["fault"].feed(rows, secs, fault, np.nan_to_num(fault_solar - solar))
+        mergers["zscore"].feed(rows, secs, z > Z_LIMIT, z)
+        mergers["rate"].feed(rows, secs, rate_full > VOLT_RATE_LIMIT, rate_full)
+
+    events = []
+    for kind, merger in mergers.items():
+        merger.flush()
+        events += [{"kind": kind, "severity": SEVERITY[kind], "start": g[0], "end": g[1],
+                    "start_row": g[2], "end_row": g[3], "rows": g[4], "score": round(g[5], 6)}
+                   for g in merger.closed]
+    events.sort(key=lambda e: (e["start"], -e["severity"]))
+    counts = ", ".join(f"{sum(e['kind'] == k for e in events)} {k}" for k in KINDS)
+    print(f"Detection: {n_rows} rows -> {len(events)} events ({counts}).")
+    return events
+
+
+def merge_appended(old, new, from_row):
+    """--append: keep the old events that ended before from_row (the row the
+    new scan started at) and join each kind's last one with a new event
+    that starts within MERGE_GAP_S of it."""
+    kept = [dict(e) for e in old if e["end_row"] < from_row]
+    last = {}
+    for e in kept:
+        last[e["kind"]] = e
+    out = list(kept)
+    for e in new:
+        prev = last.pop(e["kind"], None)
+        if prev is not None and e["start"] - prev["end"] <= MERGE_GAP_S:
+            prev.update(end=max(prev["end"], e["end"]), end_row=e["end_row"], rows=prev["rows"] + e["rows"],
+                        score=max(prev["score"], e["score"]))
+        else:
+            out.append(e)
+    out.sort(key=lambda e: (e["start"], -e["severity"]))
+    return out
@@ -0,0 +1,125 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from process_data import SAT_NAME, LIMIT, load_physics, run_pipeline
+
+# ==========================================
+# BATCH RUNNER
+# ==========================================
+# Runs many (TLE, telemetry file, output) jobs through process_data's
+# pipeline on a process pool. Each worker loads the timescale and de421.bsp
+# once and reuses them for every job it picks up.
+#
+# Manifest: JSON list or CSV with columns
+#   name, line1, line2, telemetry, output
+# and optionally limit, anomaly_volts, fault_solar. Relative telemetry/output
+# paths are resolved against the manifest folder. Jobs that only differ in
+# thresholds share the cached ingest / propagate stages (stage_cache.py), so
+# a threshold sweep is one job per setting over the same telemetry file.
+#
+# Usage: python batch_process.py jobs.json --workers 8
+
+RULE_FIELDS = ("anomaly_volts", "fault_solar")
+
+# Per-process physics, set by the pool initializer
+_TS = None
+_EPH = None
+
+
+def _init_worker():
+    global _TS, _EPH
+    _TS, _EPH = load_physics()
+
+
+def load_manifest(manifest_path):
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    if manifest_path.lower().endswith('.csv'):
+        with open(manifest_path, 'r', newline='') as f:
+            jobs = list(csv.DictReader(f))
+    else:
+        with open(manifest_path, 'r') as f:
+            jobs = json.load(f)
+
+    for job in jobs:
+        if 'tle' in job and 'line1' not in job:
+            job['line1'], job['line2'] = job['tle']
+        job['name'] = job.get('name') or SAT_NAME
+        job['telemetry'] = os.path.join(base, job['telemetry'])
+        job['output'] = os.path.join(base, job['output'])
+    return jobs
+
+
+def _run_job(job):
+    """Runs one job in a worker. The pipeline's prints go to <output>.log
+    so they don't interleave on the console."""
+    t_start = time.perf_counter()
+    log = io.StringIO()
+    result = {"name": job['name'], "telemetry": job['telemetry'], "output": job['output'], "pid": os.getpid()}
+    try:
+        # run_pipeline falls back to simulated telemetry for a missing file;
+        # in a batch that is a bad manifest path, not a clean run
+        if not os.path.exists(job['telemetry']):
+            raise FileNotFoundError(f"telemetry file not found: {job['telemetry']}")
+        with contextlib.redirect_stdout(log):
+            rules = {k: float(job[k]) for k in RULE_FIELDS if job.get(k) not in (None, "")}
+            stats = run_pipeline(job['line1'], job['line2'], job['telemetry'], job['output'],
+                                 _TS, _EPH, name=job['name'], limit=int(job.get('limit') or LIMIT), rules=rules)
+        result.update(status="ok", **stats)
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = round(time.perf_counter() - t_start, 3)
+
+    try:
+        with open(job['output'] + '.log', 'w') as f:
+            f.write(log.getvalue())
+    except OSError:
+        pass
+    return result
+
+
+def run_batch(jobs, workers=None, report_path=None):
+    t_start = time.perf_counter()
+    results = []
+    n = len(jobs)
+    print(f"--- BATCH: {n} jobs on {workers or os.cpu_count()} workers ---")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_run_job, job) for job in jobs]
+        for k, fut in enumerate(as_completed(futures), 1):
+            r = fut.result()
+            results.append(r)
+            detail = f"{r.get('samples', 0)} samples" if r['status'] == "ok" else r['error']
+            print(f"[{k}/{n}] {r['status'].upper():5} {r['seconds']:7.2f}s  {r['name']}  "
+                  f"{os.path.basename(r['telemetry'])} ({detail})")
+
+    wall = time.perf_counter() - t_start
+    ok = sum(r['status'] == "ok" for r in results)
+    busy = sum(r['seconds'] for r in results)
+    print(f"--- BATCH COMPLETE: {ok}/{n} ok in {wall:.2f}s "
+          f"({n / wall:.2f} jobs/s, {busy / wall:.2f} jobs in flight on average) ---")
+
+    report = {"jobs": results, "wall_seconds": round(wall, 3), "job_seconds": round(busy, 3),
+              "workers": workers or os.cpu_count(), "ok": ok, "failed": n - ok}
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run process_data over a manifest of jobs.")
+    parser.add_argument("manifest", help="JSON or CSV manifest of (name, line1, line2, telemetry, output)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--report", default=None, help="Where to write the JSON timing report")
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+    report_path = args.report or os.path.splitext(args.manifest)[0] + "_report.json"
+    run_batch(jobs, workers=args.workers, report_path=report_path)
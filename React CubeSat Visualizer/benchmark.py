@@ -0,0 +1,213 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# ==========================================
+# PIPELINE BENCHMARK
+# ==========================================
+# Times every stage of process_data.py on synthetic logs (synth_telemetry.py)
+# of each size and format, and writes the results as JSON so runs on
+# different commits can be compared (--compare old.json).
+#
+# Every (size, format) case runs in a fresh interpreter, so peak RSS is that
+# case's own. Stages:
+#   ingest      read + parse every row (no downsampling)
+#   downsample  stream_downsample() minus the ingest time
+#   propagation propagate() on the kept samples (PROPAGATION_MODE)
+#   sunlit      the eclipse test alone, exact, on the same samples
+#   passes      find_access() over the log's span, pass cache off
+#   export      classify + json / binary export
+# peak_rss_mb is the process high-water mark once the stage is done.
+#
+# Runs offline: the bundled Quetzal-1 TLE and the local ephemeris
+# (physics_data.py).
+#
+# Usage: python benchmark.py --sizes 1e4 1e5 1e6 --formats csv parquet xlsx
+#        python benchmark.py --sizes 1e7 --formats csv parquet --compare old.json
+
+BENCH_DIR_NAME = "bench_data"
+BENCH_SIZES = [1e4, 1e5, 1e6]
+BENCH_FORMATS = ["csv", "parquet", "xlsx"]
+BENCH_OUTPUT = "benchmark_results.json"
+STAGES = ["physics", "ingest", "downsample", "propagation", "sunlit", "passes", "export"]
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10  # bytes vs kB
+
+
+@contextlib.contextmanager
+def timed(stages, name):
+    t0 = time.perf_counter()
+    yield
+    stages[name] = {"seconds": round(time.perf_counter() - t0, 4), "peak_rss_mb": round(peak_rss_mb(), 1)}
+
+
+def run_case(path, limit, method):
+    """All stages on one file, in this process. Returns the result dict."""
+    import numpy as np
+    from skyfield.api import EarthSatellite
+    import process_data as pd
+    from telemetry_ingest import find_time_col, open_rows, resolve_columns, stream_downsample, \
+        to_float, to_posix
+    from orbit_propagation import posix_to_time, propagate
+    from ground_stations import find_access
+
+    stages = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        with timed(stages, "physics"):
+            ts, eph = pd.load_physics()
+            satellite = EarthSatellite(pd.LINE1, pd.LINE2, pd.SAT_NAME, ts)
+        epoch = satellite.epoch.utc_datetime()
+        # Pay the reader's lazy imports (pyarrow, openpyxl, tz data) before timing
+        warm = open_rows(path, count=False)[1]
+        next(warm, None)
+        warm.close()
+
+        with timed(stages, "ingest"):
+            header, rows, _, _ = open_rows(path)
+            v_idx, s_idx = resolve_columns(header)
+            t_col = find_time_col(header)
+            t_idx = header.index(t_col) if t_col is not None else None
+            n_rows = 0
+            for row in rows:
+                to_float(row[v_idx], 0.0), to_float(row[s_idx], 0.0)
+                if t_idx is not None:
+                    to_posix(row[t_idx])
+                n_rows += 1
+
+        with timed(stages, "downsample"):
+            cols = stream_downsample(path, limit, method)
+        stages["downsample"]["seconds"] = round(max(0.0, stages["downsample"]["seconds"]
+                                                     - stages["ingest"]["seconds"]), 4)
+
+        secs = cols["times"] if cols["times"] is not None else \
+            epoch.timestamp() + 60.0 * np.arange(len(cols["volts"]))
+
+        with timed(stages, "propagation"):
+            lon, lat, elev, sunlit = propagate(satellite, eph, ts, secs, mode=pd.PROPAGATION_MODE,
+                                               max_error_m=pd.INTERP_MAX_ERROR_M, verbose=False)
+
+        with timed(stages, "sunlit"):
+            satellite.at(posix_to_time(ts, secs)).is_sunlit(eph)
+
+        with timed(stages, "passes"):
+            t0, t1 = float(secs[0]), float(secs[-1])
+            events = find_access(satellite, ts, pd.STATIONS, t0, t1, cache_dir=None)
+            passes = {st.name: pd.build_passes(events[st.name], secs, epoch, "telemetry")
+                      for st in pd.STATIONS}
+
+        with tempfile.TemporaryDirectory() as out_dir, timed(stages, "export"):
+            out_cols = {"lon": lon, "lat": lat, "elev": elev, "sunlit": sunlit,
+                        "volts": cols["volts"], "solar": cols["solar"], "secs": secs}
+            pd.write_outputs(os.path.join(out_dir, "mission_data.json"), path, pd.SAT_NAME, epoch,
+                             "telemetry", out_cols, passes, {})
+
+    return {"rows": n_rows, "samples": len(cols["volts"]), "stages": stages,
+            "total_seconds": round(sum(s["seconds"] for s in stages.values()), 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1)}
+
+
+def bench_file(bench_dir, rows, fmt):
+    """Synthetic log for this case, generated once and reused."""
+    from synth_telemetry import generate
+    path = os.path.join(bench_dir, f"telemetry_{rows}.{fmt}")
+    if not os.path.exists(path):
+        t0 = time.perf_counter()
+        generate(path, rows)
+        print(f"  generated {os.path.basename(path)} in {time.perf_counter() - t0:.1f}s")
+    return path
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["rows"], r["format"]): r for r in json.load(f)["results"] if "stages" in r}
+    print(f"\n--- vs {baseline_path} (new / old seconds) ---")
+    for r in results:
+        old = baseline.get((r["rows"], r["format"]))
+        if not old or "stages" not in r:
+            continue
+        ratios = [f"{name} {r['stages'][name]['seconds'] / old['stages'][name]['seconds']:.2f}x"
+                  for name in STAGES if old["stages"].get(name, {}).get("seconds")]
+        print(f"{r['rows']:>9} {r['format']:8} " + "  ".join(ratios))
+
+
+def main(args):
+    from process_data import LIMIT
+    from synth_telemetry import XLSX_MAX_ROWS
+    from telemetry_ingest import DOWNSAMPLE_METHOD
+
+    limit = args.limit or LIMIT
+    method = args.method or DOWNSAMPLE_METHOD
+    bench_dir = args.bench_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), BENCH_DIR_NAME)
+    os.makedirs(bench_dir, exist_ok=True)
+    results = []
+
+    for rows in (int(float(s)) for s in args.sizes):
+        for fmt in args.formats:
+            if fmt == "xlsx" and rows > XLSX_MAX_ROWS:
+                print(f"{rows:>9} {fmt:8} skipped (over the xlsx row limit)")
+                results.append({"rows": rows, "format": fmt, "skipped": "xlsx row limit"})
+                continue
+            path = bench_file(bench_dir, rows, fmt)
+            # Fresh interpreter per case: peak RSS belongs to this case only
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", path,
+                                   "--limit", str(limit), "--method", method],
+                                  capture_output=True, text=True)
+            if proc.returncode:
+                print(f"{rows:>9} {fmt:8} FAILED\n{proc.stderr}")
+                results.append({"rows": rows, "format": fmt, "error": proc.stderr.strip().splitlines()[-1:]})
+                continue
+            r = json.loads(proc.stdout)
+            r.update(format=fmt, file_mb=round(os.path.getsize(path) / 1e6, 2))
+            results.append(r)
+            print(f"{rows:>9} {fmt:8} {r['total_seconds']:8.2f}s  peak {r['peak_rss_mb']:7.1f} MB  " +
+                  "  ".join(f"{k} {v['seconds']:.2f}" for k, v in r["stages"].items()))
+
+    report = {
+        "meta": {"commit": git_commit(), "date": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                 "python": platform.python_version(), "machine": platform.machine(),
+                 "platform": platform.platform(), "cpus": os.cpu_count(), "limit": limit, "method": method},
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the telemetry pipeline on synthetic logs.")
+    parser.add_argument("--sizes", nargs="+", default=BENCH_SIZES, help="Row counts (e.g. 1e4 1e7)")
+    parser.add_argument("--formats", nargs="+", default=BENCH_FORMATS, choices=BENCH_FORMATS)
+    parser.add_argument("--limit", type=int, default=None, help="Samples kept (default: process_data.LIMIT)")
+    parser.add_argument("--method", default=None, help="Downsampling method (default: telemetry_ingest's)")
+    parser.add_argument("--bench-dir", default=None, help=f"Where synthetic logs go (default: ./{BENCH_DIR_NAME})")
+    parser.add_argument("--output", default=BENCH_OUTPUT)
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.limit, args.method)))
+    else:
+        main(args)
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# ==========================================
+# INCREMENTAL RUN CHECKPOINT
+# ==========================================
+# Saved next to the output after every run (mission_data.json ->
+# mission_data.checkpoint.npz) so the next run with --append only reads the
+# rows added to the telemetry log since then:
+#   arrays - the per-sample columns of the last output (lon, lat, elev,
+#            sunlit, volts, solar, secs), so old samples are never
+#            re-propagated
+#   meta   - the source file (path, size, mtime, head hash), TLE, limit,
+#            downsampling method, where to resume reading (see
+#            telemetry_ingest.stream_downsample), the end of the pass search
+#            window, finished passes, any pass still in progress and the
+#            classification rules the exported samples were coloured with.
+
+CHECKPOINT_VERSION = 1
+HEAD_BYTES = 1 << 16  # Hashed to notice a replaced (not appended) CSV
+ARRAYS = ("lon", "lat", "elev", "sunlit", "volts", "solar", "secs")
+
+
+def checkpoint_path(out_path):
+    return os.path.splitext(out_path)[0] + ".checkpoint.npz"
+
+
+def head_hash(file_name):
+    with open(file_name, 'rb') as f:
+        return hashlib.sha1(f.read(HEAD_BYTES)).hexdigest()
+
+
+def source_info(file_name):
+    st = os.stat(file_name)
+    info = {"file": os.path.abspath(file_name), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    # xlsx / parquet are rewritten as a whole on append, only CSV keeps its head
+    if file_name.lower().endswith('.csv'):
+        info["head"] = head_hash(file_name)
+    return info
+
+
+def save_checkpoint(out_path, arrays, meta):
+    path = checkpoint_path(out_path)
+    meta = dict(meta, version=CHECKPOINT_VERSION)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, meta=np.array(json.dumps(meta)), **{k: np.asarray(arrays[k]) for k in ARRAYS})
+    os.replace(tmp, path)
+    return path
+
+
+def load_checkpoint(out_path):
+    """(arrays, meta), or None if there is no usable checkpoint."""
+    path = checkpoint_path(out_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            arrays = {k: z[k] for k in ARRAYS}
+    except (OSError, ValueError, KeyError):
+        return None
+    if meta.get("version") != CHECKPOINT_VERSION:
+        return None
+    return arrays, meta
+
+
+def stale_reason(meta, file_name, line1, line2, limit, method):
+    """Why the checkpoint can't be appended to (None if it can)."""
+    if meta.get("resume") is None:
+        return "previous run cannot be resumed"
+    if meta["file"] != os.path.abspath(file_name):
+        return "different telemetry file"
+    if (meta["line1"], meta["line2"], meta["limit"], meta["method"]) != (line1, line2, limit, method):
+        return "TLE, limit or downsampling method changed"
+    if os.path.getsize(file_name) < meta["size"]:
+        return "telemetry file shrank"
+    if "head" in meta and head_hash(file_name) != meta["head"]:
+        return "telemetry file was replaced"
+    return None
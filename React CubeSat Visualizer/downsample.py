@@ -0,0 +1,159 @@
+import numpy as np
+
+# ==========================================
+# SHAPE-PRESERVING DOWNSAMPLING
+# ==========================================
+# stride - every step-th row (the original behaviour)
+# minmax - per bucket: min/max voltage and min/max solar
+# lttb   - Largest-Triangle-Three-Buckets on voltage, plus the min voltage
+#          and min solar sample of each bucket
+#
+# Both shape modes keep the lowest voltage and lowest solar sample of every
+# bucket. A voltage dip anywhere in a bucket is therefore always kept, and the
+# anomaly threshold applied later still sees it, whatever it is set to.
+#
+# Faults are only partly covered. A fault is a sunlit sample with low solar,
+# but sunlit is unknown here: it comes from the orbit, after downsampling. In
+# a bucket that touches an eclipse, the lowest solar sample is an eclipse one
+# (~0, or SOLAR_FILL for missing cells), so a sunlit dropout in the same bucket
+# can be dropped. The downsampled fault flags, and the LOD levels built from
+# them, can miss such faults. The full-resolution pass in
+# anomaly_detection.py (detect_events) scans every row with sunlit flags, so
+# its fault intervals are complete.
+
+PICKS_PER_BUCKET = {"stride": 1, "minmax": 4, "lttb": 3}
+BLOCK_BUCKETS = 256  # Buckets buffered per vectorized pass
+
+
+def bucket_size(method, n_rows, limit):
+    return max(1, PICKS_PER_BUCKET[method] * n_rows // limit)
+
+
+def bucket_extremes(v, s, bucket):
+    """Indices of min/max voltage and min/max solar in each bucket."""
+    n = len(v)
+    nb = -(-n // bucket)
+    pad = nb * bucket - n
+    V = np.concatenate([v, np.full(pad, np.nan)]).reshape(nb, bucket)
+    S = np.concatenate([s, np.full(pad, np.nan)]).reshape(nb, bucket)
+    base = np.arange(nb) * bucket
+    idx = np.concatenate([base + np.nanargmin(V, 1), base + np.nanargmax(V, 1),
+                          base + np.nanargmin(S, 1), base + np.nanargmax(S, 1)])
+    return np.unique(idx)
+
+
+def _lttb_bucket(x, y, prev, nxt):
+    """Index in (x, y) forming the largest triangle with prev and nxt."""
+    area = np.abs((prev[0] - nxt[0]) * (y - prev[1]) - (prev[0] - x) * (nxt[1] - prev[1]))
+    return int(np.argmax(area))
+
+
+class StreamSampler:
+    """Bucketed downsampling over a row stream with bounded memory.
+    Rows are buffered BLOCK_BUCKETS buckets at a time and selected in one
+    vectorized pass; only the kept rows and one block live in memory."""
+
+    def __init__(self, method, bucket, limit=None, prev=None):
+        self.method = method
+        self.bucket = bucket
+        self.limit = limit  # set when the row count is unknown
+        self.buf = []       # (i, v, s, t) rows of the current block
+        self.kept = []      # selected (i, v, s, t) rows
+        self.prev = None if prev is None else tuple(prev)  # last LTTB pick (x, y)
+        self._next_bucket = None
+        self.last_bucket = None  # (first row, prev) of the first bucket a resumed run must redo
+
+    def add(self, i, v, s, t):
+        self.buf.append((i, v, s, t))
+        if len(self.buf) >= (BLOCK_BUCKETS + 1) * self.bucket:
+            self._process(final=False)
+
+    def _process(self, final):
+        if not self.buf:
+            return
+        rows = np.asarray(self.buf, dtype=float)
+        b = self.bucket
+        nb = len(rows) // b if not final else -(-len(rows) // b)
+        # LTTB needs the next bucket's average, so hold one bucket back
+        n_take = nb if final else nb - 1
+        if n_take <= 0:
+            return
+        use = rows[:n_take * b]
+        x, v, s = use[:, 0], use[:, 1], use[:, 2]
+
+        if self.method == "minmax":
+            picks = bucket_extremes(v, s, b)
+            self.last_bucket = (x[(n_take - 1) * b], None)
+        else:
+            picks = []
+            started = self.prev is None
+            if started:
+                picks.append(0)  # always keep the first row
+                self.prev = (x[0], v[0])
+            for k in range(n_take):
+                lo, hi = k * b, min(len(use), (k + 1) * b)
+                if k + 1 < n_take:
+                    nxt = (x[hi:hi + b].mean(), v[hi:hi + b].mean())
+                elif len(rows) > hi:
+                    nxt = (rows[hi:hi + b, 0].mean(), rows[hi:hi + b, 1].mean())
+                else:
+                    nxt = (x[hi - 1], v[hi - 1])  # last bucket: aim at the end
+                # LTTB picks depend on the next bucket too, so a resumed run
+                # redoes the last two buckets
+                self.last_bucket = self._next_bucket
+                self._next_bucket = (x[lo], None if started and k == 0 else self.prev)
+                j = lo + _lttb_bucket(x[lo:hi], v[lo:hi], self.prev, nxt)
+                self.prev = (x[j], v[j])
+                picks.extend((j, lo + int(np.argmin(v[lo:hi])), lo + int(np.argmin(s[lo:hi]))))
+            if final:
+                picks.append(len(use) - 1)  # and the last
+            picks = np.unique(picks)
+
+        self.kept.extend(map(tuple, use[picks]))
+        self.buf = self.buf[n_take * b:]
+
+        if self.limit and len(self.kept) >= 2 * self.limit:
+            self._shrink()
+
+    def _shrink(self):
+        """Unknown row count: halve the kept set and double the bucket."""
+        kept = np.asarray(self.kept, dtype=float)
+        keep = bucket_extremes(kept[:, 1], kept[:, 2], 2 * PICKS_PER_BUCKET[self.method])
+        self.kept = list(map(tuple, kept[keep]))
+        self.bucket *= 2
+
+    def finish(self):
+        self._process(final=True)
+        return self.kept
+
+
+# ==========================================
+# MULTI-RESOLUTION PYRAMID
+# ==========================================
+def select_level(volts, solar, bucket, flagged=None):
+    """Min/max bucketing of the (already propagated) samples, plus the first
+    anomaly/fault sample of each bucket, so every level keeps the flags of
+    the samples it is built from (see the note above on faults)."""
+    idx = bucket_extremes(volts, solar, bucket)
+    if flagged is not None and len(flagged):
+        flagged = np.unique(flagged)
+        first = np.unique(flagged // bucket, return_index=True)[1]
+        idx = np.union1d(idx, flagged[first])
+    return idx
+
+
+def build_pyramid(volts, solar, flagged, factor=8, min_samples=256):
+    """Index sets for levels 1..L, each ~factor times coarser than the last.
+    Level 0 is the full series."""
+    levels = []
+    bucket = factor
+    n = len(volts)
+    while n and bucket < n:
+        idx = select_level(volts, solar, bucket, flagged)
+        if levels and len(idx) >= len(levels[-1][1]):
+            break
+        levels.append((bucket, idx))
+        if len(idx) <= min_samples:
+            break
+        bucket *= factor
+    return levels
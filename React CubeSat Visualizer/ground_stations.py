@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from skyfield.framelib import itrs
+
+from orbit_propagation import INTERP_MAX_ERROR_M, grid_step_for_error, hermite, posix_to_time
+from stage_cache import evict_lru
+
+# ==========================================
+# GROUND STATION ACCESS
+# ==========================================
+# Rise / culminate / set events for a whole network of stations. The orbit is
+# propagated once (coarse SGP4 grid in the Earth-fixed frame, shared by every
+# station); each station then evaluates elevation vectorized on a fine
+# sub-grid of the interpolated track and refines crossings and peaks by
+# bisection / golden-section search. Stations run on a thread pool.
+#
+# Results are cached per (TLE, station, UTC day) block, so overlapping or
+# repeated windows only compute the days they have not seen yet.
+
+GroundStation = namedtuple("GroundStation", "name lat lon alt_m min_el")
+
+# Lat: 43.4643 N, Lon: 80.5204 W (West is negative)
+WATERLOO = GroundStation("Waterloo", 43.4643, -80.5204, 0.0, 10.0)
+
+# event: 0=Rise, 1=Culminate (Peak), 2=Set  (same codes as find_events)
+RISE, CULMINATE, SET = 0, 1, 2
+
+SCAN_STEP_S = 10.0     # Elevation scan resolution on the interpolated track
+REFINE_TOL_S = 0.01    # Event time tolerance
+BLOCK_S = 86400.0      # Cache block (one UTC day)
+CACHE_DIR_NAME = ".pass_cache"
+CACHE_VERSION = 1
+CACHE_MAX_BYTES = 64 * 2**20  # Least recently used blocks are evicted past this
+STATION_SLUG_LEN = 32         # Station name characters kept in cache file names
+_UNSAFE = re.compile(r"[^A-Za-z0-9_-]+")
+
+# WGS84, same model as wgs84.latlon()
+_A = 6378137.0
+_F = 1.0 / 298.257223563
+_E2 = 2.0 * _F - _F * _F
+
+
+def station_frame(st):
+    """Station Earth-fixed position (m) and local 'up' unit vector."""
+    lat, lon = np.radians(st.lat), np.radians(st.lon)
+    N = _A / np.sqrt(1.0 - _E2 * np.sin(lat)**2)
+    pos = np.array([(N + st.alt_m) * np.cos(lat) * np.cos(lon),
+                    (N + st.alt_m) * np.cos(lat) * np.sin(lon),
+                    (N * (1.0 - _E2) + st.alt_m) * np.sin(lat)])
+    up = np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    return pos, up
+
+
+class SharedTrack:
+    """One propagated ephemeris (Earth-fixed), interpolated on demand."""
+
+    def __init__(self, satellite, ts, t0, t1, max_error_m=INTERP_MAX_ERROR_M):
+        step = grid_step_for_error(satellite, max_error_m)
+        m = max(2, int(np.ceil((t1 - t0) / step)) + 1)
+        self.grid = t0 + step * np.arange(m)
+        pos, vel = satellite.at(posix_to_time(ts, self.grid)).frame_xyz_and_velocity(itrs)
+        self.pos, self.vel = pos.m, vel.m_per_s
+
+    def xyz(self, secs):
+        return hermite(self.grid, self.pos, self.vel, np.asarray(secs, dtype=float))
+
+
+def elevation_deg(track, st_pos, st_up, secs):
+    d = track.xyz(secs) - st_pos[:, None]
+    return np.degrees(np.arcsin(np.einsum('i,ij->j', st_up, d) / np.linalg.norm(d, axis=0)))
+
+
+def _bisect(f, lo, hi, lo_above):
+    """Vectorized bisection of f(t) = 0 on [lo, hi] intervals."""
+    while len(lo) and np.max(hi - lo) > REFINE_TOL_S:
+        mid = 0.5 * (lo + hi)
+        same = (f(mid) > 0) == lo_above
+        lo = np.where(same, mid, lo)
+        hi = np.where(same, hi, mid)
+    return 0.5 * (lo + hi)
+
+
+def _golden_max(f, lo, hi):
+    """Vectorized golden-section search for the maximum of f on [lo, hi]."""
+    g = (np.sqrt(5.0) - 1.0) / 2.0
+    a, b = lo.copy(), hi.copy()
+    while len(a) and np.max(b - a) > REFINE_TOL_S:
+        c = b - g * (b - a)
+        d = a + g * (b - a)
+        left = f(c) > f(d)
+        b = np.where(left, d, b)
+        a = np.where(left, a, c)
+    return 0.5 * (a + b)
+
+
+def station_events(track, st, t0, t1):
+    """All events in [t0, t1) as a list of (time_secs, kind, elevation_deg)."""
+    st_pos, st_up = station_frame(st)
+    el = lambda s: elevation_deg(track, st_pos, st_up, s)
+    above = lambda s: el(s) - st.min_el
+
+    # Pad one scan step either side so edge peaks/crossings are bracketed
+    scan = np.arange(t0 - SCAN_STEP_S, t1 + 2 * SCAN_STEP_S, SCAN_STEP_S)
+    e = el(scan)
+    up = e > st.min_el
+
+    # Threshold crossings
+    cross = np.flatnonzero(up[:-1] != up[1:])
+    t_cross = _bisect(above, scan[cross], scan[cross + 1], up[cross])
+    kinds = np.where(up[cross], SET, RISE)
+
+    # Peaks above the threshold: slope goes + to -
+    de = np.diff(e)
+    peak = np.flatnonzero((de[:-1] > 0) & (de[1:] <= 0)) + 1
+    t_peak = _golden_max(el, scan[peak - 1], scan[peak + 1])
+    e_peak = el(t_peak) if len(t_peak) else np.empty(0)
+    keep = e_peak > st.min_el
+    t_peak, e_peak = t_peak[keep], e_peak[keep]
+
+    times = np.concatenate([t_cross, t_peak])
+    kind = np.concatenate([kinds, np.full(len(t_peak), CULMINATE)])
+    elev = np.concatenate([np.full(len(t_cross), st.min_el), e_peak])
+    inside = (times >= t0) & (times < t1)
+    order = np.argsort(times[inside], kind='stable')
+    return [(float(t), int(k), float(x)) for t, k, x in
+            zip(times[inside][order], kind[inside][order], elev[inside][order])]
+
+
+# ==========================================
+# PASS CACHE (per TLE, station, UTC day)
+# ==========================================
+def _block_path(cache_dir, tle, st, block_start):
+    """Cache file of one block. The digest (which covers the full station)
+    makes the name unique; the station name is only there for reading, so
+    it is reduced to [A-Za-z0-9_-] and can't leave cache_dir."""
+    key = json.dumps([CACHE_VERSION, tle, list(st), block_start, SCAN_STEP_S])
+    digest = hashlib.sha1(key.encode()).hexdigest()[:20]
+    slug = _UNSAFE.sub("_", str(st.name)).strip("_")[:STATION_SLUG_LEN] or "station"
+    return os.path.join(cache_dir, f"{slug}.{int(block_start)}.{digest}.json")
+
+
+def find_access(satellite, ts, stations, t0, t1, cache_dir=CACHE_DIR_NAME, workers=None):
+    """Events for every station over [t0, t1] (POSIX seconds).
+    Returns {station_name: [(time_secs, kind, elevation_deg), ...]}."""
+    tle = [satellite.model.satnum, satellite.model.jdsatepoch, satellite.model.jdsatepochF,
+           satellite.model.no_kozai, satellite.model.ecco, satellite.model.inclo,
+           satellite.model.nodeo, satellite.model.argpo, satellite.model.mo, satellite.model.bstar]
+    blocks = np.arange(np.floor(t0 / BLOCK_S) * BLOCK_S, t1, BLOCK_S)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Work out which (station, block) pairs are missing from the cache
+    cached, missing = {}, []
+    for st in stations:
+        for b in blocks:
+            path = _block_path(cache_dir, tle, st, b) if cache_dir else None
+            if path and os.path.exists(path):
+                with open(path) as f:
+                    cached[(st.name, b)] = [tuple(ev) for ev in json.load(f)]
+                os.utime(path)
+            else:
+                missing.append((st, b, path))
+
+    if missing:
+        lo = min(b for _, b, _ in missing) - 2 * SCAN_STEP_S
+        hi = max(b for _, b, _ in missing) + BLOCK_S + 3 * SCAN_STEP_S
+        track = SharedTrack(satellite, ts, lo, hi)
+
+        def work(job):
+            st, b, path = job
+            evs = station_events(track, st, b, b + BLOCK_S)
+            if path:
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(evs, f)
+                os.replace(tmp, path)
+            return st.name, b, evs
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for name, b, evs in pool.map(work, missing):
+                cached[(name, b)] = evs
+        print(f"Access: computed {len(missing)} station-day blocks, "
+              f"{len(stations) * len(blocks) - len(missing)} from cache.")
+        if cache_dir:
+            evict_lru(cache_dir, CACHE_MAX_BYTES, ".json")
+
+    result = {}
+    for st in stations:
+        evs = [ev for b in blocks for ev in cached[(st.name, b)]]
+        result[st.name] = [ev for ev in evs if t0 <= ev[0] <= t1]
+    return result
@@ -0,0 +1,351 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import socket
+import time
+from collections import deque
+
+import numpy as np
+from skyfield.api import EarthSatellite
+
+from process_data import LINE1, LINE2, SAT_NAME, load_physics, classify
+from orbit_propagation import propagate
+from telemetry_ingest import (VOLT_FILL, SOLAR_FILL, find_time_col, resolve_columns,
+                              to_float, to_posix)
+from downsample import select_level
+
+# ==========================================
+# LIVE TELEMETRY SERVER
+# ==========================================
+# New telemetry rows -> propagation + classification -> delta frames pushed
+# to the dashboard over Server-Sent Events (GET /events).
+#
+# Sources (CSV rows with the same header as the telemetry log):
+#   --tail telemetry.csv   follow a log as rows are appended to it
+#   --feed-port 8766       accept rows over a local TCP socket (stand-in for
+#                          the ground station link): header line, then rows
+#
+# Rows are processed in whatever batch has queued up while the previous one
+# was propagating, so a lone row goes straight through and a burst is
+# handled in one vectorized call. Each client has its own pending list:
+# frames that pile up while a slow client drains are merged into one, and
+# thinned to about MAX_FRAME_SAMPLES (bucket min/max + flagged samples, as
+# in the LOD pyramid) if needed. Slow clients never hold up the pipeline or
+# the other clients. Sources get backpressure from the bounded row queue.
+#
+# Frame (JSON, event "frame"; the first one after connecting is "snapshot"):
+#   index      global sample numbers (gaps where a frame was thinned)
+#   times      POSIX seconds
+#   path       [lon, lat, alt_m], colors [r, g, b], voltage, solar
+#   anomalies / faults   positions within the frame
+#   received   when the newest row of the frame reached the server
+#   meta       snapshot only
+#
+# Usage: python live_server.py --tail telemetry.csv
+#        VITE_LIVE_URL=http://localhost:8765/events npm run dev
+
+HOST = "127.0.0.1"
+HTTP_PORT = 8765
+FEED_PORT = 8766
+
+QUEUE_ROWS = 100000        # Row queue between sources and the pipeline
+BATCH_MAX_ROWS = 5000      # Rows per propagation call
+TAIL_POLL_S = 0.05         # How often a tailed file is checked for new rows
+MAX_FRAME_SAMPLES = 2000   # Coalesced frames above this are thinned
+MAX_PENDING_SAMPLES = 20000  # Per-client backlog before it is thinned in place
+HISTORY_SAMPLES = 20000    # Kept for the snapshot sent to new clients
+KEEPALIVE_S = 15
+SEND_BUFFER = 1 << 16      # Small socket buffers so a slow client pushes back early
+
+FRAME_KEYS = ("index", "times", "path", "colors", "voltage", "solar", "flags")
+FLAG_ANOMALY = 1
+FLAG_FAULT = 2
+
+
+# ==========================================
+# ROW PARSING
+# ==========================================
+class RowParser:
+    """CSV row -> (time, voltage, solar), columns resolved from the header
+    the same way as the batch pipeline. Rows without a usable time get their
+    arrival time."""
+
+    def __init__(self, header):
+        self.v_idx, self.s_idx = resolve_columns(header)
+        t_col = find_time_col(header)
+        self.t_idx = header.index(t_col) if t_col is not None else None
+
+    def __call__(self, row):
+        def cell(idx):
+            return row[idx] if idx is not None and idx < len(row) else None
+        t = to_posix(cell(self.t_idx)) if self.t_idx is not None else float('nan')
+        now = time.time()
+        return (t if t == t else now, to_float(cell(self.v_idx), VOLT_FILL),
+                to_float(cell(self.s_idx), SOLAR_FILL), now)
+
+
+# ==========================================
+# SOURCES
+# ==========================================
+async def tail_source(path, queue, from_start=False):
+    """Follow a CSV log like `tail -f`. Only complete lines are parsed, so a
+    row being written is picked up on the next poll."""
+    while not os.path.exists(path):
+        await asyncio.sleep(TAIL_POLL_S)
+    with open(path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig')]), [])
+        parse = RowParser(header)
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        partial = b''
+        while True:
+            data = f.read()
+            if not data:
+                await asyncio.sleep(TAIL_POLL_S)
+                continue
+            lines = (partial + data).split(b'\n')
+            partial = lines.pop()
+            for row in csv.reader(line.decode('utf-8') for line in lines):
+                if row:
+                    await queue.put(parse(row))
+
+
+async def feed_source(host, port, queue):
+    """Local socket stand-in for the downlink: each connection sends a CSV
+    header line, then rows. Reading pauses while the queue is full."""
+    async def handle(reader, writer):
+        header = next(csv.reader([(await reader.readline()).decode('utf-8-sig')]), [])
+        parse = RowParser(header)
+        while line := await reader.readline():
+            row = next(csv.reader([line.decode('utf-8')]), None)
+            if row:
+                await queue.put(parse(row))
+        writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Accepting telemetry rows on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+# ==========================================
+# PIPELINE
+# ==========================================
+def build_frame(rows, first, satellite, eph, ts):
+    """Propagate + classify a batch of rows (runs in a worker thread)."""
+    t, v, s, received = (np.asarray(c, dtype=float) for c in zip(*rows))
+    lon, lat, elev, sunlit = propagate(satellite, eph, ts, t, mode="auto", verbose=False)
+    colors, fault_idx, anomaly_idx = classify(sunlit, v, s)
+    flags = np.zeros(len(rows), dtype=np.uint8)
+    flags[anomaly_idx] |= FLAG_ANOMALY
+    flags[fault_idx] |= FLAG_FAULT
+    return {"index": first + np.arange(len(rows)), "times": t,
+            "path": np.column_stack([lon, lat, elev]), "colors": colors.astype(np.uint8),
+            "voltage": v, "solar": s, "flags": flags, "received": float(received.max())}
+
+
+async def run_pipeline(queue, hub, satellite, eph, ts):
+    count = 0
+    while True:
+        rows = [await queue.get()]
+        while len(rows) < BATCH_MAX_ROWS and not queue.empty():
+            rows.append(queue.get_nowait())
+        frame = await asyncio.to_thread(build_frame, rows, count, satellite, eph, ts)
+        count += len(rows)
+        hub.publish(frame)
+
+
+# ==========================================
+# FAN-OUT WITH COALESCING
+# ==========================================
+def frame_size(frame):
+    return len(frame["index"])
+
+
+def coalesce(frames, max_samples=MAX_FRAME_SAMPLES):
+    """Merge a client's backlog into one frame; thin it to about max_samples
+    keeping each bucket's min/max voltage and solar, its first flagged
+    sample and the newest sample. A single frame is sent as it is."""
+    if len(frames) == 1:
+        return frames[0]
+    merged = {k: np.concatenate([f[k] for f in frames]) for k in FRAME_KEYS}
+    merged["received"] = max(f["received"] for f in frames)
+    n = frame_size(merged)
+    if n > max_samples:
+        bucket = -(-4 * n // max_samples)
+        keep = select_level(merged["voltage"], merged["solar"], bucket, np.flatnonzero(merged["flags"]))
+        keep = np.union1d(keep, [n - 1])
+        merged = {k: merged[k][keep] for k in FRAME_KEYS} | {"received": merged["received"]}
+    return merged
+
+
+def encode(frame, event="frame", meta=None):
+    flags = frame["flags"]
+    body = {
+        "index": frame["index"].tolist(),
+        "times": frame["times"].tolist(),
+        "path": frame["path"].tolist(),
+        "colors": frame["colors"].tolist(),
+        "voltage": frame["voltage"].tolist(),
+        "solar": frame["solar"].tolist(),
+        "anomalies": np.flatnonzero(flags & FLAG_ANOMALY).tolist(),
+        "faults": np.flatnonzero(flags & FLAG_FAULT).tolist(),
+        "received": frame["received"],
+    }
+    if meta:
+        body["meta"] = meta
+    return f"event: {event}\ndata: {json.dumps(body)}\n\n".encode()
+
+
+class Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = []
+        self.wake = asyncio.Event()
+
+
+class Hub:
+    """Keeps recent history and a pending list per client."""
+
+    def __init__(self, satellite_name):
+        self.meta = {"name": "Quetzal-1 Live", "satellite": satellite_name, "time_source": "live"}
+        self.clients = set()
+        self.history = deque()
+        self.history_samples = 0
+        self.stats = {"rows": 0, "frames_in": 0, "frames_out": 0, "coalesced": 0,
+                      "latency_ms": deque(maxlen=1000)}
+
+    def publish(self, frame):
+        n = frame_size(frame)
+        self.stats["rows"] += n
+        self.stats["frames_in"] += 1
+        self.history.append(frame)
+        self.history_samples += n
+        while self.history_samples - frame_size(self.history[0]) >= HISTORY_SAMPLES:
+            self.history_samples -= frame_size(self.history.popleft())
+
+        for c in self.clients:
+            c.pending.append(frame)
+            if sum(map(frame_size, c.pending)) > MAX_PENDING_SAMPLES:
+                c.pending = [coalesce(c.pending)]
+            c.wake.set()
+
+    def snapshot(self):
+        if not self.history:
+            return None
+        return coalesce(list(self.history), HISTORY_SAMPLES)
+
+    async def serve(self, writer):
+        client = Client(writer)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        writer.transport.set_write_buffer_limits(high=SEND_BUFFER)
+        self.clients.add(client)
+        try:
+            snap = self.snapshot()
+            if snap is not None:
+                writer.write(encode(snap, "snapshot", self.meta))
+                await writer.drain()
+            while True:
+                try:
+                    await asyncio.wait_for(client.wake.wait(), KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                    await writer.drain()
+                    continue
+                client.wake.clear()
+                frames, client.pending = client.pending, []
+                if not frames:
+                    continue
+                if len(frames) > 1:
+                    self.stats["coalesced"] += len(frames) - 1
+                frame = coalesce(frames)
+                writer.write(encode(frame))
+                # Frames published while a slow client drains are merged next round
+                await writer.drain()
+                self.stats["frames_out"] += 1
+                self.stats["latency_ms"].append(1000 * (time.time() - frame["received"]))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.discard(client)
+
+    def summary(self):
+        lat = np.asarray(self.stats["latency_ms"])
+        out = {k: v for k, v in self.stats.items() if k != "latency_ms"}
+        out["clients"] = len(self.clients)
+        if len(lat):
+            out["latency_ms"] = {"p50": round(float(np.percentile(lat, 50)), 1),
+                                 "p95": round(float(np.percentile(lat, 95)), 1),
+                                 "max": round(float(lat.max()), 1)}
+        return out
+
+
+# ==========================================
+# HTTP (SSE)
+# ==========================================
+def _response(status, content_type, body=b""):
+    head = (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Access-Control-Allow-Origin: *\r\nCache-Control: no-cache\r\n")
+    if body:
+        head += f"Content-Length: {len(body)}\r\nConnection: close\r\n"
+    return head.encode() + b"\r\n" + body
+
+
+async def handle_http(hub, reader, writer):
+    try:
+        request = (await reader.readline()).decode('latin-1').split()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass  # headers are not needed
+        path = request[1].split('?')[0] if len(request) > 1 else ""
+        if path == "/events":
+            writer.write(_response("200 OK", "text/event-stream"))
+            await hub.serve(writer)
+        elif path == "/stats":
+            writer.write(_response("200 OK", "application/json", json.dumps(hub.summary()).encode()))
+        else:
+            writer.write(_response("404 Not Found", "text/plain", b"not found\n"))
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def main(args):
+    ts, eph = load_physics()
+    satellite = EarthSatellite(LINE1, LINE2, SAT_NAME, ts)
+    queue = asyncio.Queue(QUEUE_ROWS)
+    hub = Hub(SAT_NAME)
+
+    tasks = [asyncio.create_task(run_pipeline(queue, hub, satellite, eph, ts))]
+    if args.tail:
+        print(f"Tailing {args.tail}")
+        tasks.append(asyncio.create_task(tail_source(args.tail, queue, args.from_start)))
+    if args.feed_port:
+        tasks.append(asyncio.create_task(feed_source(args.host, args.feed_port, queue)))
+
+    server = await asyncio.start_server(lambda r, w: handle_http(hub, r, w), args.host, args.port)
+    print(f"Serving events on http://{args.host}:{args.port}/events (stats: /stats)")
+    async with server:
+        await asyncio.gather(server.serve_forever(), *tasks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream live telemetry to the dashboard over SSE.")
+    parser.add_argument("--tail", default=None, help="CSV telemetry log to follow")
+    parser.add_argument("--from-start", action="store_true", help="Replay the tailed file's existing rows first")
+    parser.add_argument("--feed-port", type=int, default=None,
+                        help=f"Accept CSV rows on this TCP port (e.g. {FEED_PORT})")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=HTTP_PORT)
+    args = parser.parse_args()
+    if not args.tail and not args.feed_port:
+        parser.error("need --tail and/or --feed-port")
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,224 @@
+import json
+import os
+
+import numpy as np
+
+from downsample import build_pyramid
+
+# ==========================================
+# MISSION DATA EXPORT
+# ==========================================
+# json   - the original single mission_data.json (nested lists)
+# binary - little-endian typed arrays split into time chunks, plus a small
+#          JSON manifest. The dashboard fetches each chunk as an ArrayBuffer
+#          and views it directly (Float32Array / Uint8Array / Uint32Array).
+#
+# Chunk layout (each array starts on a 4-byte boundary):
+#   positions  float32  [count, 3]  lon, lat, alt (m)
+#   colors     uint8    [count, 3]  r, g, b
+#   voltage    float32  [count]
+#   solar      float32  [count]
+#   anomalies  uint32   [k]         global sample indices in this chunk
+#   faults     uint32   [k]
+#
+# Level-of-detail pyramid (lod_<k>/): each level keeps the min/max voltage
+# and solar samples (and the first flagged sample) of every bucket of
+# LOD_FACTOR**k samples. Its chunks carry the original sample index, so the
+# dashboard can fetch just the chunks of one level that cover its zoom window:
+#   index      uint32   [count]
+#   positions, colors, voltage, solar   as above
+#   flags      uint8    [count]     bit 0 = anomaly, bit 1 = fault
+#
+# Appending (keep_before > 0): chunks (and LOD chunks) that only hold samples
+# before keep_before are taken from the existing manifest instead of being
+# written again. This is only valid if those samples, and their colors and
+# flags, are unchanged since the last export. That means the same rows and
+# the same classification rules. The caller makes sure of it:
+# process_data.append_pipeline passes keep_before=0 when the rules in its
+# checkpoint differ from this run's.
+
+BINARY_FORMAT = "quetzal-chunks"
+BINARY_VERSION = 1
+CHUNK_SAMPLES = 1024
+MANIFEST_NAME = "manifest.json"
+LOD_FACTOR = 8
+LOD_MIN_SAMPLES = 256
+FLAG_ANOMALY = 1
+FLAG_FAULT = 2
+
+
+# Custom converter for datetime objects
+def default_converter(o):
+    if hasattr(o, 'isoformat'):
+        return o.isoformat()
+    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
+
+
+def write_json(output, out_path):
+    with open(out_path, 'w') as f:
+        json.dump(output, f, default=default_converter)
+
+
+def binary_dir_for(out_path):
+    """mission_data.json -> mission_data/"""
+    return os.path.splitext(out_path)[0]
+
+
+def _pack(parts):
+    """Concatenate arrays into one buffer, 4-byte aligned.
+    Returns (bytes, {name: {offset, length, type}})."""
+    blob = bytearray()
+    layout = {}
+    for name, arr, components in parts:
+        pad = (-len(blob)) % 4
+        blob.extend(b'\0' * pad)
+        arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+        layout[name] = {"offset": len(blob), "length": int(arr.size),
+                        "type": arr.dtype.name, "components": components}
+        blob.extend(arr.tobytes())
+    return bytes(blob), layout
+
+
+def write_chunk(out_dir, index, start, positions, colors, voltage, solar, anomalies, faults):
+    """Write one chunk file and return its manifest entry."""
+    count = len(voltage)
+    end = start + count
+    blob, layout = _pack([
+        ("positions", np.asarray(positions, dtype=np.float32), 3),
+        ("colors", np.asarray(colors, dtype=np.uint8), 3),
+        ("voltage", np.asarray(voltage, dtype=np.float32), 1),
+        ("solar", np.asarray(solar, dtype=np.float32), 1),
+        ("anomalies", anomalies[(anomalies >= start) & (anomalies < end)].astype(np.uint32), 1),
+        ("faults", faults[(faults >= start) & (faults < end)].astype(np.uint32), 1),
+    ])
+    name = f"chunk_{index:05d}.bin"
+    with open(os.path.join(out_dir, name), 'wb') as f:
+        f.write(blob)
+    return {"url": name, "start": start, "count": count, "byteLength": len(blob), "arrays": layout}
+
+
+def write_lod_chunk(out_dir, index, idx, positions, colors, voltage, solar, flags):
+    blob, layout = _pack([
+        ("index", idx.astype(np.uint32), 1),
+        ("positions", np.asarray(positions, dtype=np.float32), 3),
+        ("colors", np.asarray(colors, dtype=np.uint8), 3),
+        ("voltage", np.asarray(voltage, dtype=np.float32), 1),
+        ("solar", np.asarray(solar, dtype=np.float32), 1),
+        ("flags", flags.astype(np.uint8), 1),
+    ])
+    name = f"chunk_{index:05d}.bin"
+    with open(os.path.join(out_dir, name), 'wb') as f:
+        f.write(blob)
+    return {"url": name, "count": len(idx), "firstIndex": int(idx[0]), "lastIndex": int(idx[-1]),
+            "byteLength": len(blob), "arrays": layout}
+
+
+def read_manifest(out_dir, chunk_samples):
+    """The existing manifest, if it was written in this layout."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != BINARY_FORMAT or manifest.get("version") != BINARY_VERSION \
+            or manifest.get("chunkSamples") != chunk_samples:
+        return None
+    return manifest
+
+
+def _remove_stale(out_dir, chunks):
+    keep = {c["url"] for c in chunks}
+    for name in os.listdir(out_dir):
+        if name.startswith("chunk_") and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+
+
+def write_pyramid(out_dir, positions, colors, voltage, solar, anomalies, faults,
+                  chunk_samples=CHUNK_SAMPLES, factor=LOD_FACTOR, min_samples=LOD_MIN_SAMPLES,
+                  keep_before=0, previous=()):
+    flags = np.zeros(len(voltage), dtype=np.uint8)
+    flags[anomalies] |= FLAG_ANOMALY
+    flags[faults] |= FLAG_FAULT
+    flagged = np.flatnonzero(flags)
+
+    levels = []
+    for k, (bucket, idx) in enumerate(build_pyramid(voltage, solar, flagged, factor, min_samples), 1):
+        level_dir = f"lod_{k}"
+        os.makedirs(os.path.join(out_dir, level_dir), exist_ok=True)
+        # Buckets that end before keep_before select the same samples as last time
+        stable = keep_before // bucket * bucket
+        old = next((lvl["chunks"] for lvl in previous if lvl["level"] == k and lvl["bucket"] == bucket), [])
+        chunks = []
+        for c, start in enumerate(range(0, len(idx), chunk_samples)):
+            sel = idx[start:start + chunk_samples]
+            if c < len(old) and len(sel) == chunk_samples and sel[-1] < stable \
+                    and old[c]["count"] == chunk_samples and old[c]["lastIndex"] == int(sel[-1]):
+                chunks.append(old[c])
+                continue
+            chunks.append(write_lod_chunk(os.path.join(out_dir, level_dir), c, sel, positions[sel],
+                                          colors[sel], voltage[sel], solar[sel], flags[sel]))
+        _remove_stale(os.path.join(out_dir, level_dir), chunks)
+        levels.append({"level": k, "bucket": bucket, "count": len(idx), "dir": level_dir, "chunks": chunks})
+    return levels
+
+
+def write_binary(output, out_dir, chunk_samples=CHUNK_SAMPLES, lod=True, keep_before=0):
+    """Write output['telemetry'] as chunked typed arrays + manifest, plus
+    the LOD pyramid if lod is set. With keep_before, chunks holding only
+    samples before it are reused from the existing manifest, so those
+    samples must be exactly as last exported, classification included
+    (pass 0 when the rules changed)."""
+    os.makedirs(out_dir, exist_ok=True)
+    previous = read_manifest(out_dir, chunk_samples) if keep_before else None
+    tel = output["telemetry"]
+    positions = np.asarray(tel["path"], dtype=np.float64).reshape(-1, 3)
+    colors = np.asarray(tel["colors"]).reshape(-1, 3)
+    voltage = np.asarray(tel["metrics"]["voltage"], dtype=np.float64)
+    solar = np.asarray(tel["metrics"]["solar"], dtype=np.float64)
+    anomalies = np.asarray(tel["anomalies"], dtype=np.int64)
+    faults = np.asarray(tel["faults"], dtype=np.int64)
+    n = len(voltage)
+
+    old_chunks = previous["chunks"] if previous else []
+    chunks = []
+    for index, start in enumerate(range(0, n, chunk_samples)):
+        sl = slice(start, min(n, start + chunk_samples))
+        if start + chunk_samples <= keep_before and index < len(old_chunks) \
+                and old_chunks[index]["count"] == chunk_samples:
+            chunks.append(old_chunks[index])
+            continue
+        chunks.append(write_chunk(out_dir, index, start, positions[sl], colors[sl],
+                                  voltage[sl], solar[sl], anomalies, faults))
+    _remove_stale(out_dir, chunks)
+
+    levels = write_pyramid(out_dir, positions, colors, voltage, solar, anomalies, faults, chunk_samples,
+                           keep_before=keep_before, previous=previous["levels"] if previous else ()) if lod else []
+
+    manifest = {
+        "format": BINARY_FORMAT,
+        "version": BINARY_VERSION,
+        "littleEndian": True,
+        "count": n,
+        "chunkSamples": chunk_samples,
+        "chunks": chunks,
+        "levels": levels,
+        "meta": output["meta"],
+        "passes": output["passes"],
+        "stations": output.get("stations", {}),
+        "events": output.get("events", []),
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, default=default_converter)
+    return manifest
+
+
+def export(output, out_path, formats=("json", "binary"), chunk_samples=CHUNK_SAMPLES, lod=True, keep_before=0):
+    written = []
+    if "json" in formats:
+        write_json(output, out_path)
+        written.append(out_path)
+    if "binary" in formats:
+        out_dir = binary_dir_for(out_path)
+        manifest = write_binary(output, out_dir, chunk_samples, lod, keep_before)
+        written.append(f"{out_dir}/ ({len(manifest['chunks'])} chunks, {len(manifest['levels'])} LOD levels)")
+    return written
@@ -0,0 +1,219 @@
+import numpy as np
+from skyfield.framelib import itrs
+from skyfield.nutationlib import iau2000b_radians
+
+from run_metrics import NULL_METRICS
+
+# ==========================================
+# ORBIT PROPAGATION
+# ==========================================
+# Two ways to attach orbit context (lon, lat, elevation, sunlit) to a set of
+# sample times (POSIX seconds, UTC):
+#   exact  - SGP4 at every sample, in vectorized chunks
+#   interp - SGP4 only on a coarse grid, then cubic Hermite interpolation
+#            (positions + velocities, Earth-fixed frame) to every sample.
+#            Sun/shadow transitions are refined by bisection.
+# shadow_edges() / sunlit_at() give sunlit flags for any number of times
+# (every telemetry row) from the transition times alone.
+
+PROPAGATION_CHUNK = 2000
+INTERP_MAX_ERROR_M = 1.0   # Target position error of the interpolant
+INTERP_CHECK_POINTS = 200  # Interval midpoints checked against SGP4
+SHADOW_TOL_S = 0.01        # Bisection tolerance for eclipse entry/exit
+SHADOW_GRID_S = 60.0       # Grid for shadow_edges() (full-resolution sunlit flags)
+SHADOW_GRID_CHUNK = 20000
+
+# Same ellipsoid as Geocentric.subpoint() (IERS2010)
+GEOID_A_M = 6378136.6
+GEOID_F = 1.0 / 298.25642
+GEOID_E2 = 2.0 * GEOID_F - GEOID_F * GEOID_F
+
+
+def posix_to_time(ts, secs):
+    """POSIX seconds (float array) -> array-valued skyfield Time.
+    Whole days go into the day field so leap seconds are looked up at the
+    sample's own date, not at 1970."""
+    secs = np.asarray(secs, dtype=float)
+    days = np.floor(secs / 86400.0)
+    return ts.utc(1970, 1, 1 + days.astype(np.int64), 0, 0, secs - days * 86400.0)
+
+
+def posix_to_time_fast(ts, secs):
+    """posix_to_time() with the truncated IAU 2000B nutation series (~1 mas):
+    several times cheaper, and plenty for the sun / shadow test."""
+    t = posix_to_time(ts, secs)
+    t._nutation_angles_radians = iau2000b_radians(t)
+    return t
+
+
+def geodetic(xyz_m):
+    """Earth-fixed xyz (3, n) in metres -> lon_deg, lat_deg, elevation_m.
+    Same iteration skyfield uses for subpoints."""
+    x, y, z = xyz_m
+    R = np.sqrt(x*x + y*y)
+    lat = np.arctan2(z, R)
+    for _ in range(3):
+        sin_lat = np.sin(lat)
+        e2_sin_lat = GEOID_E2 * sin_lat
+        aC = GEOID_A_M / np.sqrt(1.0 - e2_sin_lat * sin_lat)
+        hyp = z + aC * e2_sin_lat
+        lat = np.arctan2(hyp, R)
+    lon = (np.arctan2(y, x) - np.pi) % (2*np.pi) - np.pi
+    elev = np.sqrt(hyp*hyp + R*R) - aC
+    return np.degrees(lon), np.degrees(lat), elev
+
+
+# ==========================================
+# EXACT (CHUNKED) PROPAGATION
+# ==========================================
+def propagate_exact(satellite, eph, ts, secs, chunk=PROPAGATION_CHUNK, metrics=NULL_METRICS):
+    """One array-valued Time per chunk, one satellite.at() call shared by the
+    subpoint and the sunlit test. chunk=None does everything in one call."""
+    secs = np.asarray(secs, dtype=float)
+    n = len(secs)
+    chunk = chunk or max(1, n)
+    lon = np.empty(n); lat = np.empty(n); elev = np.empty(n)
+    sunlit = np.zeros(n, dtype=bool)
+
+    for start in range(0, n, chunk):
+        sl = slice(start, min(n, start + chunk))
+        with metrics.batch("chunk", start=start, items=sl.stop - start):
+            with metrics.batch("sgp4"):
+                geocentric = satellite.at(posix_to_time(ts, secs[sl]))
+                subpoint = geocentric.subpoint()
+                lon[sl] = subpoint.longitude.degrees
+                lat[sl] = subpoint.latitude.degrees
+                elev[sl] = subpoint.elevation.km * 1000
+            with metrics.batch("sunlit"):
+                sunlit[sl] = geocentric.is_sunlit(eph)
+    return lon, lat, elev, sunlit
+
+
+# ==========================================
+# COARSE GRID + HERMITE INTERPOLATION
+# ==========================================
+def grid_step_for_error(satellite, max_error_m):
+    """Cubic Hermite error ~ h^4/384 * |x''''|, and |x''''| ~ r*w^4 for an
+    orbit of radius r and angular rate w (Earth-fixed adds ~1/15)."""
+    w = satellite.model.no_kozai / 60.0 * 1.07  # rad/s
+    r = (398600.4418e9 / w**2) ** (1/3)
+    h = (384.0 * max_error_m / (r * w**4)) ** 0.25
+    return float(np.clip(0.8 * h, 1.0, 600.0))
+
+
+def _grid_state(satellite, ts, grid):
+    geocentric = satellite.at(posix_to_time(ts, grid))
+    pos, vel = geocentric.frame_xyz_and_velocity(itrs)
+    return geocentric, pos.m, vel.m_per_s
+
+
+def hermite(grid, pos, vel, secs):
+    """Cubic Hermite interpolation of (3, m) samples at `secs`."""
+    k = np.clip(np.searchsorted(grid, secs, side='right') - 1, 0, len(grid) - 2)
+    h = grid[k+1] - grid[k]
+    s = (secs - grid[k]) / h
+    s2 = s*s; s3 = s2*s
+    h00 = 2*s3 - 3*s2 + 1
+    h10 = s3 - 2*s2 + s
+    h01 = -2*s3 + 3*s2
+    h11 = s3 - s2
+    return (h00*pos[:, k] + h10*h*vel[:, k] + h01*pos[:, k+1] + h11*h*vel[:, k+1])
+
+
+def _shadow_edges(satellite, eph, ts, lo, hi, lo_state, to_time=posix_to_time):
+    """Bisect each [lo, hi] interval (state flips inside) to the crossing."""
+    lo = lo.copy(); hi = hi.copy()
+    while len(lo) and np.max(hi - lo) > SHADOW_TOL_S:
+        mid = 0.5 * (lo + hi)
+        state = satellite.at(to_time(ts, mid)).is_sunlit(eph)
+        same = state == lo_state
+        lo = np.where(same, mid, lo)
+        hi = np.where(same, hi, mid)
+    return 0.5 * (lo + hi)
+
+
+def propagate_interp(satellite, eph, ts, secs, max_error_m=INTERP_MAX_ERROR_M, verbose=True,
+                     metrics=NULL_METRICS):
+    """Propagate on a coarse grid and interpolate to every sample time.
+    The grid step is derived from max_error_m, then checked against SGP4 at
+    interval midpoints and halved until the bound holds."""
+    secs = np.asarray(secs, dtype=float)
+    step = grid_step_for_error(satellite, max_error_m)
+    t_lo, t_hi = float(np.min(secs)), float(np.max(secs))
+
+    while True:
+        m = max(2, int(np.ceil((t_hi - t_lo) / step)) + 1)
+        with metrics.batch("grid", items=m, step_s=step):
+            grid = t_lo + step * np.arange(m)
+            geocentric, pos, vel = _grid_state(satellite, ts, grid)
+
+            # Error check: midpoints are where the Hermite error peaks
+            idx = np.unique(np.linspace(0, m - 2, min(INTERP_CHECK_POINTS, m - 1)).astype(int))
+            mids = grid[idx] + 0.5 * step
+            exact = satellite.at(posix_to_time(ts, mids)).frame_xyz(itrs).m
+            err = np.max(np.linalg.norm(hermite(grid, pos, vel, mids) - exact, axis=0))
+        if err <= max_error_m or step <= 1.0:
+            break
+        step = max(1.0, step / 2)
+
+    if verbose:
+        print(f"Coarse grid: {m} points every {step:.1f}s "
+              f"(max interp error {err:.3f} m) for {len(secs)} samples.")
+
+    with metrics.batch("hermite", items=len(secs)):
+        lon, lat, elev = geodetic(hermite(grid, pos, vel, secs))
+
+    # Shadow state: take the grid value, except inside intervals whose ends
+    # disagree, where the exact crossing time decides.
+    with metrics.batch("sunlit", items=m):
+        grid_sunlit = np.asarray(geocentric.is_sunlit(eph), dtype=bool)
+    k = np.clip(np.searchsorted(grid, secs, side='right') - 1, 0, m - 2)
+    sunlit = grid_sunlit[k].copy()
+    flips = np.flatnonzero(grid_sunlit[:-1] != grid_sunlit[1:])
+    if len(flips):
+        with metrics.batch("shadow_edges", items=len(flips)):
+            edges = _shadow_edges(satellite, eph, ts, grid[flips], grid[flips+1], grid_sunlit[flips])
+        pos_in = np.searchsorted(flips, k)
+        hit = (pos_in < len(flips)) & (flips[np.minimum(pos_in, len(flips)-1)] == k)
+        j = pos_in[hit]
+        after = secs[hit] >= edges[j]
+        sunlit[hit] = np.where(after, grid_sunlit[flips[j] + 1], grid_sunlit[flips[j]])
+
+    return lon, lat, elev, sunlit
+
+
+def shadow_edges(satellite, eph, ts, t0, t1, step=SHADOW_GRID_S):
+    """Sun/shadow transition times in [t0, t1] (sorted) and the state at t0.
+    Eclipses last ~35 min, so a minute grid can't step over one. The grid
+    is aligned to multiples of step, so overlapping calls (chunks) find the
+    very same edges."""
+    t0 = np.floor(t0 / step) * step
+    m = max(2, int(np.ceil((t1 - t0) / step)) + 1)
+    grid = t0 + step * np.arange(m)
+    state = np.empty(m, dtype=bool)
+    for lo in range(0, m, SHADOW_GRID_CHUNK):
+        sl = slice(lo, min(m, lo + SHADOW_GRID_CHUNK))
+        state[sl] = satellite.at(posix_to_time_fast(ts, grid[sl])).is_sunlit(eph)
+    flips = np.flatnonzero(state[:-1] != state[1:])
+    edges = _shadow_edges(satellite, eph, ts, grid[flips], grid[flips+1], state[flips], posix_to_time_fast) \
+        if len(flips) else np.empty(0)
+    return edges, bool(state[0])
+
+
+def sunlit_at(secs, edges, state0):
+    """Sunlit flags at secs from shadow_edges() output."""
+    return (np.searchsorted(edges, secs, side='right') % 2 == 0) == state0
+
+
+def propagate(satellite, eph, ts, secs, mode="auto", max_error_m=INTERP_MAX_ERROR_M, verbose=True,
+              metrics=NULL_METRICS):
+    """mode: 'exact', 'interp' or 'auto' (interp only when samples are
+    denser than the coarse grid would be)."""
+    secs = np.asarray(secs, dtype=float)
+    if mode == "auto":
+        span = float(np.ptp(secs)) if len(secs) > 1 else 0.0
+        dense = len(secs) > 1 and span / (len(secs) - 1) < grid_step_for_error(satellite, max_error_m)
+        mode = "interp" if dense else "exact"
+    if mode == "interp" and len(secs) > 1:
+        return propagate_interp(satellite, eph, ts, secs, max_error_m, verbose, metrics)
+    return propagate_exact(satellite, eph, ts, secs, metrics=metrics)
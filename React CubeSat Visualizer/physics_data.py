@@ -0,0 +1,124 @@
+import argparse
+import functools
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# ==========================================
+# OFFLINE PHYSICS DATA
+# ==========================================
+# Timescale and ephemeris for air-gapped nodes: nothing here ever touches the
+# network. Data files are looked up in $QUETZAL_DATA_DIR, the working folder
+# and this script's folder, in that order.
+#
+# - Timescale: skyfield's builtin leap-second / Delta T tables (shipped
+#   inside the package), loaded once per process.
+# - Ephemeris: opened directly as a SPICE kernel; jplephem memory-maps the
+#   segments, so only the pages an eclipse test touches are read. If a
+#   trimmed kernel (only the Sun / Earth segments over the mission window,
+#   see --trim) is present it is used instead of the full de421.bsp.
+#
+# Usage: python physics_data.py --trim 2020-05-01 2021-05-01
+#        python physics_data.py --check   (measure cold start vs the target)
+
+DATA_DIR_ENV = "QUETZAL_DATA_DIR"
+EPHEMERIS_NAME = "de421.bsp"
+TRIMMED_NAME = "de421_sun_earth.bsp"
+# is_sunlit() needs eph['sun'] - eph['earth']: Sun and Earth-Moon barycentre
+# relative to the solar system barycentre, Earth relative to the EMB
+EPHEMERIS_TARGETS = (3, 10, 399)
+
+STARTUP_TARGET_S = 1.0  # Interpreter start -> physics loaded
+STARTUP_RUNS = 5
+
+
+def data_dirs():
+    dirs = [os.environ.get(DATA_DIR_ENV), os.getcwd(), os.path.dirname(os.path.abspath(__file__))]
+    return [d for d in dirs if d]
+
+
+def find_data_file(name):
+    for d in data_dirs():
+        path = os.path.join(d, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def load_timescale():
+    from skyfield.api import load
+    return load.timescale(builtin=True)
+
+
+@functools.lru_cache(maxsize=None)
+def load_ephemeris(path=None):
+    from skyfield.jpllib import SpiceKernel
+    path = path or find_data_file(TRIMMED_NAME) or find_data_file(EPHEMERIS_NAME)
+    if path is None:
+        raise FileNotFoundError(
+            f"{EPHEMERIS_NAME} not found in {', '.join(data_dirs())}. Copy it there or set "
+            f"{DATA_DIR_ENV}; it is never downloaded.")
+    return SpiceKernel(path)
+
+
+def _julian(date):
+    dt = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return dt.timestamp() / 86400.0 + 2440587.5
+
+
+def trim_ephemeris(start, end, src=None, out=None, targets=EPHEMERIS_TARGETS):
+    """Write a kernel with only `targets` between the two dates (YYYY-MM-DD).
+    de421 is ~17 MB; a year of Sun / Earth segments is a few hundred kB."""
+    from jplephem.daf import DAF
+    from jplephem.excerpter import write_excerpt
+    from jplephem.spk import SPK
+
+    src = src or find_data_file(EPHEMERIS_NAME)
+    if src is None:
+        raise FileNotFoundError(f"{EPHEMERIS_NAME} not found in {', '.join(data_dirs())}")
+    out = out or os.path.join(os.path.dirname(src), TRIMMED_NAME)
+    with open(src, 'rb') as f:
+        spk = SPK(DAF(f))
+        summaries = [s for s, seg in zip(spk.daf.summaries(), spk.segments) if seg.target in targets]
+        tmp = f"{out}.{os.getpid()}.tmp"
+        with open(tmp, 'w+b') as g:
+            write_excerpt(spk, g, _julian(start), _julian(end), summaries)
+    os.replace(tmp, out)
+    print(f"Trimmed {os.path.basename(src)} ({os.path.getsize(src) / 1e6:.1f} MB) -> {out} "
+          f"({os.path.getsize(out) / 1e3:.0f} kB, targets {', '.join(map(str, targets))}, {start} to {end})")
+    return out
+
+
+def measure_cold_start(runs=STARTUP_RUNS):
+    """Seconds from a fresh interpreter to process_data's physics being
+    loaded, one subprocess per run."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = "import process_data; process_data.load_physics()"
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=os.getcwd(), check=True,
+                       env=dict(os.environ, PYTHONPATH=here))
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline timescale / ephemeris data.")
+    parser.add_argument("--trim", nargs=2, metavar=("START", "END"),
+                        help="Write a Sun/Earth-only kernel covering START..END (YYYY-MM-DD)")
+    parser.add_argument("--check", action="store_true", help="Measure cold start against the target")
+    args = parser.parse_args()
+
+    if args.trim:
+        trim_ephemeris(*args.trim)
+    if args.check or not args.trim:
+        times = measure_cold_start()
+        median = statistics.median(times)
+        print(f"Cold start: median {median:.2f}s, min {min(times):.2f}s over {len(times)} runs "
+              f"(target {STARTUP_TARGET_S:.2f}s)")
+        sys.exit(0 if median <= STARTUP_TARGET_S else 1)
@@ -1,181 +1,469 @@
-from skyfield.api import wgs84
-import pandas as pd
+import argparse
 import numpy as np
-import json
-import io
 import os
-from skyfield.api import load, EarthSatellite, wgs84
-from datetime import timedelta
-
-# 1. SETUP PHYSICS (Quetzal-1 TLE)
-line1 = "1 45598U 98067RW  20156.50406087  .00018898  00000-0  34651-3 0  9997"
-line2 = "2 45598  51.6436 213.9137 0003063 103.7997 256.4003 15.49397960  6248"
-ts = load.timescale()
-satellite = EarthSatellite(line1, line2, 'QUETZAL-1', ts)
-eph = load('de421.bsp') 
-epoch = satellite.epoch.utc_datetime()
-
-# 2. LOAD EXCEL FILE
-# We look for the file in the current directory
-file_name = "telemetry.xlsx"
-print(f"Looking for local file: {file_name}...")
-
-if os.path.exists(file_name):
-    print("File found. Parsing Excel (this may take a moment)...")
-    # Read Excel using openpyxl engine
-    df = pd.read_excel(file_name, engine='openpyxl')
-    print("Excel Load Successful.")
-else:
+from skyfield.api import EarthSatellite
+from datetime import datetime, timezone
+from telemetry_ingest import DOWNSAMPLE_METHOD, file_key, load_telemetry, stream_downsample
+from orbit_propagation import propagate
+from ground_stations import WATERLOO, find_access
+from mission_export import export
+from checkpoint import load_checkpoint, save_checkpoint, source_info, stale_reason
+from physics_data import load_ephemeris, load_timescale
+from stage_cache import STAGE_CACHE_DIR_NAME, StageCache
+from run_metrics import NULL_METRICS, RunMetrics
+from anomaly_detection import DETECT_PARAMS, detect_events, merge_appended
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+# Quetzal-1 TLE
+LINE1 = "1 45598U 98067RW  20156.50406087  .00018898  00000-0  34651-3 0  9997"
+LINE2 = "2 45598  51.6436 213.9137 0003063 103.7997 256.4003 15.49397960  6248"
+SAT_NAME = 'QUETZAL-1'
+
+LIMIT = 5000  # Max samples kept after downsampling
+
+# PROPAGATION_MODE: 'exact' runs SGP4 per sample (vectorized chunks),
+# 'interp' runs SGP4 on a coarse grid and interpolates to every sample
+# within INTERP_MAX_ERROR_M, 'auto' picks interp for dense timelines.
+PROPAGATION_MODE = "auto"
+INTERP_MAX_ERROR_M = 1.0
+
+# min_el=10.0 means we only care if it's 10 degrees above horizon.
+# The first station fills "passes" for the dashboard.
+STATIONS = [WATERLOO]
+
+# Outputs: "json" (mission_data.json) and/or "binary" (mission_data/
+# manifest.json + little-endian typed-array chunks for the dashboard)
+EXPORT_FORMATS = ["json", "binary"]
+EXPORT_CHUNK_SAMPLES = 1024
+EXPORT_LOD = True  # Also write the multi-resolution pyramid (binary only)
+
+# Classification rules (changing them reuses the cached ingest and
+# propagation stages, see stage_cache.py)
+ANOMALY_VOLTS = 3.8  # Battery below this is an anomaly
+FAULT_SOLAR = 10     # Sunlit with solar current below this is a fault
+# Also scan every telemetry row (not just the kept samples) for anomaly /
+# fault intervals, see anomaly_detection.py
+DETECT_EVENTS = True
+
+COLOR_FAULT = [255, 0, 255]   # Magenta (Fault)
+COLOR_ECLIPSE = [0, 100, 255] # Blue (Eclipse)
+COLOR_SUN = [255, 215, 0]     # Gold (Sun)
+
+
+# ==========================================
+# 1. SETUP PHYSICS
+# ==========================================
+def load_physics():
+    """Timescale + ephemeris from local files only (see physics_data.py);
+    cached per process."""
+    ts = load_timescale()
+    eph = load_ephemeris()
+    return ts, eph
+
+
+# ==========================================
+# 2-3. LOAD + PROCESS TELEMETRY
+# ==========================================
+def load_inputs(file_name, limit=LIMIT, cache_dir=None, use_cache=True, rec=None, source_key=None):
+    """Returns (volts, solar, sample_times, resume, n_rows). sample_times is
+    POSIX seconds per sample, or None if the log has no time column. resume
+    says where an --append run picks up reading (None in simulation mode).
+    rec: metrics record that gets the row / sample counts.
+    source_key: file_key() of the log, shared with the detect stage."""
+    print(f"Looking for local file: {file_name}...")
+
+    if os.path.exists(file_name):
+        # Rows are streamed and downsampled on the fly (every step-th row),
+        # so the full sheet is never held in memory. The parsed columns are
+        # cached next to the file, keyed by its hash + mtime.
+        cols = load_telemetry(file_name, limit, DOWNSAMPLE_METHOD, cache_dir, use_cache, source_key)
+        if rec is not None:
+            rec.update(rows=cols["n_rows"], items=len(cols["volts"]), step=cols["step"])
+        print(f"Load Successful: kept {len(cols['volts'])} of {cols['n_rows']} rows (step {cols['step']}).")
+
+        volts = cols["volts"].tolist()
+        solar = cols["solar"].tolist()
+        sample_times = None
+        if cols.get("t_col") is not None:
+            print(f"Using telemetry timestamps from column: {cols['t_col']}")
+            sample_times = cols["times"]
+        return volts, solar, sample_times, cols.get("resume"), cols["n_rows"]
+
     print(f"ERROR: Could not find '{file_name}'.")
     print("Please download it from GitHub and place it in this folder.")
-    # Fallback to Simulation so script doesn't crash
-    df = None
-
-# 3. PROCESS DATA
-limit = 5000 
-volts = []
-solar = []
-
-if df is not None:
-    # A. DOWNSAMPLING (Excel is heavy, we must slice)
-    step = max(1, len(df) // limit)
-    df_slice = df.iloc[::step].copy()
-    
-    # B. COLUMN MAPPING (Based on typical Quetzal headers)
-    # We look for 'Battery Voltage' and 'Solar Current'
-    def find_col(keywords):
-        for col in df.columns:
-            for key in keywords:
-                if str(key).lower() in str(col).lower(): return col
-        return None
-
-    # Common headers in Quetzal Excel files:
-    # 'EPS_Dist_Batt_V' or just 'Battery Voltage'
-    v_col = find_col(['batt_v', 'battery', 'voltage'])
-    # 'EPS_Dist_Batt_I' or 'Solar' or 'Current'
-    s_col = find_col(['solar', 'current', 'batt_i']) 
-    
-    # Debug print to see what we found
-    print(f"Mapped Columns -> Voltage: {v_col} | Solar: {s_col}")
-    
-    # Clean and Extract
-    # We use column index 1 and 2 as fallback if names don't match
-    if not v_col: v_col = df.columns[1] 
-    if not s_col: s_col = df.columns[2]
-
-    volts = pd.to_numeric(df_slice[v_col], errors='coerce').fillna(3.9).tolist()
-    solar = pd.to_numeric(df_slice[s_col], errors='coerce').fillna(0).tolist()
-
-else:
-    # SIMULATION MODE
+    # SIMULATION MODE (fallback so script doesn't crash)
     print("Switching to SIMULATION MODE.")
     t_range = np.linspace(0, limit*30, limit)
-    volts = (3.9 + 0.2 * np.sin(t_range/3000)).tolist() 
+    volts = (3.9 + 0.2 * np.sin(t_range/3000)).tolist()
     solar = [200 if np.sin(t/3000) > 0 else 0 for t in t_range]
+    return volts, solar, None, None, limit
+
+
+# ==========================================
+# 4. PROPAGATE ORBIT + CLASSIFY
+# ==========================================
+def propagate_stage(cache, line1, line2, satellite, eph, ts, sample_secs, metrics=NULL_METRICS):
+    """propagate(), memoized on the TLE, the sample times and the mode."""
+    def compute():
+        lon, lat, elev, sunlit = propagate(satellite, eph, ts, sample_secs, mode=PROPAGATION_MODE,
+                                           max_error_m=INTERP_MAX_ERROR_M, metrics=metrics)
+        return {"lon": lon, "lat": lat, "elev": elev, "sunlit": sunlit}, {}
+
+    key = (line1, line2, np.asarray(sample_secs, dtype=float), PROPAGATION_MODE, INTERP_MAX_ERROR_M)
+    arrays, _ = cache.memo("propagate", key, compute)
+    return arrays["lon"], arrays["lat"], arrays["elev"], arrays["sunlit"]
+
+
+def rules_with_defaults(rules):
+    return {"anomaly_volts": ANOMALY_VOLTS, "fault_solar": FAULT_SOLAR, **(rules or {})}
+
+
+def detect_settings(rules):
+    """What detection results depend on besides the file (JSON-able, kept
+    in the checkpoint)."""
+    return [rules_with_defaults(rules), list(DETECT_PARAMS)]
+
+
+def detect_stage(cache, file_name, source_key, line1, line2, satellite, eph, ts, rules, row_time):
+    """detect_events() over the whole file, memoized on the file content
+    (source_key, see telemetry_ingest.file_key), TLE, thresholds and
+    detector settings."""
+    rules = rules_with_defaults(rules)
+
+    def compute():
+        events = detect_events(file_name, satellite, eph, ts, rules["anomaly_volts"], rules["fault_solar"],
+                               row_time)
+        return {}, {"events": events}
+
+    key = (source_key, line1, line2, row_time, detect_settings(rules))
+    _, meta = cache.memo("detect", key, compute)
+    return meta["events"]
+
+
+def classify(sunlit, volts_arr, solar_arr, anomaly_volts=ANOMALY_VOLTS, fault_solar=FAULT_SOLAR):
+    """Fault / eclipse / sun colouring and anomaly flags as NumPy masks."""
+    fault_mask = sunlit & (solar_arr < fault_solar)
+    colors_arr = np.empty((len(sunlit), 3), dtype=np.int64)
+    colors_arr[:] = COLOR_SUN
+    colors_arr[~sunlit] = COLOR_ECLIPSE
+    colors_arr[fault_mask] = COLOR_FAULT
+    anomaly_mask = volts_arr < anomaly_volts
+    return colors_arr, np.flatnonzero(fault_mask), np.flatnonzero(anomaly_mask)
+
+
+# ==========================================
+# 5. GROUND STATION PASSES
+# ==========================================
+def aos_index(t_ev, sample_secs, epoch, time_source):
+    """Index in our main timeline for an AOS at POSIX time t_ev."""
+    if time_source == "telemetry":
+        # Last sample at or before AOS
+        return max(0, int(np.searchsorted(sample_secs, t_ev, side='right')) - 1)
+    time_diff = t_ev - epoch.timestamp()
+    return int(time_diff / 60) # Convert to minutes/index
+
+
+def build_passes(events, sample_secs, epoch, time_source, current_pass=None):
+    """Turn (time, kind, elevation) events into the dashboard's pass list.
+    current_pass holds a pass whose LOS hasn't been seen yet; it is updated
+    in place, so a later call can finish it with the next window's events."""
+    pass_list = []
+    if current_pass is None:
+        current_pass = {}
+
+    for t_ev, event, el in events:
+        ti = datetime.fromtimestamp(t_ev, timezone.utc)
+        # event: 0=Rise, 1=Culminate (Peak), 2=Set
+        if event == 0: # AOS (Acquisition of Signal)
+            current_pass['aos_time'] = ti
+            current_pass['aos_index'] = aos_index(t_ev, sample_secs, epoch, time_source)
+
+        elif event == 1: # Max Elevation
+            current_pass['max_el'] = int(el)
+
+        elif event == 2 and 'aos_time' in current_pass: # LOS (Loss of Signal)
+            duration = (ti - current_pass['aos_time']).total_seconds()
+            current_pass['duration_mins'] = int(duration / 60)
+            pass_list.append(dict(current_pass))
+            current_pass.clear() # Reset for next pass
+    return pass_list
 
-# 4. PROPAGATE ORBIT
-path = []
-timestamps = []
-colors = []
-anomalies = []
-faults = []
-
-print("Propagating Orbit...")
-
-for i in range(len(volts)):
-    t_sim = epoch + timedelta(seconds=i*60) 
-    t = ts.from_datetime(t_sim)
-    
-    subpoint = satellite.at(t).subpoint()
-    path.append([subpoint.longitude.degrees, subpoint.latitude.degrees, subpoint.elevation.km * 1000])
-    timestamps.append(i)
-    
-    # Logic
-    is_sunlit = satellite.at(t).is_sunlit(eph)
-    
-    # Convert 'solar' to float safely
-    curr_solar = float(solar[i])
-    
-    if is_sunlit and curr_solar < 10:
-        faults.append(i)
-        colors.append([255, 0, 255]) # Magenta (Fault)
-    elif not is_sunlit:
-        colors.append([0, 100, 255]) # Blue (Eclipse)
+
+def _pass_to_json(p):
+    return {k: v.isoformat() if k == 'aos_time' else v for k, v in p.items()}
+
+
+def _pass_from_json(p):
+    return {k: datetime.fromisoformat(v) if k == 'aos_time' else v for k, v in p.items()}
+
+
+def _event_to_json(e, sample_secs, epoch, time_source):
+    """Detection interval for the dashboard: ISO times plus the sample
+    indices it spans on the main timeline."""
+    return {"kind": e["kind"], "severity": e["severity"],
+            "start_time": datetime.fromtimestamp(e["start"], timezone.utc).isoformat(),
+            "end_time": datetime.fromtimestamp(e["end"], timezone.utc).isoformat(),
+            "start_index": aos_index(e["start"], sample_secs, epoch, time_source),
+            "end_index": aos_index(e["end"], sample_secs, epoch, time_source),
+            "rows": e["rows"], "score": e["score"]}
+
+
+# ==========================================
+# PIPELINE
+# ==========================================
+def write_outputs(out_path, file_name, name, epoch, time_source, cols, passes, meta, keep_before=0,
+                  rules=None, metrics=NULL_METRICS, events=()):
+    """Classify the samples, export them and save the checkpoint for the
+    next --append run. cols: lon, lat, elev, sunlit, volts, solar, secs.
+    rules: classify() keyword overrides (anomaly_volts, fault_solar).
+    events: full-resolution detection intervals (anomaly_detection.py)."""
+    n_samples = len(cols["volts"])
+    with metrics.stage("classify", items=n_samples) as rec:
+        colors_arr, fault_idx, anomaly_idx = classify(cols["sunlit"], cols["volts"], cols["solar"],
+                                                      **(rules or {}))
+        rec.update(faults=len(fault_idx), anomalies=len(anomaly_idx))
+
+    output = {
+        "meta": { "name": "Quetzal-1 Excel Log", "satellite": name, "start_time": epoch.isoformat(), "time_source": time_source },
+        "telemetry": {
+            "path": np.column_stack([cols["lon"], cols["lat"], cols["elev"]]).tolist(),
+            "timestamps": list(range(n_samples)),
+            "colors": colors_arr.tolist(),
+            "anomalies": anomaly_idx.tolist(),
+            "faults": fault_idx.tolist(),
+            "metrics": { "voltage": cols["volts"].tolist(), "solar": cols["solar"].tolist() }
+        },
+        "passes": next(iter(passes.values())),
+        "stations": passes,
+        "events": [_event_to_json(e, cols["secs"], epoch, time_source) for e in events]
+    }
+
+    with metrics.stage("export", items=n_samples, formats=EXPORT_FORMATS):
+        written = export(output, out_path, EXPORT_FORMATS, EXPORT_CHUNK_SAMPLES, EXPORT_LOD, keep_before)
+    if os.path.exists(file_name):
+        with metrics.stage("checkpoint"):
+            meta = dict(meta, time_source=time_source, events=list(events),
+                        passes={st: [_pass_to_json(p) for p in ps] for st, ps in passes.items()},
+                        **source_info(file_name))
+            save_checkpoint(out_path, cols, meta)
+
+    print(f"DONE. Generated {', '.join(written)} from {file_name}.")
+    return {"samples": n_samples, "faults": len(fault_idx), "anomalies": len(anomaly_idx),
+            "passes": len(output["passes"]), "events": len(events)}
+
+
+def append_pipeline(satellite, file_name, out_path, ts, eph, name, limit, prior, rules=None,
+                    metrics=NULL_METRICS):
+    """Process only the rows added since the checkpointed run. Returns None
+    if the new rows can't be appended (the caller then does a full run)."""
+    arrays, meta = prior
+    epoch = satellite.epoch.utc_datetime()
+    st = os.stat(file_name)
+    if (st.st_size, st.st_mtime_ns) == (meta["size"], meta["mtime_ns"]):
+        print(f"No new rows in {file_name} since the last run; {out_path} is up to date.")
+        return {"samples": len(arrays["volts"]), "passes": len(meta["passes"].get(STATIONS[0].name, [])),
+                "new_rows": 0}
+
+    resume = meta["resume"]
+    keep = resume["committed"]
+    # Exported chunks of the kept samples are reused, unless they were
+    # classified with other rules
+    export_keep = keep
+    if meta.get("rules") != rules_with_defaults(rules):
+        print("Append: classification rules changed, exporting every sample.")
+        export_keep = 0
+    print(f"Append: reading {file_name} from row {resume['row']} (step {resume['step']})...")
+    with metrics.stage("ingest", append=True) as rec:
+        new = stream_downsample(file_name, limit, meta["method"], resume=resume)
+        rec.update(rows=new["n_rows"] - resume["row"], items=len(new["volts"]))
+    time_source = "telemetry" if new["t_col"] is not None else "synthetic"
+    if time_source != meta["time_source"]:
+        print("Append: time column changed, doing a full run.")
+        return None
+    if time_source == "telemetry":
+        new_secs = new["times"]
+        if keep and len(new_secs) and new_secs[0] < arrays["secs"][keep - 1]:
+            print("Append: new rows are older than the processed ones, doing a full run.")
+            return None
+    else:
+        new_secs = epoch.timestamp() + 60.0 * (keep + np.arange(len(new["volts"])))
+    print(f"Load Successful: kept {len(new['volts'])} samples from {new['n_rows'] - resume['row']} rows.")
+
+    print(f"Propagating Orbit ({time_source} timestamps, mode={PROPAGATION_MODE}) for new samples...")
+    with metrics.stage("propagate", items=len(new_secs)):
+        lon, lat, elev, sunlit = propagate(satellite, eph, ts, new_secs, mode=PROPAGATION_MODE,
+                                           max_error_m=INTERP_MAX_ERROR_M, metrics=metrics)
+    cols = {k: np.concatenate([arrays[k][:keep], v]) for k, v in
+            (("lon", lon), ("lat", lat), ("elev", elev), ("sunlit", sunlit),
+             ("volts", new["volts"]), ("solar", new["solar"]), ("secs", new_secs))}
+    secs = cols["secs"]
+
+    # Pass search only over the time added since the last run
+    t0_secs = meta["events_end"]
+    t1_secs = max(t0_secs, float(secs[-1]))
+    print(f"Calculating Access Windows for {', '.join(st.name for st in STATIONS)} (new span only)...")
+    with metrics.stage("access", span_s=t1_secs - t0_secs, stations=len(STATIONS)) as rec:
+        station_events = find_access(satellite, ts, STATIONS, t0_secs, t1_secs) if t1_secs > t0_secs else {}
+        rec["events"] = sum(map(len, station_events.values()))
+    passes, current = {}, {}
+    for st in STATIONS:
+        events = [ev for ev in station_events.get(st.name, []) if ev[0] > t0_secs]
+        current[st.name] = _pass_from_json(meta["current"].get(st.name, {}))
+        old = [_pass_from_json(p) for p in meta["passes"].get(st.name, [])]
+        passes[st.name] = old + build_passes(events, secs, epoch, time_source, current[st.name])
+        # The re-read bucket may have moved samples near an earlier AOS
+        for p in passes[st.name]:
+            p['aos_index'] = aos_index(p['aos_time'].timestamp(), secs, epoch, time_source)
+        print(f"Found {len(passes[st.name]) - len(old)} new passes over {st.name} ({len(passes[st.name])} total).")
+
+    # Detection over the new rows only, unless the rules changed since
+    detected = meta.get("events", [])
+    if DETECT_EVENTS:
+        detect = detect_settings(rules)
+        with metrics.stage("detect", append=True) as rec:
+            r = rules_with_defaults(rules)
+            if meta.get("detect") == detect:
+                new_events = detect_events(file_name, satellite, eph, ts, r["anomaly_volts"], r["fault_solar"],
+                                           meta.get("row_time"), resume=resume)
+                detected = merge_appended(detected, new_events, resume["row"])
+            else:
+                print("Append: detection rules changed, scanning every row.")
+                detected = detect_events(file_name, satellite, eph, ts, r["anomaly_volts"], r["fault_solar"],
+                                         meta.get("row_time"))
+            rec["events"] = len(detected)
+        meta = dict(meta, detect=detect)
+
+    if new["resume"] is not None:
+        new["resume"]["committed"] += keep
+    checkpoint = dict(meta, resume=new["resume"], events_end=t1_secs, rules=rules_with_defaults(rules),
+                      current={k: _pass_to_json(v) for k, v in current.items()})
+    stats = write_outputs(out_path, file_name, name, epoch, time_source, cols, passes, checkpoint, export_keep,
+                          rules, metrics, detected)
+    stats["new_rows"] = new["n_rows"] - resume["row"]
+    return stats
+
+
+def run_pipeline(line1, line2, file_name, out_path, ts, eph, name=SAT_NAME, limit=LIMIT, append=False,
+                 rules=None, cache_dir=None, use_cache=True, metrics=NULL_METRICS):
+    """Stages: ingest -> propagate -> detect -> access -> classify -> export.
+    Ingest, propagate and detect are memoized in the stage cache (cache_dir,
+    default .stage_cache next to the telemetry file), access in the pass
+    cache, so a sweep over rules (classify() thresholds) only reruns
+    detect, classify and export.
+    metrics: RunMetrics that records each stage (see run_metrics.py)."""
+    satellite = EarthSatellite(line1, line2, name, ts)
+    epoch = satellite.epoch.utc_datetime()
+
+    # Incremental mode: pick up from the checkpoint of the last run if the
+    # telemetry log has only grown since then
+    if append and os.path.exists(file_name):
+        prior = load_checkpoint(out_path)
+        reason = "no checkpoint" if prior is None else \
+            stale_reason(prior[1], file_name, line1, line2, limit, DOWNSAMPLE_METHOD)
+        if reason is None:
+            stats = append_pipeline(satellite, file_name, out_path, ts, eph, name, limit, prior, rules, metrics)
+            if stats is not None:
+                return stats
+        else:
+            print(f"Append: {reason}, doing a full run.")
+
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_name)), STAGE_CACHE_DIR_NAME)
+    cache = StageCache(cache_dir, enabled=use_cache)
+    # Hashing the log reads all of it, so it is done once for the ingest
+    # and detect keys
+    source_key = file_key(file_name) if use_cache and os.path.exists(file_name) else None
+
+    with metrics.stage("ingest") as rec:
+        volts, solar, sample_times, resume, n_rows = load_inputs(file_name, limit, cache_dir, use_cache, rec,
+                                                                 source_key)
+
+    # Each sample is propagated at its own telemetry timestamp when the log
+    # has one; otherwise sample i is placed at epoch + i*60s as before.
+    n_samples = len(volts)
+    if sample_times is not None:
+        time_source = "telemetry"
+        sample_secs = sample_times
+    else:
+        time_source = "synthetic"
+        sample_secs = epoch.timestamp() + 60.0 * np.arange(n_samples)
+
+    print(f"Propagating Orbit ({time_source} timestamps, mode={PROPAGATION_MODE})...")
+    with metrics.stage("propagate", items=n_samples, mode=PROPAGATION_MODE) as rec:
+        lon_all, lat_all, elev_all, sunlit_all = propagate_stage(cache, line1, line2, satellite, eph, ts,
+                                                                 sample_secs, metrics)
+        rec["cached"] = cache.last_hit
+
+    # --- FULL-RESOLUTION EVENT DETECTION ---
+    # Rows of a log without timestamps are spread over the samples' timeline
+    row_time = None if time_source == "telemetry" else [epoch.timestamp(), 60.0 * n_samples / max(1, n_rows)]
+    detected = []
+    if DETECT_EVENTS and os.path.exists(file_name):
+        print(f"Scanning every row of {file_name} for anomaly / fault intervals...")
+        with metrics.stage("detect", rows=n_rows) as rec:
+            detected = detect_stage(cache, file_name, source_key, line1, line2, satellite, eph, ts, rules,
+                                    row_time)
+            rec.update(events=len(detected), cached=cache.last_hit)
+
+    # --- CALCULATE GROUND STATION PASSES ---
+    print(f"Calculating Access Windows for {', '.join(st.name for st in STATIONS)}...")
+    # Time range (Simulation Start to End)
+    if time_source == "telemetry":
+        t0_secs, t1_secs = float(sample_secs[0]), float(sample_secs[-1])
     else:
-        colors.append([255, 215, 0]) # Gold (Sun)
-        
-    if float(volts[i]) < 3.8:
-        anomalies.append(i)
-
-
-# --- CALCULATE WATERLOO PASSES ---
-print("Calculating Access Windows for Waterloo...")
-
-# 1. Define Waterloo, Ontario coordinates
-# Lat: 43.4643 N, Lon: 80.5204 W (West is negative)
-waterloo = wgs84.latlon(43.4643, -80.5204)
-
-# 2. Define the time range (Simulation Start to End)
-t0 = ts.from_datetime(epoch)
-t1 = ts.from_datetime(epoch + timedelta(seconds=limit*60)) # limit was defined earlier
-
-# 3. Find "Events" (Rise, Culminate, Set)
-# altitude_degrees=10.0 means we only care if it's 10 degrees above horizon
-t_events, events = satellite.find_events(waterloo, t0, t1, altitude_degrees=10.0)
-
-# 4. Process the events into a clean list
-pass_list = []
-current_pass = {}
-
-for ti, event in zip(t_events, events):
-    # event: 0=Rise, 1=Culminate (Peak), 2=Set
-    if event == 0: # AOS (Acquisition of Signal)
-        current_pass['aos_time'] = ti.utc_datetime()
-        # Find index in our main timeline (approximate)
-        time_diff = (ti.utc_datetime() - epoch).total_seconds()
-        current_pass['aos_index'] = int(time_diff / 60) # Convert to minutes/index
-        
-    elif event == 1: # Max Elevation
-        # Get the actual elevation angle
-        topocentric = (satellite - waterloo).at(ti)
-        alt, az, distance = topocentric.altaz()
-        current_pass['max_el'] = int(alt.degrees)
-        
-    elif event == 2 and 'aos_time' in current_pass: # LOS (Loss of Signal)
-        duration = (ti.utc_datetime() - current_pass['aos_time']).total_seconds()
-        current_pass['duration_mins'] = int(duration / 60)
-        pass_list.append(current_pass)
-        current_pass = {} # Reset for next pass
-
-print(f"Found {len(pass_list)} passes over Waterloo.")
-
-
-
-# 5. EXPORT
-output = {
-    "meta": { "name": "Quetzal-1 Excel Log", "start_time": epoch.isoformat() },
-    "telemetry": {
-        "path": path,
-        "timestamps": timestamps,
-        "colors": colors,
-        "anomalies": anomalies,
-        "faults": faults,
-        "metrics": { "voltage": volts, "solar": solar }
-    },
-    "passes": pass_list  # <--- CHANGE THIS from [] to pass_list
-}
-
-# with open('../public/mission_data.json', 'w') as f:
-#     json.dump(output, f)
-
-# Custom converter for datetime objects
-def default_converter(o):
-    if hasattr(o, 'isoformat'):
-        return o.isoformat()
-    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
-
-# Save strictly to the current folder
-with open('mission_data.json', 'w') as f:
-    json.dump(output, f, default=default_converter) # <--- Added the converter here
-
-print(f"DONE. Generated JSON from Excel data.")
\ No newline at end of file
+        t0_secs = epoch.timestamp()
+        t1_secs = t0_secs + limit*60
+
+    with metrics.stage("access", span_s=t1_secs - t0_secs, stations=len(STATIONS)) as rec:
+        station_events = find_access(satellite, ts, STATIONS, t0_secs, t1_secs)
+        current = {st.name: {} for st in STATIONS}
+        station_passes = {st.name: build_passes(station_events[st.name], sample_secs, epoch, time_source,
+                                                current[st.name])
+                          for st in STATIONS}
+        rec.update(events=sum(map(len, station_events.values())),
+                   passes=sum(map(len, station_passes.values())))
+    for st_name, passes in station_passes.items():
+        print(f"Found {len(passes)} passes over {st_name}.")
+
+    # --- EXPORT ---
+    # Convert 'volts' / 'solar' to float arrays safely
+    cols = {"lon": lon_all, "lat": lat_all, "elev": elev_all, "sunlit": sunlit_all,
+            "volts": np.asarray(volts, dtype=float), "solar": np.asarray(solar, dtype=float),
+            "secs": np.asarray(sample_secs, dtype=float)}
+    checkpoint = {"line1": line1, "line2": line2, "limit": limit, "method": DOWNSAMPLE_METHOD,
+                  "resume": resume, "events_end": t1_secs, "row_time": row_time, "rules": rules_with_defaults(rules),
+                  "detect": detect_settings(rules),
+                  "current": {k: _pass_to_json(v) for k, v in current.items()}}
+    return write_outputs(out_path, file_name, name, epoch, time_source, cols, station_passes, checkpoint,
+                         rules=rules, metrics=metrics, events=detected)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build mission_data.json from the telemetry log.")
+    parser.add_argument("--append", action="store_true",
+                        help="Only process rows added since the last run (falls back to a full run)")
+    parser.add_argument("--anomaly-volts", type=float, default=ANOMALY_VOLTS, help="Anomaly voltage threshold")
+    parser.add_argument("--fault-solar", type=float, default=FAULT_SOLAR, help="Fault solar current threshold")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every stage")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Write per-stage timings / memory to mission_data.metrics.jsonl")
+    parser.add_argument("--profile", action="store_true", help="--metrics plus a sampling profiler")
+    args = parser.parse_args()
+
+    metrics = RunMetrics(enabled=args.metrics, profile=args.profile)
+    with metrics.stage("physics"):
+        ts, eph = load_physics()
+
+    # We look for the file in the current directory (xlsx, csv or parquet)
+    candidates = ["telemetry.xlsx", "telemetry.csv", "telemetry.parquet"]
+    file_name = next((c for c in candidates if os.path.exists(c)), candidates[0])
+
+    # Save strictly to the current folder
+    rules = {"anomaly_volts": args.anomaly_volts, "fault_solar": args.fault_solar}
+    stats = run_pipeline(LINE1, LINE2, file_name, 'mission_data.json', ts, eph, append=args.append,
+                         rules=rules, use_cache=not args.no_cache, metrics=metrics)
+    report = metrics.write('mission_data.json', file=file_name, append=args.append, **stats)
+    if report:
+        print(f"Run metrics appended to {report}.")
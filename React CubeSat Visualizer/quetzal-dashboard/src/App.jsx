@@ -10,6 +10,7 @@ import { ScenegraphLayer } from '@deck.gl/mesh-layers';
 import { Matrix4 } from '@math.gl/core';
 // import { CubeGeometry } from '@luma.gl/core'; 
 import { SimpleMeshLayer } from '@deck.gl/mesh-layers';
+import { loadMissionData, subscribeLive } from './missionData';
 import './App.css'; 
 
 // --- 1. LIGHTING SETUP ---
@@ -33,6 +34,9 @@ const INITIAL_VIEW_STATE = {
 // WATERLOO COORDINATES
 const WATERLOO_POS = [-80.5204, 43.4643];
 
+// Set (e.g. http://localhost:8765/events) to follow live_server.py
+const LIVE_URL = import.meta.env.VITE_LIVE_URL;
+
 export default function App() {
   // --- STATE ---
   const [data, setData] = useState(null);
@@ -45,11 +49,8 @@ export default function App() {
 
   // --- LOAD DATA ---
   useEffect(() => {
-    fetch('/mission_data.json')
-      .then(resp => resp.json())
-      .then(json => {
-        setData(json);
-      })
+    if (LIVE_URL) return subscribeLive(LIVE_URL, setData);
+    loadMissionData(setData)
       .catch(err => console.error("Could not load data:", err));
   }, []);
 
@@ -167,7 +168,7 @@ export default function App() {
       // LAYER 7: ANOMALIES
       new ScatterplotLayer({
         id: 'anomalies',
-        data: (anomalies || []).map(idx => ({ pos: path[idx], idx })),
+        data: Array.from(anomalies || [], idx => ({ pos: path[idx], idx })),
         getPosition: d => d.pos,
         getFillColor: [255, 50, 50],
         getRadius: 50000, 
@@ -185,7 +186,8 @@ export default function App() {
   const currentVoltage = data.telemetry.metrics.voltage[time];
   const currentSolar = data.telemetry.metrics.solar[time];
   const isEclipse = currentSolar < 10; 
-  const chartData = data.telemetry.metrics.voltage.map((v, i) => ({ index: i, voltage: v }));
+  // Array.from: voltage may be a typed array (chunked loader), whose .map can't hold objects
+  const chartData = Array.from(data.telemetry.metrics.voltage, (v, i) => ({ index: i, voltage: v }));
 
   // TELEMETRY HELPERS
   const curPos = data.telemetry.path[time];
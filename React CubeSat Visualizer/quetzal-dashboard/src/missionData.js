@@ -0,0 +1,215 @@
+// --- MISSION DATA LOADER ---
+// Prefers the chunked binary export (mission_data/manifest.json + typed-array
+// chunks written by process_data.py). Every column is one typed array sized
+// from the manifest up front; each chunk is fetched as an ArrayBuffer and
+// .set() in at its sample offset, so loading is one copy per chunk. The
+// telemetry handed out is subarray views of the part loaded so far, and
+// path[i] / colors[i] are 3-element views into the position / color arrays.
+// onUpdate() is called after every chunk so the globe can draw right away.
+// Falls back to the single mission_data.json if there is no manifest.
+
+const MANIFEST_URL = '/mission_data/manifest.json';
+const JSON_URL = '/mission_data.json';
+
+const TYPED = {
+  float32: Float32Array,
+  uint8: Uint8Array,
+  uint32: Uint32Array,
+};
+
+// Attitude isn't exported, so orientation is the nadir-locked one the globe
+// draws the model with
+const NADIR_ORIENTATION = [0, 90, 90];
+
+const view = (buffer, spec) => new TYPED[spec.type](buffer, spec.offset, spec.length);
+
+// [x0, y0, z0, x1, ...] -> [[x0, y0, z0], [x1, ...]] without copying
+const rows = (arr, components) => {
+  const out = new Array(arr.length / components);
+  for (let i = 0; i < out.length; i++) {
+    out[i] = arr.subarray(i * components, (i + 1) * components);
+  }
+  return out;
+};
+
+async function loadChunked(manifest, onUpdate) {
+  const base = MANIFEST_URL.slice(0, MANIFEST_URL.lastIndexOf('/') + 1);
+  const n = manifest.count;
+  const first = manifest.chunks.length ? manifest.chunks[0].arrays : null;
+  const alloc = (name, length) => new TYPED[first ? first[name].type : 'float32'](length);
+  const total = name => manifest.chunks.reduce((sum, c) => sum + c.arrays[name].length, 0);
+
+  const positions = alloc('positions', n * 3);
+  const colors = alloc('colors', n * 3);
+  const voltage = alloc('voltage', n);
+  const solar = alloc('solar', n);
+  const anomalies = alloc('anomalies', total('anomalies'));
+  const faults = alloc('faults', total('faults'));
+  const timestamps = new Float64Array(n);
+  // Row views grow by push; every update shares them (only the first
+  // `loaded` entries exist, matching the subarrays below)
+  const path = [];
+  const colorRows = [];
+  const orientation = [];
+  let loaded = 0;
+  let nAnomalies = 0;
+  let nFaults = 0;
+  let data = {
+    manifest,
+    meta: manifest.meta,
+    passes: manifest.passes,
+    stations: manifest.stations,
+    events: manifest.events || [],
+    telemetry: {
+      path, orientation, timestamps: timestamps.subarray(0, 0), colors: colorRows,
+      anomalies: anomalies.subarray(0, 0), faults: faults.subarray(0, 0),
+      metrics: { voltage: voltage.subarray(0, 0), solar: solar.subarray(0, 0) },
+    },
+  };
+
+  for (const chunk of manifest.chunks) {
+    const resp = await fetch(base + chunk.url);
+    if (!resp.ok) throw new Error(`Chunk ${chunk.url}: HTTP ${resp.status}`);
+    const buffer = await resp.arrayBuffer();
+    const a = chunk.arrays;
+    const at = chunk.start;
+
+    positions.set(view(buffer, a.positions), at * 3);
+    colors.set(view(buffer, a.colors), at * 3);
+    voltage.set(view(buffer, a.voltage), at);
+    solar.set(view(buffer, a.solar), at);
+    anomalies.set(view(buffer, a.anomalies), nAnomalies);
+    faults.set(view(buffer, a.faults), nFaults);
+    nAnomalies += a.anomalies.length;
+    nFaults += a.faults.length;
+    for (let i = at; i < at + chunk.count; i++) {
+      timestamps[i] = i;
+      path.push(positions.subarray(i * 3, i * 3 + 3));
+      colorRows.push(colors.subarray(i * 3, i * 3 + 3));
+      orientation.push(NADIR_ORIENTATION);
+    }
+    loaded = at + chunk.count;
+
+    // New object per chunk so React sees the update
+    data = {
+      ...data,
+      telemetry: {
+        path, orientation, colors: colorRows,
+        timestamps: timestamps.subarray(0, loaded),
+        anomalies: anomalies.subarray(0, nAnomalies),
+        faults: faults.subarray(0, nFaults),
+        metrics: { voltage: voltage.subarray(0, loaded), solar: solar.subarray(0, loaded) },
+      },
+    };
+    onUpdate(data);
+  }
+  return data;
+}
+
+// --- LEVEL OF DETAIL ---
+// manifest.levels[k-1] holds every (LOD factor)^k-th bucket's min/max samples
+// (plus flagged ones) with their original sample index. Pick the finest
+// level that fits maxPoints inside [i0, i1] and fetch only its chunks that
+// overlap the window. Level 0 means "use the full-resolution chunks".
+
+export function pickLevel(manifest, i0, i1, maxPoints) {
+  const span = Math.max(1, i1 - i0 + 1);
+  if (span <= maxPoints || !manifest.levels) return 0;
+  for (const lvl of manifest.levels) {
+    if ((lvl.count * span) / manifest.count <= maxPoints) return lvl.level;
+  }
+  return manifest.levels.length;
+}
+
+export async function loadLevelWindow(manifest, level, i0, i1) {
+  const base = MANIFEST_URL.slice(0, MANIFEST_URL.lastIndexOf('/') + 1);
+  const lvl = manifest.levels[level - 1];
+  const out = { index: [], positions: [], colors: [], voltage: [], solar: [], flags: [] };
+  const wanted = lvl.chunks.filter(c => c.lastIndex >= i0 && c.firstIndex <= i1);
+
+  const buffers = await Promise.all(wanted.map(async c => {
+    const resp = await fetch(`${base}${lvl.dir}/${c.url}`);
+    if (!resp.ok) throw new Error(`Chunk ${lvl.dir}/${c.url}: HTTP ${resp.status}`);
+    return resp.arrayBuffer();
+  }));
+
+  wanted.forEach((c, k) => {
+    const a = c.arrays;
+    const index = view(buffers[k], a.index);
+    const positions = rows(view(buffers[k], a.positions), 3);
+    const colors = rows(view(buffers[k], a.colors), 3);
+    const voltage = view(buffers[k], a.voltage);
+    const solar = view(buffers[k], a.solar);
+    const flags = view(buffers[k], a.flags);
+    for (let i = 0; i < index.length; i++) {
+      if (index[i] < i0 || index[i] > i1) continue;
+      out.index.push(index[i]);
+      out.positions.push(positions[i]);
+      out.colors.push(colors[i]);
+      out.voltage.push(voltage[i]);
+      out.solar.push(solar[i]);
+      out.flags.push(flags[i]);
+    }
+  });
+  return out;
+}
+
+// --- LIVE STREAM ---
+// live_server.py pushes delta frames over Server-Sent Events. The first
+// event ("snapshot") carries recent history and replaces whatever we had
+// (it is sent again after a reconnect); each "frame" is appended. Frames
+// may be thinned when we fall behind, so positions in the arrays are not
+// global sample numbers: frame.index has those. Attitude isn't in the live
+// feed either (see NADIR_ORIENTATION).
+
+export function appendLiveFrame(data, frame) {
+  const t = data ? data.telemetry : {
+    path: [], orientation: [], timestamps: [], colors: [], anomalies: [], faults: [],
+    metrics: { voltage: [], solar: [] }, index: [],
+  };
+  const offset = t.path.length;
+  return {
+    meta: frame.meta || (data && data.meta) || { time_source: 'live' },
+    passes: data ? data.passes : [],
+    stations: data ? data.stations : {},
+    telemetry: {
+      path: t.path.concat(frame.path),
+      orientation: t.orientation.concat(frame.index.map(() => NADIR_ORIENTATION)),
+      timestamps: t.timestamps.concat(frame.index.map((_, i) => offset + i)),
+      colors: t.colors.concat(frame.colors),
+      anomalies: t.anomalies.concat(frame.anomalies.map(i => offset + i)),
+      faults: t.faults.concat(frame.faults.map(i => offset + i)),
+      metrics: {
+        voltage: t.metrics.voltage.concat(frame.voltage),
+        solar: t.metrics.solar.concat(frame.solar),
+      },
+      index: t.index.concat(frame.index),
+    },
+  };
+}
+
+// Returns a function that closes the stream
+export function subscribeLive(url, onUpdate) {
+  let data = null;
+  const source = new EventSource(url);
+  const handle = reset => event => {
+    const frame = JSON.parse(event.data);
+    if (!frame.index.length) return;
+    data = appendLiveFrame(reset ? null : data, frame);
+    onUpdate(data);
+  };
+  source.addEventListener('snapshot', handle(true));
+  source.addEventListener('frame', handle(false));
+  return () => source.close();
+}
+
+export async function loadMissionData(onUpdate) {
+  const resp = await fetch(MANIFEST_URL);
+  const isManifest = resp.ok && (resp.headers.get('content-type') || '').includes('json');
+  if (isManifest) {
+    return loadChunked(await resp.json(), onUpdate);
+  }
+  const json = await (await fetch(JSON_URL)).json();
+  onUpdate(json);
+  return json;
+}
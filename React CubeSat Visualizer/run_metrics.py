@@ -0,0 +1,159 @@
+import collections
+import contextlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# ==========================================
+# RUN METRICS
+# ==========================================
+# Wall time, CPU time, peak RSS and item counts for each pipeline stage
+# (ingest, propagate, access, classify, export) and each batch inside one
+# (propagation chunks), written as JSON lines next to the outputs:
+# mission_data.json -> mission_data.metrics.jsonl, one "run" line followed by
+# its "stage" / "batch" / "profile" lines. Runs append, so the file is a
+# history that can be grepped or loaded with pandas.read_json(lines=True).
+#
+# Off by default: a disabled RunMetrics hands out one shared no-op record,
+# so instrumented code pays a method call per stage and nothing else.
+#
+# profile=True also starts a sampling profiler: a thread that reads the main
+# thread's stack every PROFILE_INTERVAL_S and counts the innermost line,
+# and the innermost line in this folder, per stage. No tracing hooks, so the
+# measured code runs at full speed.
+
+METRICS_SUFFIX = ".metrics.jsonl"
+PROFILE_INTERVAL_S = 0.005
+PROFILE_TOP = 10
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10  # bytes vs kB
+
+
+def metrics_path(out_path):
+    return os.path.splitext(out_path)[0] + METRICS_SUFFIX
+
+
+class _NullRecord:
+    """Stands in for a stage record when metrics are off."""
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def __setitem__(self, key, value): pass
+    def update(self, *args, **kwargs): pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's stack; counts are keyed by the stage running."""
+
+    def __init__(self, metrics, thread_id, interval):
+        super().__init__(name="metrics-sampler", daemon=True)
+        self.metrics = metrics
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stop = threading.Event()
+        self.leaf = collections.defaultdict(collections.Counter)
+        self.own = collections.defaultdict(collections.Counter)
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stage = self.metrics.current or "(none)"
+            self.leaf[stage][_site(frame)] += 1
+            while frame is not None and not frame.f_code.co_filename.startswith(_HERE):
+                frame = frame.f_back
+            if frame is not None:
+                self.own[stage][_site(frame)] += 1
+
+
+def _site(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"
+
+
+class RunMetrics:
+    def __init__(self, enabled=True, profile=False, interval=PROFILE_INTERVAL_S):
+        self.enabled = enabled or profile
+        self.records = []
+        self.current = None  # "ingest", "propagate/chunk", ... (read by the sampler)
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+        self._sampler = None
+        if profile:
+            self._sampler = _Sampler(self, threading.get_ident(), interval)
+            self._sampler.start()
+
+    def stage(self, name, **counts):
+        """with metrics.stage("ingest") as rec: ...; rec["rows"] = n"""
+        if not self.enabled:
+            return _NULL_RECORD
+        return self._measure("stage", name, counts)
+
+    def batch(self, name, **counts):
+        """Like stage(), for the repeated pieces inside one."""
+        if not self.enabled:
+            return _NULL_RECORD
+        return self._measure("batch", name, counts)
+
+    @contextlib.contextmanager
+    def _measure(self, kind, name, counts):
+        parent = self.current
+        path = f"{parent}/{name}" if parent else name
+        rec = {"kind": kind, "name": path, **counts}
+        t0, c0 = time.perf_counter(), time.process_time()
+        self.current = path
+        try:
+            yield rec
+        finally:
+            self.current = parent
+            rec.update(wall_s=round(time.perf_counter() - t0, 6), cpu_s=round(time.process_time() - c0, 6),
+                       peak_rss_mb=round(peak_rss_mb(), 1))
+            self.records.append(rec)
+
+    def _profile_records(self):
+        if self._sampler is None:
+            return []
+        self._sampler.stop.set()
+        self._sampler.join()
+        out = []
+        for stage, leaf in self._sampler.leaf.items():
+            out.append({"kind": "profile", "name": stage, "samples": sum(leaf.values()),
+                        "interval_s": self._sampler.interval,
+                        "top": leaf.most_common(PROFILE_TOP),
+                        "top_own": self._sampler.own[stage].most_common(PROFILE_TOP)})
+        return out
+
+    def summary(self, **info):
+        return {"kind": "run", "run_id": self.run_id, "started": self.started.isoformat(timespec='seconds'),
+                "wall_s": round(time.perf_counter() - self._t0, 6),
+                "cpu_s": round(time.process_time() - self._c0, 6),
+                "peak_rss_mb": round(peak_rss_mb(), 1), "pid": os.getpid(), **info}
+
+    def write(self, out_path, **info):
+        """Append this run's lines to <out_path stem>.metrics.jsonl. Returns
+        the report path, or None when metrics are off."""
+        if not self.enabled:
+            return None
+        lines = [self.summary(**info)] + self.records + self._profile_records()
+        path = metrics_path(out_path)
+        with open(path, 'a') as f:
+            f.write("".join(json.dumps(dict(rec, run_id=self.run_id), default=str) + "\n" for rec in lines))
+        return path
+
+
+NULL_METRICS = RunMetrics(enabled=False)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+# ==========================================
+# CONTENT-ADDRESSED STAGE CACHE
+# ==========================================
+# Each expensive pipeline stage (ingest, propagate) stores its result as one
+# .npz (arrays + a JSON meta string) named after a hash of everything that
+# went into it: the stage's inputs (file content key, sample times, TLE) and
+# its parameters (limit, method, propagation mode, error bound). Changing a
+# downstream parameter (anomaly / fault thresholds) therefore hits the cache
+# for every stage before it.
+#
+# The folder is kept under max_bytes by evicting the least recently used
+# entries (hits refresh the file's mtime). Writes are atomic, so several
+# processes (batch_process.py) can share one cache.
+
+STAGE_CACHE_DIR_NAME = ".stage_cache"
+STAGE_CACHE_MAX_BYTES = 512 * 2**20
+STAGE_CACHE_VERSION = 1
+
+
+def digest(*parts):
+    """sha1 over arrays (dtype, shape, bytes) and JSON-able values."""
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            h.update(f"{part.dtype.str}{part.shape}".encode())
+            h.update(part.tobytes())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def evict_lru(cache_dir, max_bytes, suffix=""):
+    """Delete the least recently used files until the folder fits max_bytes."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(suffix) or ".tmp" in name:
+            continue
+        try:
+            st = os.stat(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            continue  # evicted by another process
+        entries.append((st.st_mtime, st.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
+
+
+class StageCache:
+    def __init__(self, cache_dir, max_bytes=STAGE_CACHE_MAX_BYTES, enabled=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.last_hit = False  # Whether the last memo() was served from disk
+        if enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}.{key[:20]}.npz")
+
+    def get(self, stage, key):
+        """(arrays, meta) or None."""
+        if not self.enabled:
+            return None
+        path = self._path(stage, key)
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                arrays = {k: z[k] for k in z.files if k != "meta"}
+            os.utime(path)  # LRU: mark as recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        return arrays, meta
+
+    def put(self, stage, key, arrays, meta=None):
+        if not self.enabled:
+            return
+        path = self._path(stage, key)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, meta=np.array(json.dumps(meta or {})), **arrays)
+        os.replace(tmp, path)
+        evict_lru(self.cache_dir, self.max_bytes, ".npz")
+
+    def memo(self, stage, key_parts, compute):
+        """Cached compute() -> (arrays, meta), keyed by the stage name and
+        key_parts (inputs + parameters)."""
+        key = digest(STAGE_CACHE_VERSION, stage, *key_parts)
+        hit = self.get(stage, key)
+        self.last_hit = hit is not None
+        if hit is not None:
+            print(f"Stage {stage}: cached ({key[:8]}).")
+            return hit
+        t0 = time.perf_counter()
+        arrays, meta = compute()
+        self.put(stage, key, arrays, meta)
+        print(f"Stage {stage}: computed in {time.perf_counter() - t0:.2f}s ({key[:8]}).")
+        return arrays, meta
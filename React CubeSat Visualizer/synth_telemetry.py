@@ -0,0 +1,113 @@
+import argparse
+import os
+
+import numpy as np
+
+# ==========================================
+# SYNTHETIC TELEMETRY GENERATOR
+# ==========================================
+# Writes a Quetzal-style log (Timestamp, EPS_Dist_Batt_V, Solar_Current,
+# Temp) of any length as xlsx, csv or parquet, in chunks so 10^7 rows never
+# sit in memory. The signal follows an orbit-period day/night cycle with
+# rare solar dropouts (faults), voltage dips (anomalies) and blank cells, so
+# every code path of the pipeline gets exercised.
+#
+# Usage: python synth_telemetry.py telemetry.csv --rows 1000000
+
+SYNTH_START = "2020-06-04T12:05:50"  # Quetzal-1 TLE epoch
+SYNTH_CADENCE_S = 10.0
+ORBIT_PERIOD_S = 92.9 * 60
+ECLIPSE_FRACTION = 0.37
+DROPOUT_RATE = 1e-4   # Sunlit rows with no solar current
+DIP_RATE = 2e-5       # Voltage dips below the anomaly threshold
+MISSING_RATE = 1e-4   # Blank voltage / solar cells
+CHUNK_ROWS = 100000
+XLSX_MAX_ROWS = 1048575  # Excel's sheet limit minus the header
+
+HEADER = ["Timestamp", "EPS_Dist_Batt_V", "Solar_Current", "Temp"]
+
+
+def synth_chunks(rows, start=SYNTH_START, cadence=SYNTH_CADENCE_S, seed=0, chunk=CHUNK_ROWS):
+    """Yields (times datetime64[s], volts, solar, temp) chunks; NaN = blank."""
+    rng = np.random.default_rng(seed)
+    t0 = np.datetime64(start, 's')
+    for lo in range(0, rows, chunk):
+        n = min(chunk, rows - lo)
+        secs = (lo + np.arange(n)) * cadence
+        phase = (secs % ORBIT_PERIOD_S) / ORBIT_PERIOD_S
+        sun = phase >= ECLIPSE_FRACTION
+        solar = np.where(sun, 200.0 + 5.0 * rng.standard_normal(n), 0.5 * rng.random(n))
+        solar[sun & (rng.random(n) < DROPOUT_RATE)] = 0.0
+        volts = 3.95 + 0.12 * np.sin(2 * np.pi * phase) + 0.01 * rng.standard_normal(n)
+        volts[rng.random(n) < DIP_RATE] = 3.6
+        temp = 20.0 + 8.0 * np.sin(2 * np.pi * phase) + rng.standard_normal(n)
+        volts[rng.random(n) < MISSING_RATE] = np.nan
+        solar[rng.random(n) < MISSING_RATE] = np.nan
+        times = t0 + np.round(secs).astype('timedelta64[s]')
+        yield times, volts, solar, temp
+
+
+def _fmt(x):
+    """Float column -> strings, NaN -> blank cell."""
+    out = np.char.mod('%.6f', x)
+    out[np.isnan(x)] = ''
+    return out
+
+
+def write_csv(path, chunks):
+    with open(path, 'w', newline='') as f:
+        f.write(",".join(HEADER) + "\n")
+        for times, volts, solar, temp in chunks:
+            cols = [np.datetime_as_string(times, unit='s'), _fmt(volts), _fmt(solar), _fmt(temp)]
+            f.write("\n".join(map(",".join, zip(*cols))) + "\n")
+
+
+def write_parquet(path, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([("Timestamp", pa.timestamp('s', tz='UTC'))] +
+                       [(name, pa.float64()) for name in HEADER[1:]])
+    with pq.ParquetWriter(path, schema) as writer:
+        for times, volts, solar, temp in chunks:
+            table = pa.table([pa.array(times, type=pa.timestamp('s', tz='UTC')),
+                              pa.array(volts, from_pandas=True), pa.array(solar, from_pandas=True),
+                              pa.array(temp)], schema=schema)
+            writer.write_table(table)
+
+
+def write_xlsx(path, chunks):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(HEADER)
+    for times, volts, solar, temp in chunks:
+        for t, v, s, tc in zip(times.tolist(), volts.tolist(), solar.tolist(), temp.tolist()):
+            ws.append([t, None if v != v else v, None if s != s else s, tc])
+    wb.save(path)
+
+
+WRITERS = {".csv": write_csv, ".parquet": write_parquet, ".xlsx": write_xlsx}
+
+
+def generate(path, rows, cadence=SYNTH_CADENCE_S, seed=0):
+    """Write `rows` synthetic rows to path (format from the extension)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError(f"Unsupported format: {path}")
+    if ext == ".xlsx" and rows > XLSX_MAX_ROWS:
+        raise ValueError(f"xlsx holds at most {XLSX_MAX_ROWS} rows, asked for {rows}")
+    tmp = f"{path}.{os.getpid()}.tmp{ext}"
+    WRITERS[ext](tmp, synth_chunks(rows, cadence=cadence, seed=seed))
+    os.replace(tmp, path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic Quetzal telemetry log.")
+    parser.add_argument("output", help="telemetry.csv / .parquet / .xlsx")
+    parser.add_argument("--rows", type=float, default=1e5)
+    parser.add_argument("--cadence", type=float, default=SYNTH_CADENCE_S, help="Seconds between rows")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.output, int(args.rows), args.cadence, args.seed)
+    print(f"Wrote {int(args.rows)} rows to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
@@ -0,0 +1,419 @@
+import csv
+import hashlib
+import os
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+
+from downsample import StreamSampler, bucket_size
+from stage_cache import STAGE_CACHE_DIR_NAME, StageCache
+
+# ==========================================
+# STREAMING TELEMETRY INGESTION
+# ==========================================
+# Reads telemetry row by row (xlsx / csv / parquet), resolves the voltage and
+# solar columns from the header and downsamples on the fly, so only the kept
+# rows are ever held in memory. Parsed columns are cached on disk by the stage
+# cache, keyed by the file hash + mtime, so re-runs with new thresholds skip
+# parsing.
+
+CACHE_VERSION = 4
+HASH_BLOCK = 1 << 20  # 1 MB
+
+# 'stride' (every step-th row), 'minmax' or 'lttb' (shape-preserving,
+# see downsample.py)
+DOWNSAMPLE_METHOD = "minmax"
+
+# Fill values match the old pd.to_numeric(..., errors='coerce').fillna(...)
+VOLT_FILL = 3.9
+SOLAR_FILL = 0.0
+
+# Common headers in Quetzal Excel files:
+# 'EPS_Dist_Batt_V' or just 'Battery Voltage'
+VOLT_KEYS = ['batt_v', 'battery', 'voltage']
+# 'EPS_Dist_Batt_I' or 'Solar' or 'Current'
+SOLAR_KEYS = ['solar', 'current', 'batt_i']
+# Sample time column ('Timestamp', 'UTC Time', 'Date', ...), matched as
+# whole header words (see find_time_col)
+TIME_KEYS = ['timestamp', 'utc', 'time', 'date']
+# Header words: split on non-alphanumerics and camelCase ('GpsTime' -> gps, time)
+HEADER_WORD = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+
+def find_col(columns, keywords):
+    for col in columns:
+        for key in keywords:
+            if str(key).lower() in str(col).lower(): return col
+    return None
+
+
+def find_time_col(columns, keywords=TIME_KEYS):
+    """Time column: a header that is exactly a keyword first, then one with a
+    keyword as a whole word. Substrings don't count, so 'Uptime',
+    'Update_Count' or 'Runtime_s' are never taken as timestamps."""
+    names = [str(col).strip().lower() for col in columns]
+    for key in keywords:
+        if key in names:
+            return columns[names.index(key)]
+    for col in columns:
+        words = [w.lower() for w in HEADER_WORD.findall(str(col))]
+        for key in keywords:
+            if key in words: return col
+    return None
+
+
+def resolve_columns(header, verbose=True):
+    """Map the header to (voltage_index, solar_index).
+    Falls back to column index 1 and 2 if names don't match."""
+    v_col = find_col(header, VOLT_KEYS)
+    s_col = find_col(header, SOLAR_KEYS)
+    if verbose:
+        print(f"Mapped Columns -> Voltage: {v_col} | Solar: {s_col}")
+    v_idx = header.index(v_col) if v_col is not None else 1
+    s_idx = header.index(s_col) if s_col is not None else 2
+    return v_idx, s_idx
+
+
+def to_posix(value):
+    """Timestamp cell -> POSIX seconds (UTC). Naive datetimes are taken as
+    UTC, numbers as POSIX seconds already. Unparseable cells give NaN."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith('Z'): text = text[:-1] + '+00:00'
+        try:
+            return to_posix(datetime.fromisoformat(text))
+        except ValueError:
+            return to_float(text, float('nan'))
+    return to_float(value, float('nan'))
+
+
+def clean_times(times):
+    """Fill missing timestamps by interpolating between their neighbours.
+    Returns None if fewer than two rows carry a usable time."""
+    ok = np.isfinite(times)
+    if len(times) and ok.all():
+        return times
+    if ok.sum() < 2:
+        return None
+    if not ok.all():
+        idx = np.arange(len(times))
+        times = np.interp(idx, idx[ok], times[ok])
+    return times
+
+
+def to_float(value, fill):
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return fill
+    return fill if x != x else x  # NaN -> fill
+
+
+# ==========================================
+# ROW READERS (header, row iterator, row count if known, position)
+# ==========================================
+# position['pos'] is where the row just yielded starts: the byte offset for
+# CSV, the sheet row number for xlsx, the absolute row for Parquet. Passing
+# it back as resume_pos re-opens the file at that row (incremental mode).
+
+def _open_xlsx(file_name, resume_pos=None, count=True):
+    from openpyxl import load_workbook  # only needed for Excel input
+    wb = load_workbook(file_name, read_only=True, data_only=True)
+    ws = wb.active
+    header = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+    first = resume_pos or 2
+    rows = ws.iter_rows(min_row=first, values_only=True)
+    n_rows = ws.max_row - 1 if ws.max_row else None
+    position = {'pos': first}
+
+    def gen():
+        try:
+            for r, row in enumerate(rows, first):
+                if row is None or all(v is None for v in row):
+                    continue
+                position['pos'] = r
+                yield row
+        finally:
+            wb.close()
+    return header, gen(), n_rows, position
+
+
+def _count_lines(file_name):
+    count = 0
+    with open(file_name, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            count += block.count(b'\n')
+    return count
+
+
+def _open_csv(file_name, resume_pos=None, count=True):
+    # Counting newlines is a cheap byte scan compared to parsing
+    n_rows = max(0, _count_lines(file_name) - 1) if count else None
+    f = open(file_name, 'rb')
+    header = next(csv.reader([f.readline().decode('utf-8-sig')]), [])
+    if resume_pos:
+        f.seek(resume_pos)
+    position = {'pos': f.tell()}
+    line_start = [f.tell()]
+
+    def lines():
+        while True:
+            start = f.tell()
+            line = f.readline()
+            if not line:
+                return
+            line_start[0] = start
+            yield line.decode('utf-8')
+
+    def gen():
+        try:
+            for row in csv.reader(lines()):
+                if row:
+                    position['pos'] = line_start[0]
+                    yield row
+        finally:
+            f.close()
+    return header, gen(), n_rows, position
+
+
+def _open_parquet(file_name, resume_pos=None, count=True):
+    import pyarrow.parquet as pq  # only needed for Parquet input
+    pf = pq.ParquetFile(file_name)
+    header = list(pf.schema_arrow.names)
+    n_rows = pf.metadata.num_rows
+    skip = resume_pos or 0
+    position = {'pos': skip}
+
+    def gen():
+        r = 0
+        for batch in pf.iter_batches(batch_size=65536):
+            if r + batch.num_rows <= skip:
+                r += batch.num_rows
+                continue
+            cols = [c.to_pylist() for c in batch.columns]
+            for row in zip(*cols):
+                if r >= skip:
+                    position['pos'] = r
+                    yield row
+                r += 1
+    return header, gen(), n_rows, position
+
+
+def open_rows(file_name, resume_pos=None, count=True):
+    ext = os.path.splitext(file_name)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return _open_xlsx(file_name, resume_pos, count)
+    if ext == '.csv':
+        return _open_csv(file_name, resume_pos, count)
+    if ext in ('.parquet', '.pq'):
+        return _open_parquet(file_name, resume_pos, count)
+    raise ValueError(f"Unsupported telemetry format: {file_name}")
+
+
+# ==========================================
+# ON-THE-FLY DOWNSAMPLING
+# ==========================================
+def stream_downsample(file_name, limit, method=DOWNSAMPLE_METHOD, resume=None):
+    """stride: keep every step-th row, step = max(1, n_rows // limit) as
+    before. minmax / lttb: bucket the rows and keep the shape-defining ones.
+    If the row count is unknown, the stride / bucket doubles whenever the
+    kept set reaches 2*limit, so memory stays bounded either way.
+
+    The result carries a 'resume' dict (row, pos, step, committed, prev):
+    the start of the last bucket, which a later run re-reads together with
+    any appended rows. Passing it back as resume= reads only from there on,
+    with the same step; the returned samples then replace everything after
+    the first 'committed' samples of the previous result."""
+    header, rows, n_rows, position = open_rows(file_name, resume and resume["pos"], count=not resume)
+    v_idx, s_idx = resolve_columns(header)
+    v_col = header[v_idx] if v_idx < len(header) else None
+    s_col = header[s_idx] if s_idx < len(header) else None
+    t_col = find_time_col(header)
+    t_idx = header.index(t_col) if t_col is not None else None
+
+    volts, solar, times = [], [], []
+    adaptive = not n_rows and not resume
+    first = resume["row"] if resume else 0
+    total = 0
+    marks = [(first, position['pos'])]  # (row, pos) of the latest two bucket starts
+
+    def cell(row, idx):
+        return row[idx] if idx is not None and idx < len(row) else None
+
+    if method == "stride":
+        step = resume["step"] if resume else max(1, n_rows // limit) if n_rows else 1
+        for i, row in enumerate(rows, first):
+            total += 1
+            if i % step:
+                continue
+            marks = [marks[-1], (i, position['pos'])]
+            volts.append(to_float(cell(row, v_idx), VOLT_FILL))
+            solar.append(to_float(cell(row, s_idx), SOLAR_FILL))
+            if t_idx is not None:
+                times.append(to_posix(cell(row, t_idx)))
+            if adaptive and len(volts) >= 2 * limit:
+                volts, solar, times = volts[::2], solar[::2], times[::2]
+                step *= 2
+        last_start, prev = first + (total - 1) // step * step if total else first, None
+    else:
+        # Shape modes look at every row's values, not just every step-th
+        step = resume["step"] if resume else bucket_size(method, n_rows, limit) if n_rows else 1
+        sampler = StreamSampler(method, step, limit if adaptive else None,
+                                prev=resume and resume["prev"])
+        for i, row in enumerate(rows, first):
+            total += 1
+            if i % sampler.bucket == 0:
+                marks = [marks[-1], (i, position['pos'])]
+            sampler.add(i, to_float(cell(row, v_idx), VOLT_FILL), to_float(cell(row, s_idx), SOLAR_FILL),
+                        to_posix(cell(row, t_idx)) if t_idx is not None else np.nan)
+        kept = sampler.finish()
+        step = sampler.bucket
+        last_start, prev = sampler.last_bucket or (first, resume and resume["prev"])
+        volts = [r[1] for r in kept]
+        solar = [r[2] for r in kept]
+        times = [r[3] for r in kept]
+        committed = sum(r[0] < last_start for r in kept)
+
+    volts = np.asarray(volts, dtype=float)
+    solar = np.asarray(solar, dtype=float)
+    times = clean_times(np.asarray(times, dtype=float)) if t_idx is not None else None
+    mark = next((m for m in marks if m[0] == last_start), None)
+    resumable = mark is not None
+    if times is None:
+        t_col = None
+    elif np.any(np.diff(times) < 0):
+        # Out-of-order downlinks: keep the timeline chronological
+        order = np.argsort(times, kind='stable')
+        volts, solar, times = volts[order], solar[order], times[order]
+        resumable = False  # sample order no longer follows row order
+    if method == "stride":
+        committed = max(0, len(volts) - 1)
+
+    return {
+        "volts": volts,
+        "solar": solar,
+        "times": times,
+        "v_col": None if v_col is None else str(v_col),
+        "s_col": None if s_col is None else str(s_col),
+        "t_col": None if t_col is None else str(t_col),
+        "step": step,
+        "n_rows": first + total,
+        "resume": {"row": int(last_start), "pos": mark[1], "step": step, "committed": int(committed),
+                   "prev": None if prev is None else [float(p) for p in prev]} if resumable and total else None,
+    }
+
+
+# ==========================================
+# FULL-RESOLUTION CHUNKS
+# ==========================================
+def _parquet_chunks(file_name, v_idx, s_idx, t_idx, chunk_rows, skip):
+    """Column-wise Parquet reads, no per-cell Python. None if a column
+    isn't plain numeric / timestamp (the row reader handles those)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(file_name)
+    schema = pf.schema_arrow
+    numeric = [schema.field(i).type for i in (v_idx, s_idx) if i < len(schema)]
+    if len(numeric) < 2 or not all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in numeric):
+        return None
+    if t_idx is not None and not pa.types.is_timestamp(schema.field(t_idx).type):
+        return None
+
+    def gen():
+        r = 0
+        for batch in pf.iter_batches(batch_size=chunk_rows):
+            n = batch.num_rows
+            if r + n <= skip:
+                r += n
+                continue
+            lo = max(0, skip - r)
+            cols = [batch.column(i).slice(lo) for i in (v_idx, s_idx)]
+            volts, solar = (c.cast(pa.float64()).to_numpy(zero_copy_only=False) for c in cols)
+            times = None
+            if t_idx is not None:
+                t = batch.column(t_idx).slice(lo)
+                units = {'s': 1.0, 'ms': 1e3, 'us': 1e6, 'ns': 1e9}[t.type.unit]
+                times = t.cast(pa.int64()).to_numpy(zero_copy_only=False).astype(float) / units
+            yield np.arange(r + lo, r + n), times, volts, solar
+            r += n
+    return gen()
+
+
+def iter_chunks(file_name, chunk_rows=65536, resume=None):
+    """Every row as NumPy chunks (rows, times, volts, solar) for
+    full-resolution passes (anomaly_detection.py). Unlike the downsampled
+    columns, blank / unparseable cells are NaN here, not filled; times is
+    None if the log has no time column. resume: a stream_downsample resume
+    dict, to start at its row."""
+    header, rows, _, _ = open_rows(file_name, resume and resume["pos"], count=False)
+    v_idx, s_idx = resolve_columns(header, verbose=False)
+    t_col = find_time_col(header)
+    t_idx = header.index(t_col) if t_col is not None else None
+    first = resume["row"] if resume else 0
+
+    if os.path.splitext(file_name)[1].lower() in ('.parquet', '.pq'):
+        fast = _parquet_chunks(file_name, v_idx, s_idx, t_idx, chunk_rows, first)
+        if fast is not None:
+            yield from fast
+            return
+
+    def cell(row, idx):
+        return row[idx] if idx < len(row) else None
+
+    nan = float('nan')
+    buf_v, buf_s, buf_t = [], [], []
+    start = first
+    for row in rows:
+        buf_v.append(to_float(cell(row, v_idx), nan))
+        buf_s.append(to_float(cell(row, s_idx), nan))
+        if t_idx is not None:
+            buf_t.append(to_posix(cell(row, t_idx)))
+        if len(buf_v) == chunk_rows:
+            yield (np.arange(start, start + chunk_rows), np.array(buf_t) if t_idx is not None else None,
+                   np.array(buf_v), np.array(buf_s))
+            start += chunk_rows
+            buf_v, buf_s, buf_t = [], [], []
+    if buf_v:
+        yield (np.arange(start, start + len(buf_v)), np.array(buf_t) if t_idx is not None else None,
+               np.array(buf_v), np.array(buf_s))
+
+
+# ==========================================
+# INGEST STAGE (CACHED)
+# ==========================================
+def file_key(file_name):
+    """sha1 of the file contents + size + mtime."""
+    st = os.stat(file_name)
+    h = hashlib.sha1()
+    with open(file_name, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            h.update(block)
+    return f"{h.hexdigest()}-{st.st_size}-{int(st.st_mtime_ns)}"
+
+
+def load_telemetry(file_name, limit, method=DOWNSAMPLE_METHOD, cache_dir=None, use_cache=True, source_key=None):
+    """Downsampled voltage / solar (and timestamp) columns: the pipeline's
+    ingest stage, served from the stage cache if possible. source_key:
+    file_key(file_name), if the caller already has it."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_name)), STAGE_CACHE_DIR_NAME)
+    cache = StageCache(cache_dir, enabled=use_cache)
+
+    def compute():
+        print(f"Streaming {file_name} (limit={limit}, {method})...")
+        cols = stream_downsample(file_name, limit, method)
+        arrays = {"volts": cols["volts"], "solar": cols["solar"]}
+        if cols["times"] is not None:
+            arrays["times"] = cols["times"]
+        return arrays, {k: cols[k] for k in ("v_col", "s_col", "t_col", "step", "n_rows", "resume")}
+
+    if use_cache and source_key is None:
+        source_key = file_key(file_name)
+    key = (CACHE_VERSION, source_key if use_cache else None, limit, method)
+    arrays, meta = cache.memo("ingest", key, compute)
+    return {"volts": arrays["volts"], "solar": arrays["solar"], "times": arrays.get("times"), **meta}
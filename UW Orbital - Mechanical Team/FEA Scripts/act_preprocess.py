@@ -0,0 +1,59 @@
+import json
+import os
+import time
+
+# ==========================================
+# FUSED ACT PREPROCESSING
+# ==========================================
+# Runs the Mechanical preprocessing scripts back to back in one session, so
+# a batch journal needs a single SendCommand per model edit instead of one
+# hand-run script at a time:
+#   materials.py -> contacts_setup.py -> bolt_creation.py
+# Each script runs in its own copy of this script's globals (ExtAPI,
+# Quantity, ContactType, ...) plus CONFIG_OVERRIDES from batch_config.json,
+# which the scripts apply after their own CONFIGURATION block. Per-script
+# times go to act_times.json in the project folder for batch_driver.py.
+#
+# batch_config.json (written by batch_driver.py, optional):
+#   {"scripts": [...], "overrides": {"bolt_creation.py": {"AUTO_SIZES": false, ...}},
+#    "geometry": "<attached geometry file>"}   (read by geometry_catalog.py)
+
+CONFIG_NAME = "batch_config.json"
+TIMES_NAME = "act_times.json"
+DEFAULT_SCRIPTS = ["materials.py", "contacts_setup.py", "bolt_creation.py"]
+
+
+def run_preprocessing():
+    project_dir = ExtAPI.DataModel.Project.ProjectDirectory
+    config = {}
+    config_path = os.path.join(project_dir, CONFIG_NAME)
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            config = json.load(f)
+
+    times = []
+    for script in config.get("scripts", DEFAULT_SCRIPTS):
+        path = os.path.join(project_dir, script)
+        namespace = dict(_GLOBALS)
+        namespace["__name__"] = "__main__"
+        namespace["CONFIG_OVERRIDES"] = config.get("overrides", {}).get(script, {})
+        print("\n=== ACT STAGE: {} ===".format(script))
+        t0 = time.time()
+        status = "ok"
+        try:
+            with open(path, "r") as f:
+                code = compile(f.read(), path, "exec")
+            exec(code, namespace)
+        except Exception as e:
+            status = "error: " + str(e)
+            print("Stage {} failed: {}".format(script, str(e)))
+        times.append({"stage": script, "seconds": round(time.time() - t0, 3), "status": status})
+
+    with open(os.path.join(project_dir, TIMES_NAME), "w") as f:
+        json.dump(times, f, indent=1)
+    print("\nACT preprocessing: " + ", ".join(
+        "{} {:.1f}s ({})".format(t["stage"], t["seconds"], t["status"]) for t in times))
+
+
+_GLOBALS = dict(globals())
+run_preprocessing()
@@ -0,0 +1,265 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ==========================================
+# WORKBENCH BATCH DRIVER
+# ==========================================
+# Runs the preprocessing workflow from session_files/journal*.wbjn for many
+# design points at once, without the GUI. For each row of design_points.csv
+# (Name, Geometry, BoltRadiusMM, ContactRules) it writes
+#   batch_runs/<Name>/run.wbjn      the journal: new Static Structural
+#                                   system, make_materials.py, geometry,
+#                                   model refresh, ONE SendCommand running
+#                                   act_preprocess.py (materials ->
+#                                   contacts -> bolts), ONE final Save
+#   batch_runs/<Name>/job.json      the design point, for the executor
+# and launches the journals on a pool of --workers Workbench processes
+# (RunWB2 -B -R run.wbjn). Journal stage times (journal_times.json) and ACT
+# stage times (act_times.json) are gathered into batch_runs/batch_report.json.
+#
+# Inputs (scripts, CSVs, the design point's contact rules) are copied into
+# each project's _files folder by the journal, right after the first Save
+# creates it: the ACT scripts read them from ExtAPI's ProjectDirectory.
+#
+# --fake runs each job as `python batch_driver.py --fake-run <job dir>`
+# instead: Workbench stages are skipped, and act_preprocess.py runs on a
+# synthetic assembly through headless_extapi.py. That tests the whole
+# orchestration (journals, pool, copying, overrides, report) without Ansys.
+#
+# Usage: python batch_driver.py design_points.csv --workers 2
+#        python batch_driver.py design_points.csv --fake
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BATCH_DIR_NAME = "batch_runs"
+REPORT_NAME = "batch_report.json"
+RUNWB2 = os.environ.get("ANSYS_RUNWB2", r"C:\Program Files\ANSYS Inc\v252\Framework\bin\Win64\RunWB2.exe")
+SCRIPT_VERSION = "25.2.172"
+JOB_TIMEOUT_S = 4 * 3600
+FAKE_FACES = 10000
+
+# Copied into every project's _files folder (ProjectDirectory)
+INPUT_FILES = ["act_preprocess.py", "materials.py", "contacts_setup.py", "bolt_creation.py",
+               "geometry_catalog.py", "make_materials.py", "engineering_data.py",
+               "materials.csv", "material_library.csv"]
+ACT_SCRIPTS = ["materials.py", "contacts_setup.py", "bolt_creation.py"]
+
+JOURNAL_TEMPLATE = '''# encoding: utf-8
+# Generated by batch_driver.py for design point {name}
+SetScriptVersion(Version="{version}")
+import json, os, shutil, time
+_times = []
+_t = [time.time()]
+def _stage(name):
+    now = time.time()
+    _times.append({{"stage": name, "seconds": round(now - _t[0], 3)}})
+    _t[0] = now
+
+template1 = GetTemplate(
+    TemplateName="Static Structural",
+    Solver="ANSYS")
+system1 = template1.CreateSystem()
+Save(FilePath=r"{project}", Overwrite=True)
+files_dir = os.path.splitext(GetProjectFile())[0] + "_files"
+for src in {inputs!r}:
+    shutil.copy(src, files_dir)
+shutil.copy(r"{rules}", os.path.join(files_dir, "contact_rules.csv"))
+shutil.copy(r"{config}", os.path.join(files_dir, "batch_config.json"))
+_stage("create_project")
+RunScript(FilePath=os.path.join(files_dir, "make_materials.py"))
+_stage("engineering_data")
+geometry1 = system1.GetContainer(ComponentName="Geometry")
+geometry1.SetFile(FilePath=r"{geometry}")
+modelComponent1 = system1.GetComponent(Name="Model")
+modelComponent1.Refresh()
+_stage("geometry_refresh")
+model1 = system1.GetContainer(ComponentName="Model")
+model1.Edit(Interactive=False)
+model1.SendCommand(Language="Python", Command='execfile(r"' + os.path.join(files_dir, "act_preprocess.py") + '")')
+_stage("act_preprocess")
+model1.Exit()
+Save(Overwrite=True)
+_stage("save")
+with open(r"{times}", "w") as f:
+    json.dump(_times, f, indent=1)
+'''
+
+
+def read_design_points(path):
+    """Rows of the design point CSV; relative paths are from its folder."""
+    base = os.path.dirname(os.path.abspath(path))
+    points = []
+    with open(path, "r") as f:
+        for row in csv.DictReader(f):
+            name = row["Name"].strip()
+            if not name:
+                continue
+            radius = (row.get("BoltRadiusMM") or "").strip()
+            rules = (row.get("ContactRules") or "").strip() or "contact_rules.csv"
+            points.append({"name": name,
+                           "geometry": os.path.normpath(os.path.join(base, row["Geometry"].strip())),
+                           "bolt_radius_mm": float(radius) if radius else None,
+                           "contact_rules": os.path.normpath(os.path.join(base, rules))})
+    return points
+
+
+def batch_config(point):
+    """act_preprocess.py settings for one design point. "geometry" keys the
+    geometry catalog (geometry_catalog.py) to the file this point attaches."""
+    overrides = {"materials.py": {"SHOW_POPUPS": False}}
+    if point["bolt_radius_mm"] is not None:
+        overrides["bolt_creation.py"] = {"AUTO_SIZES": False, "TARGET_RADIUS_MM": point["bolt_radius_mm"]}
+    return {"scripts": ACT_SCRIPTS, "overrides": overrides, "geometry": point["geometry"]}
+
+
+def prepare_job(point, batch_dir):
+    """Job folder with run.wbjn, batch_config.json and job.json."""
+    job_dir = os.path.join(batch_dir, point["name"])
+    if os.path.exists(job_dir):
+        shutil.rmtree(job_dir)
+    os.makedirs(job_dir)
+    config = os.path.join(job_dir, "batch_config.json")
+    with open(config, "w") as f:
+        json.dump(batch_config(point), f, indent=1)
+    journal = os.path.join(job_dir, "run.wbjn")
+    with open(journal, "w") as f:
+        f.write(JOURNAL_TEMPLATE.format(
+            name=point["name"], version=SCRIPT_VERSION, project=os.path.join(job_dir, point["name"] + ".wbpj"),
+            inputs=[os.path.join(HERE, name) for name in INPUT_FILES], rules=point["contact_rules"],
+            config=config, geometry=point["geometry"], times=os.path.join(job_dir, "journal_times.json")))
+    job = dict(point, job_dir=job_dir, journal=journal)
+    with open(os.path.join(job_dir, "job.json"), "w") as f:
+        json.dump(job, f, indent=1)
+    return job
+
+
+# ------------------------------------------
+# EXECUTORS
+# ------------------------------------------
+class WorkbenchExecutor(object):
+    def __init__(self, runwb2=RUNWB2):
+        self.runwb2 = runwb2
+
+    def command(self, job):
+        return [self.runwb2, "-B", "-R", job["journal"]]
+
+
+class FakeExecutor(object):
+    """Runs a job in a plain Python process (see fake_run)."""
+    def command(self, job):
+        return [sys.executable, os.path.abspath(__file__), "--fake-run", job["job_dir"]]
+
+
+def fake_run(job_dir, faces=FAKE_FACES):
+    """What the journal does, minus Workbench: project folder + inputs, then
+    act_preprocess.py on a synthetic assembly."""
+    import headless_extapi as hx
+    from synth_assembly import build_model
+
+    with open(os.path.join(job_dir, "job.json"), "r") as f:
+        job = json.load(f)
+    times = []
+    t0 = time.time()
+    files_dir = os.path.join(job_dir, job["name"] + "_files")
+    os.makedirs(files_dir)
+    for name in INPUT_FILES:
+        shutil.copy(os.path.join(HERE, name), files_dir)
+    shutil.copy(job["contact_rules"], os.path.join(files_dir, "contact_rules.csv"))
+    shutil.copy(os.path.join(job_dir, "batch_config.json"), files_dir)
+    times.append({"stage": "create_project", "seconds": round(time.time() - t0, 3)})
+    for stage in ("engineering_data", "geometry_refresh"):
+        times.append({"stage": stage, "seconds": 0.0, "simulated": True})
+
+    t0 = time.time()
+    model = build_model(faces)
+    sys.path.insert(0, files_dir)
+    print(hx.run_script(os.path.join(files_dir, "act_preprocess.py"), model, files_dir))
+    times.append({"stage": "act_preprocess", "seconds": round(time.time() - t0, 3)})
+    times.append({"stage": "save", "seconds": 0.0, "simulated": True})
+    with open(os.path.join(job_dir, "journal_times.json"), "w") as f:
+        json.dump(times, f, indent=1)
+
+
+# ------------------------------------------
+# POOL + REPORT
+# ------------------------------------------
+def _read_json(path, default):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return default
+
+
+def run_job(job, executor, timeout):
+    log_path = os.path.join(job["job_dir"], "run.log")
+    t0 = time.time()
+    with open(log_path, "w") as log:
+        try:
+            code = subprocess.run(executor.command(job), stdout=log, stderr=subprocess.STDOUT,
+                                  timeout=timeout).returncode
+            status = "ok" if code == 0 else "exit code {}".format(code)
+        except subprocess.TimeoutExpired:
+            status = "timeout after {} s".format(timeout)
+        except OSError as e:
+            status = "could not start: {}".format(e)
+    files_dir = os.path.join(job["job_dir"], job["name"] + "_files")
+    act = _read_json(os.path.join(files_dir, "act_times.json"), [])
+    if status == "ok" and any(t["status"] != "ok" for t in act):
+        status = "ACT stage failed"
+    return {"name": job["name"], "status": status, "wall_seconds": round(time.time() - t0, 3),
+            "journal_stages": _read_json(os.path.join(job["job_dir"], "journal_times.json"), []),
+            "act_stages": act, "log": log_path}
+
+
+def run_batch(points, batch_dir, executor, workers, timeout=JOB_TIMEOUT_S):
+    os.makedirs(batch_dir, exist_ok=True)
+    jobs = [prepare_job(p, batch_dir) for p in points]
+    print("Running {} design points on {} workers...".format(len(jobs), workers))
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda job: run_job(job, executor, timeout), jobs))
+    for r in results:
+        stages = r["journal_stages"] + r["act_stages"]
+        print("  {:20} {:>8.1f}s  {:12}  ".format(r["name"], r["wall_seconds"], r["status"]) +
+              "  ".join("{} {:.1f}".format(s["stage"], s["seconds"]) for s in stages))
+    report = {"workers": workers, "executor": type(executor).__name__,
+              "wall_seconds": round(time.time() - t0, 3), "results": results}
+    path = os.path.join(batch_dir, REPORT_NAME)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Batch done in {:.1f}s, {} failed. Report: {}".format(
+        report["wall_seconds"], sum(r["status"] != "ok" for r in results), path))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Workbench preprocessing for many design points.")
+    parser.add_argument("design_points", nargs="?", help="CSV: Name, Geometry, BoltRadiusMM, ContactRules")
+    parser.add_argument("--workers", type=int, default=2, help="Workbench processes at once")
+    parser.add_argument("--out", default=None, help="Batch folder (default: ./{})".format(BATCH_DIR_NAME))
+    parser.add_argument("--runwb2", default=RUNWB2)
+    parser.add_argument("--timeout", type=float, default=JOB_TIMEOUT_S, help="Seconds per design point")
+    parser.add_argument("--fake", action="store_true", help="Run without Ansys (headless_extapi)")
+    parser.add_argument("--fake-run", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.fake_run:
+        fake_run(args.fake_run)
+    elif not args.design_points:
+        parser.error("design_points is required")
+    else:
+        points = read_design_points(args.design_points)
+        if not args.fake:
+            for p in points:
+                if not os.path.exists(p["geometry"]):
+                    print("Warning: {} geometry not found: {}".format(p["name"], p["geometry"]))
+        executor = FakeExecutor() if args.fake else WorkbenchExecutor(args.runwb2)
+        run_batch(points, args.out or os.path.join(os.getcwd(), BATCH_DIR_NAME), executor, args.workers,
+                  args.timeout)
@@ -1,20 +1,54 @@
 import math
+import sys
 import clr
 
+# Shared geometry catalog (geometry_catalog.py in the project folder)
+sys.path.append(ExtAPI.DataModel.Project.ProjectDirectory)
+import geometry_catalog
+
 # Explicitly import BeamBehavior
 try:
     from Ansys.ACT.Automation.Mechanical import BeamBehavior
 except:
     pass
 
+# Transaction() holds tree / model updates until the block ends (2019 R1+)
+try:
+    Transaction
+except NameError:
+    Transaction = None
+
 # ==========================================
 # CONFIGURATION (ENTER IN MILLIMETERS)
 # ==========================================
+# AUTO_SIZES: bolt every hole size listed in BOLT_SPECS in one pass, plus
+# TARGET_RADIUS_MM if no band covers it. Otherwise only holes of
+# TARGET_RADIUS_MM are bolted (single-size mode).
+AUTO_SIZES = True
 TARGET_RADIUS_MM = 2.0 
 RADIUS_TOL_MM = 0.1 
 MAX_BOLT_LEN_MM = 50.0
+MIN_BOLT_LEN_MM = 1.0
 BOLT_MATERIAL = "Stainless Steel"
 
+# Hole radius band (mm) -> bolt. Bands match the notes in bolt_detection.py.
+# (Name, Min hole radius, Max hole radius, Beam radius, Material, Max length)
+BOLT_SPECS = [
+    ("M4",  1.9, 2.1, 2.0, "Stainless Steel", 50.0),  # = TARGET_RADIUS_MM +- RADIUS_TOL_MM
+    ("M6",  2.9, 3.3, 3.0, "Stainless Steel", 40.0),
+    ("M8",  3.9, 4.3, 4.0, "Stainless Steel", 50.0),
+    ("M10", 4.9, 5.3, 5.0, "Stainless Steel", 60.0),
+    ("M12", 5.9, 6.3, 6.0, "Stainless Steel", 80.0),
+]
+
+# Lengths are compared in mm (the catalog converts from GeoData metres)
+# Head and thread hole must sit on one line along the hole axis
+AXIS_TOL_DEG = 5.0
+SHOW_UNMATCHED = 20  # Face Ids listed in the report
+
+# Batch runs (act_preprocess.py) override the settings above per design point
+globals().update(globals().get("CONFIG_OVERRIDES") or {})
+
 # ==========================================
 # HELPER: SELECTION WRAPPER
 # ==========================================
@@ -26,96 +60,139 @@ def create_selection(geo_id):
 # ==========================================
 # GEOMETRY SCANNERS
 # ==========================================
-def get_cylindrical_faces(geo):
-    cylinders = []
+def get_cylindrical_faces(catalog):
     print("Scanning for holes with Radius ~{} mm...".format(TARGET_RADIUS_MM))
-    
-    for assembly in geo.Assemblies:
-        for part in assembly.Parts:
-            for body in part.Bodies:
-                for face in body.Faces:
-                    if "Cylinder" in str(face.SurfaceType):
-                        try:
-                            if hasattr(face, "Radius"):
-                                r_val = face.Radius
-                                if r_val < 0.1: r_val = r_val * 1000.0
-                                
-                                if abs(r_val - TARGET_RADIUS_MM) < RADIUS_TOL_MM:
-                                    cylinders.append(face)
-                        except:
-                            pass
-    return cylinders
+    return catalog.holes(TARGET_RADIUS_MM, RADIUS_TOL_MM)
+
+def bolt_bands():
+    """BOLT_SPECS, plus a band for TARGET_RADIUS_MM when none covers it (so
+    an overridden target size is still bolted in AUTO_SIZES mode)."""
+    bands = list(BOLT_SPECS)
+    if not any(r_min < TARGET_RADIUS_MM < r_max for _, r_min, r_max, _, _, _ in bands):
+        bands.append(("R{}".format(TARGET_RADIUS_MM), TARGET_RADIUS_MM - RADIUS_TOL_MM,
+                      TARGET_RADIUS_MM + RADIUS_TOL_MM, TARGET_RADIUS_MM, BOLT_MATERIAL, MAX_BOLT_LEN_MM))
+    return bands
+
+def group_by_spec(catalog, bands):
+    """{band name: hole records}, plus {radius: faces} no band covers.
+    Bands are matched once per distinct radius in the catalog's histogram,
+    then the holes are sorted into them."""
+    band_of = {}
+    for r_mm in catalog.radius_histogram(decimals=6):
+        for name, r_min, r_max, _, _, _ in bands:
+            if r_min < r_mm < r_max:
+                band_of[r_mm] = name
+                break
+    groups = dict((band[0], []) for band in bands)
+    skipped = {}
+    for hole in catalog.holes():
+        name = band_of.get(round(hole["radius_mm"], 6))
+        if name is not None:
+            groups[name].append(hole)
+        else:
+            key = round(hole["radius_mm"], 2)
+            skipped[key] = skipped.get(key, 0) + 1
+    return groups, skipped
 
 # ==========================================
-# MAIN EXECUTION
+# HOLE PAIRING (GRID HASH)
 # ==========================================
-def create_beam_bolts_final():
-    geo = ExtAPI.DataModel.GeoData
-    print("\n--- STARTING AUTO-BOLTER (V2025 FINAL) ---")
+# Centroids go into a uniform grid with MAX_BOLT_LEN_MM cells, so each hole
+# only looks at the 27 cells around it instead of every other hole. All
+# candidate pairs are then taken shortest first, which gives every hole its
+# nearest collinear mate (not just the last one in range).
+def _sub(a, b):
+    return (a[0]-b[0], a[1]-b[1], a[2]-b[2])
 
-    valid_faces = get_cylindrical_faces(geo)
-    print("Found {} candidate faces.".format(len(valid_faces)))
+def _cross(a, b):
+    return (a[1]*b[2]-a[2]*b[1], a[2]*b[0]-a[0]*b[2], a[0]*b[1]-a[1]*b[0])
 
-    if len(valid_faces) < 2:
-        print("Not enough faces found.")
-        return
+def _norm(a):
+    return math.sqrt(a[0]*a[0] + a[1]*a[1] + a[2]*a[2])
+
+def is_collinear(d, dist, axis, sin_tol):
+    """Centroid offset d (length dist) runs along the axis."""
+    if axis is None or dist == 0:
+        return True
+    return _norm(_cross(d, axis)) / dist <= sin_tol
+
+def pair_holes(faces, max_len=MAX_BOLT_LEN_MM):
+    """faces: catalog hole records. Returns (pairs, unmatched) of them."""
+    cell = max_len
+    sin_tol = math.sin(math.radians(AXIS_TOL_DEG))
+    holes = []
+    grid = {}
+    for i, face in enumerate(faces):
+        c = face["centroid_mm"]
+        holes.append((face, c, face["axis"]))
+        key = (int(math.floor(c[0] / cell)), int(math.floor(c[1] / cell)), int(math.floor(c[2] / cell)))
+        grid.setdefault(key, []).append(i)
 
-    # Group faces
+    candidates = []
+    for key, members in grid.items():
+        neighbours = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    neighbours.extend(grid.get((key[0]+dx, key[1]+dy, key[2]+dz), ()))
+        for i in members:
+            f1, c1, a1 = holes[i]
+            for j in neighbours:
+                if j <= i:
+                    continue
+                f2, c2, a2 = holes[j]
+                d = _sub(c2, c1)
+                dist = _norm(d)
+                if not (MIN_BOLT_LEN_MM < dist < max_len):
+                    continue
+                if is_collinear(d, dist, a1, sin_tol) and is_collinear(d, dist, a2, sin_tol):
+                    candidates.append((dist, i, j))
+
+    candidates.sort()
+    used = set()
     pairs = []
-    used_ids = set()
-
-    for i in range(len(valid_faces)):
-        f1 = valid_faces[i]
-        if f1.Id in used_ids: continue
-        
-        best_mate = None
-        min_dist = MAX_BOLT_LEN_MM
-        
-        for j in range(i+1, len(valid_faces)):
-            f2 = valid_faces[j]
-            if f2.Id in used_ids: continue
-            
-            c1 = f1.Centroid
-            c2 = f2.Centroid
-            dist = math.sqrt((c1[0]-c2[0])**2 + (c1[1]-c2[1])**2 + (c1[2]-c2[2])**2)
-            
-            dist_mm = dist
-            if dist < 1.0 and MAX_BOLT_LEN_MM > 10.0:
-                 dist_mm = dist * 1000.0
-            
-            if dist_mm < MAX_BOLT_LEN_MM and dist_mm > 1.0: 
-                best_mate = f2
-                min_dist = dist_mm
-                
-        if best_mate:
-            pairs.append((f1, best_mate))
-            used_ids.add(f1.Id)
-            used_ids.add(best_mate.Id)
-
-    print("Identified {} bolt pairs.".format(len(pairs)))
-
-    # Create Beams
-    model = ExtAPI.DataModel.Project.Model
-    connections = model.Connections
-    
-    count = 0
-    created = 0
-    for src_face, tgt_face in pairs:
+    for dist, i, j in candidates:
+        if i in used or j in used:
+            continue
+        used.add(i)
+        used.add(j)
+        pairs.append((holes[i][0], holes[j][0]))
+    unmatched = [holes[i][0] for i in range(len(holes)) if i not in used]
+    return pairs, unmatched
+
+# ==========================================
+# BEAM CREATION (BATCHED)
+# ==========================================
+class _NoTransaction(object):
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+def add_bolt_selections(model, pairs):
+    """Head / Thread Named Selections for every pair, created together."""
+    out = []
+    for src, tgt in pairs:
         try:
-            # 1. Create Named Selections
             ns_src = model.AddNamedSelection()
-            ns_src.Name = "Bolt_Head_{}".format(src_face.Id)
-            ns_src.Location = create_selection(src_face.Id)
+            ns_src.Name = "Bolt_Head_{}".format(src["id"])
+            ns_src.Location = create_selection(src["id"])
             
             ns_tgt = model.AddNamedSelection()
-            ns_tgt.Name = "Bolt_Thread_{}".format(tgt_face.Id)
-            ns_tgt.Location = create_selection(tgt_face.Id)
-            
-            # 2. Add Beam
+            ns_tgt.Name = "Bolt_Thread_{}".format(tgt["id"])
+            ns_tgt.Location = create_selection(tgt["id"])
+            out.append((ns_src, ns_tgt))
+        except Exception as e:
+            print("Failed to select holes {} / {}: {}".format(src["id"], tgt["id"], str(e)))
+    return out
+
+def add_beams(connections, selections, name, radius_mm, material):
+    """One beam per (head, thread) selection pair. Returns beams created."""
+    created = 0
+    for ns_src, ns_tgt in selections:
+        try:
             beam = connections.AddBeam()
-            beam.Radius = Quantity("{} [mm]".format(TARGET_RADIUS_MM))
+            beam.Radius = Quantity("{} [mm]".format(radius_mm))
             
-            # 3. SCOPING (THE FIX FOR 2025)
+            # SCOPING (THE FIX FOR 2025)
             # Try Reference/Mobile first, fall back to Source/Target
             try:
                 beam.ReferenceLocation = ns_src
@@ -127,16 +204,78 @@ def create_beam_bolts_final():
             try: beam.Behavior = BeamBehavior.Deformable 
             except: pass
             
-            if BOLT_MATERIAL:
-                try: beam.Material = BOLT_MATERIAL
+            if material:
+                try: beam.Material = material
                 except: pass
             
-            beam.Name = "AutoBolt_{}".format(count)
-            count += 1
+            beam.Name = "AutoBolt_{}_{}".format(name, created)
             created += 1
             
         except Exception as e:
-            print("Failed to create beam {}: {}".format(count, str(e)))
+            print("Failed to create {} beam {}: {}".format(name, created, str(e)))
+    return created
+
+# ==========================================
+# MAIN EXECUTION
+# ==========================================
+def report_pairs(name, faces, pairs, unmatched, max_len):
+    print("{}: {} holes -> {} bolt pairs.".format(name, len(faces), len(pairs)))
+    if unmatched:
+        print("  {} holes have no collinear mate within {} mm: {}{}".format(
+            len(unmatched), max_len, [f["id"] for f in unmatched[:SHOW_UNMATCHED]],
+            " ..." if len(unmatched) > SHOW_UNMATCHED else ""))
+
+def plan_bolts(catalog):
+    """[(name, pairs, beam radius, material)] for every size to bolt."""
+    if not AUTO_SIZES:
+        faces = get_cylindrical_faces(catalog)
+        print("Found {} candidate faces.".format(len(faces)))
+        if len(faces) < 2:
+            print("Not enough faces found.")
+            return []
+        pairs, unmatched = pair_holes(faces)
+        report_pairs("R{}".format(TARGET_RADIUS_MM), faces, pairs, unmatched, MAX_BOLT_LEN_MM)
+        return [("R{}".format(TARGET_RADIUS_MM), pairs, TARGET_RADIUS_MM, BOLT_MATERIAL)]
+
+    print("Grouping holes by bolt size...")
+    bands = bolt_bands()
+    groups, skipped = group_by_spec(catalog, bands)
+    plan = []
+    for name, r_min, r_max, radius_mm, material, max_len in bands:
+        faces = groups[name]
+        if len(faces) < 2:
+            continue
+        pairs, unmatched = pair_holes(faces, max_len)
+        report_pairs(name, faces, pairs, unmatched, max_len)
+        if pairs:
+            plan.append((name, pairs, radius_mm, material))
+    if skipped:
+        print("Radii outside every BOLT_SPECS band (mm: faces): {}".format(
+            ", ".join("{}: {}".format(r_mm, skipped[r_mm]) for r_mm in sorted(skipped))))
+    return plan
+
+def create_beam_bolts_final():
+    print("\n--- STARTING AUTO-BOLTER (V2025 FINAL) ---")
+    catalog = geometry_catalog.load_catalog(ExtAPI)
+
+    plan = plan_bolts(catalog)
+    if not plan:
+        print("Nothing to bolt.")
+        return
+
+    # Create Beams: all sizes inside one Transaction, so the tree and model
+    # update once at the end instead of after every object
+    model = ExtAPI.DataModel.Project.Model
+    connections = model.Connections
+    
+    created = 0
+    with (Transaction() if Transaction is not None else _NoTransaction()):
+        for name, pairs, radius_mm, material in plan:
+            # 1. Named Selections for the whole size, then 2. its beams
+            selections = add_bolt_selections(model, pairs)
+            n = add_beams(connections, selections, name, radius_mm, material)
+            print("{}: created {} beams (radius {} mm).".format(name, n, radius_mm))
+            created += n
 
     print("--- BOLTING COMPLETE: Created {} Beams ---".format(created))
 
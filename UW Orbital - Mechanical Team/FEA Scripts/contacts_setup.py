@@ -1,15 +1,67 @@
 import csv
 import os
+import sys
+import time
 
 # ==========================================
 # CONFIGURATION
 # ==========================================
 CLEANUP_NOISE = True
 MIN_CONTACT_AREA = 10.0 
+SHOW_ERRORS = 5  # Error messages printed per kind (all are counted)
 
 project_dir = ExtAPI.DataModel.Project.ProjectDirectory
 rule_csv_path = os.path.join(project_dir, "contact_rules.csv")
 
+# Shared geometry catalog (geometry_catalog.py in the project folder)
+sys.path.append(project_dir)
+import geometry_catalog
+
+# Transaction() holds tree / model updates until the block ends (2019 R1+)
+try:
+    Transaction
+except NameError:
+    Transaction = None
+
+class _NoTransaction(object):
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+# ==========================================
+# HELPERS
+# ==========================================
+class FaceLookup(object):
+    """Face Id -> (body Id, area m^2). Answers from the geometry catalog and
+    asks GeoData only for faces the catalog doesn't know, once each."""
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.extra = {}
+        self.misses = 0
+
+    def get(self, face_id):
+        rec = self.catalog.faces.get(face_id)
+        if rec is not None:
+            return rec[0], rec[2]
+        if face_id not in self.extra:
+            self.misses += 1
+            face = ExtAPI.DataModel.GeoData.GeoEntityById(face_id)
+            self.extra[face_id] = (face.Body.Id, face.Area)
+        return self.extra[face_id]
+
+class ErrorLog(object):
+    """Counts skipped contacts by stage; prints the first few messages."""
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, kind, contact_name, e):
+        n = self.counts.get(kind, 0) + 1
+        self.counts[kind] = n
+        if n <= SHOW_ERRORS:
+            print("  [{}] {}: {}".format(kind, contact_name, str(e)))
+
+    def total(self):
+        return sum(self.counts.values())
+
 def step2_assign_lookup():
     print("\n--- STAGE 2: CONTACT ASSIGNMENT (LOOKUP METHOD) ---")
     
@@ -31,36 +83,21 @@ def step2_assign_lookup():
         print("Error: Rules CSV not found.")
         return
 
-    # 2. BUILD MATERIAL MAP (Tree Scan)
-    # Mapping: GeoBody_ID (Int) -> Material_Name (String)
-    print("Building Geometry Material Map...")
-    geo_mat_map = {}
-    
-    def map_tree_bodies(node):
-        for child in node.Children:
-            map_tree_bodies(child)
-        
-        # If this node is a Body in the Tree
-        if "Body" in node.DataModelObjectCategory.ToString():
-            try:
-                # 1. Get the Text Name (e.g., "Stainless Steel")
-                mat_name = node.Material 
-                
-                # 2. Get the Topology ID (The link to GeoData)
-                geo_body = node.GetGeoBody()
-                if geo_body:
-                    geo_mat_map[geo_body.Id] = mat_name
-            except:
-                pass
-
-    # Start scan at Geometry Root
-    root_geo = ExtAPI.DataModel.Project.Model.Geometry
-    map_tree_bodies(root_geo)
-    print("Mapped materials for {} bodies.".format(len(geo_mat_map)))
-
-    # 3. PROCESS CONTACTS
+    # 2. MATERIAL MAP (Geometry Catalog)
+    # Face -> Body and Body -> Material come from the shared catalog; only
+    # the materials are re-read, since they may have changed since it was saved.
+    print("Loading Geometry Catalog...")
+    catalog = geometry_catalog.load_catalog(ExtAPI)
+    catalog.refresh_materials(ExtAPI)
+    print("Mapped materials for {} bodies.".format(len(catalog.bodies)))
+
+    # 3. COLLECT CONTACTS
+    # One pass over the tree: scoping Ids only. Nothing is changed or
+    # deleted while the groups are being iterated.
+    t0 = time.time()
+    errors = ErrorLog()
     connections = ExtAPI.DataModel.Project.Model.Connections
-    updated_count = 0
+    contacts = []  # (contact, source face Ids, target face Ids)
     
     for group in connections.Children:
         if "ConnectionGroup" not in group.DataModelObjectCategory.ToString():
@@ -71,46 +108,87 @@ def step2_assign_lookup():
         for contact in group.Children:
             if "ContactRegion" not in contact.DataModelObjectCategory.ToString():
                 continue
-            
             try:
-                # Get Geometry Entities (Faces)
-                src_ref = contact.SourceLocation.Ids[0]
-                tgt_ref = contact.TargetLocation.Ids[0]
-                
-                # Convert Face -> Parent Body -> ID
-                src_geo_body = ExtAPI.DataModel.GeoData.GeoEntityById(src_ref).Body
-                tgt_geo_body = ExtAPI.DataModel.GeoData.GeoEntityById(tgt_ref).Body
-                
-                # LOOKUP NAME FROM OUR MAP
-                m1 = geo_mat_map.get(src_geo_body.Id, "Unknown")
-                m2 = geo_mat_map.get(tgt_geo_body.Id, "Unknown")
-                
-                # Check Match
-                key = tuple(sorted((m1, m2)))
-                
-                if key in rule_map:
-                    rule = rule_map[key]
-                    new_type = rule[0]
-                    new_fric = rule[1]
-                    
-                    # Update Properties
-                    if hasattr(ContactType, new_type):
-                        contact.ContactType = getattr(ContactType, new_type)
-                        if new_type == "Frictional":
-                            contact.FrictionCoefficient = new_fric
-                        
-                        contact.Name = "{} to {} ({})".format(m1, m2, new_type)
-                        updated_count += 1
-                
-                # Cleanup Noise
-                if CLEANUP_NOISE:
-                    total_area = sum([face.Area for face in contact.TargetLocation.Entities])
-                    if (total_area * 1e6) < MIN_CONTACT_AREA:
-                        contact.Delete()
+                contacts.append((contact, list(contact.SourceLocation.Ids), list(contact.TargetLocation.Ids)))
+            except Exception as e:
+                errors.add("scoping", contact.Name, e)
+    t_collect = time.time() - t0
+
+    # 4. LOOKUPS (Face -> Body -> Material, target area)
+    # Every distinct face is resolved once; contacts are then bucketed by
+    # their material pair, so each rule is looked up once per pair.
+    t0 = time.time()
+    faces = FaceLookup(catalog)
+    by_key = {}   # (m1, m2) -> [(contact, m1, m2)]
+    noise = []
+    
+    for contact, src_ids, tgt_ids in contacts:
+        try:
+            src_body = faces.get(src_ids[0])[0]
+            tgt_body = faces.get(tgt_ids[0])[0]
+            m1 = catalog.material_of(src_body)
+            m2 = catalog.material_of(tgt_body)
+            
+            # Cleanup Noise (target area in mm^2)
+            if CLEANUP_NOISE:
+                total_area = sum([faces.get(face_id)[1] for face_id in tgt_ids])
+                if (total_area * 1e6) < MIN_CONTACT_AREA:
+                    noise.append(contact)
+                    continue
+            
+            by_key.setdefault(tuple(sorted((m1, m2))), []).append((contact, m1, m2))
+        except Exception as e:
+            errors.add("lookup", contact.Name, e)
+    t_lookup = time.time() - t0
 
+    # 5. UPDATE + DELETE (one Transaction)
+    t0 = time.time()
+    rule_counts = {}  # Rule key -> contacts updated
+    unmatched = 0
+    deleted = 0
+    
+    with (Transaction() if Transaction is not None else _NoTransaction()):
+        for key, members in by_key.items():
+            if key not in rule_map:
+                unmatched += len(members)
+                continue
+            new_type, new_fric = rule_map[key]
+            if not hasattr(ContactType, new_type):
+                errors.add("rule", "{} / {}".format(key[0], key[1]),
+                           "unknown ContactType '{}' ({} contacts)".format(new_type, len(members)))
+                continue
+            contact_type = getattr(ContactType, new_type)
+            
+            for contact, m1, m2 in members:
+                try:
+                    contact.ContactType = contact_type
+                    if new_type == "Frictional":
+                        contact.FrictionCoefficient = new_fric
+                    contact.Name = "{} to {} ({})".format(m1, m2, new_type)
+                    rule_counts[key] = rule_counts.get(key, 0) + 1
+                except Exception as e:
+                    errors.add("update", contact.Name, e)
+        
+        # Deferred deletes, after every iteration over the tree is done
+        for contact in noise:
+            try:
+                contact.Delete()
+                deleted += 1
             except Exception as e:
-                pass
+                errors.add("delete", contact.Name, e)
+    t_apply = time.time() - t0
 
+    # 6. REPORT
+    updated_count = sum(rule_counts.values())
+    print("Contacts: {} found, {} updated, {} with no rule, {} noise deleted, {} skipped (errors).".format(
+        len(contacts), updated_count, unmatched, deleted, errors.total()))
+    for key in sorted(rule_map):
+        print("  {} / {} ({}): {}".format(key[0], key[1], rule_map[key][0], rule_counts.get(key, 0)))
+    for kind in sorted(errors.counts):
+        print("  Errors [{}]: {}".format(kind, errors.counts[kind]))
+    if faces.misses:
+        print("  {} faces were not in the geometry catalog (looked up directly).".format(faces.misses))
+    print("Timing: collect {:.2f}s, lookup {:.2f}s, update/delete {:.2f}s".format(t_collect, t_lookup, t_apply))
     print("--- COMPLETE: Updated {} contacts ---".format(updated_count))
 
 step2_assign_lookup()
\ No newline at end of file
@@ -0,0 +1,166 @@
+import csv
+import json
+import os
+import xml.etree.ElementTree as ET
+
+# ==========================================
+# ENGINEERING DATA SYNC HELPERS
+# ==========================================
+# make_materials.py keeps Workbench's Engineering Data in line with a
+# material library file instead of recreating everything on every run:
+#   library   material_library.csv (Name + one column per variable, SI units)
+#             or a .json {name: {variable: value}}
+#   snapshot  what EngineeringData.xml holds now, {name: {variable: value}},
+#             read with iterparse so the file is never held as a tree
+#   diff      only the materials / variables that are missing or differ
+# The snapshot is cached in .engd_snapshot.json (keyed by the XML's size and
+# mtime), together with the library and XML keys of the last clean sync, so
+# a rebuild with nothing changed skips Engineering Data entirely.
+
+LIBRARY_NAME = "material_library.csv"
+STATE_NAME = ".engd_snapshot.json"
+STATE_VERSION = 1
+REL_TOL = 1e-9
+
+# Library variable -> Engineering Data property that holds it
+PROPERTY_OF = {
+    "Density": "Density",
+    "Young's Modulus": "Isotropic Elasticity",
+    "Poisson's Ratio": "Isotropic Elasticity",
+    "Tensile Yield Strength": "Tensile Yield Strength",
+}
+
+
+def file_key(path):
+    """Size + mtime of a file, or None if it doesn't exist."""
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": int(st.st_mtime)}
+
+
+def load_library(path):
+    """{material: {variable: float}} from a .csv or .json library."""
+    if path.lower().endswith(".json"):
+        with open(path, "r") as f:
+            data = json.load(f)
+        return dict((name, dict((var, float(val)) for var, val in props.items()))
+                    for name, props in data.items())
+    library = {}
+    with open(path, "r") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            props = {}
+            for var, val in zip(header[1:], row[1:]):
+                if val.strip():
+                    props[var] = float(val)
+            library[row[0].strip()] = props
+    return library
+
+
+def parse_snapshot(xml_path):
+    """{material: {parameter name: value}} from EngineeringData.xml.
+
+    Streams the MatML section: dependent float parameters are collected per
+    material by parameter id, and the ids are resolved to names from the
+    Metadata block at the end (it comes after the materials)."""
+    raw = {}        # material -> {parameter id: value}
+    names = {}      # parameter id -> name
+    path = []
+    material = None
+    for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+        if event == "start":
+            path.append(elem.tag)
+            continue
+        tag = path.pop()
+        parent = path[-1] if path else None
+        if tag == "Name" and parent == "BulkDetails" and material is None:
+            material = (elem.text or "").strip()
+            raw.setdefault(material, {})
+        elif tag == "ParameterValue" and material is not None and elem.get("format") == "float":
+            kind = None
+            for q in elem.findall("Qualifier"):
+                if q.get("name") == "Variable Type":
+                    kind = (q.text or "").strip()
+            data = elem.findtext("Data")
+            if kind == "Dependent" and data:
+                try: raw[material][elem.get("parameter")] = float(data.split(",")[0])
+                except ValueError: pass
+        elif tag == "ParameterDetails":
+            names[elem.get("id")] = (elem.findtext("Name") or "").strip()
+        elif tag == "Material" and parent == "MatML_Doc":
+            material = None
+        if tag in ("Material", "ParameterDetails"):
+            elem.clear()
+    return dict((mat, dict((names.get(pid, pid), val) for pid, val in params.items()))
+                for mat, params in raw.items())
+
+
+def _same(a, b):
+    return abs(a - b) <= REL_TOL * max(abs(a), abs(b))
+
+
+def diff(library, snapshot):
+    """[(material, is_new, {variable: value})] for what has to change."""
+    changes = []
+    for name in sorted(library):
+        wanted = library[name]
+        have = snapshot.get(name)
+        if have is None:
+            changes.append((name, True, dict(wanted)))
+            continue
+        changed = dict((var, val) for var, val in wanted.items()
+                       if var not in have or not _same(have[var], val))
+        if changed:
+            changes.append((name, False, changed))
+    return changes
+
+
+def by_property(variables):
+    """{property: [(variable, value)]}, in a stable order."""
+    out = {}
+    for var in sorted(variables):
+        out.setdefault(PROPERTY_OF.get(var, var), []).append((var, variables[var]))
+    return out
+
+
+# ------------------------------------------
+# CACHED STATE
+# ------------------------------------------
+def load_state(files_dir):
+    path = os.path.join(files_dir, STATE_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+            if state.get("version") == STATE_VERSION:
+                return state
+        except Exception as e:
+            print("Snapshot cache unreadable ({}), ignoring it.".format(e))
+    return {"version": STATE_VERSION, "xml": None, "snapshot": {}, "synced": None}
+
+
+def save_state(files_dir, state):
+    path = os.path.join(files_dir, STATE_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    if os.path.exists(path):
+        os.remove(path)  # no os.replace in IronPython 2.7
+    os.rename(tmp, path)
+
+
+def snapshot_for(state, xml_path):
+    """The cached snapshot if the XML hasn't changed, else a fresh parse."""
+    key = file_key(xml_path)
+    if key is None:
+        return {}, key
+    if state["xml"] == key:
+        print("Engineering Data snapshot: cached.")
+        return state["snapshot"], key
+    snapshot = parse_snapshot(xml_path)
+    print("Engineering Data snapshot: parsed {} materials from {}".format(len(snapshot), xml_path))
+    return snapshot, key
@@ -0,0 +1,145 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import geometry_catalog
+import headless_extapi as hx
+from synth_assembly import build_model
+
+# ==========================================
+# FEA SCRIPT BENCHMARK
+# ==========================================
+# Runs the ACT scripts against synthetic assemblies (synth_assembly.py) on
+# the headless ExtAPI stand-in and records the runtime of each, so their
+# scaling can be checked without a Mechanical licence. Every script runs on
+# a fresh copy of the model twice:
+#   cold  no .geometry_catalog.json, so the script pays the catalog build
+#   warm  the catalog saved by the cold run is reused
+# load_catalog() is also timed on its own: the cold build, a warm load (key
+# from the geometry file and body Ids) and a warm load with verify=True
+# (also hashes every face Id). The project folder holds a placeholder
+# geometry file, as a real project has its STEP file.
+# The times cover the scripts' Python work against plain objects; the real
+# ExtAPI calls cost far more each, so treat the results as a lower bound
+# and a way to spot non-linear growth.
+#
+# Usage: python fea_benchmark.py --sizes 1e3 1e4 1e5
+#        python fea_benchmark.py --sizes 1e5 --compare old.json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCH_SIZES = [1e3, 1e4, 1e5]
+BENCH_SCRIPTS = ["bolt_detection.py", "bolt_creation.py", "materials.py", "contacts_setup.py"]
+BENCH_OUTPUT = "fea_benchmark_results.json"
+# Read by the scripts from the project folder
+PROJECT_FILES = ["materials.csv", "contact_rules.csv"]
+
+
+def time_script(script, n_faces, seed, project_dir):
+    """Seconds for one run of script on a freshly built model, plus what it made."""
+    model = build_model(n_faces, seed)
+    t0 = time.perf_counter()
+    hx.run_script(os.path.join(HERE, script), model, project_dir)
+    seconds = time.perf_counter() - t0
+    made = {"beams": model.count("Beam"), "named_selections": model.count("NamedSelection"),
+            "contacts": model.count("ContactRegion")}
+    return round(seconds, 4), made
+
+
+def time_catalog(n_faces, seed, project_dir):
+    """Seconds for load_catalog() on a fresh model: cold, warm, warm + verify."""
+    model = build_model(n_faces, seed)
+    ExtAPI = hx.make_extapi(model, project_dir)
+    times = {}
+    for name, kwargs in (("cold", {"rebuild": True}), ("warm", {}), ("verify", {"verify": True})):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            geometry_catalog.load_catalog(ExtAPI, project_dir, **kwargs)
+        times[name + "_seconds"] = round(time.perf_counter() - t0, 4)
+    return times
+
+
+def run_size(n_faces, scripts, seed):
+    model = build_model(n_faces, seed)
+    faces = sum(len(b.Faces) for p in model.geo_data.Assemblies[0].Parts for b in p.Bodies)
+    result = {"faces": faces, "bodies": model.count("Body"), "contacts": model.count("ContactRegion"),
+              "scripts": {}}
+    project_dir = tempfile.mkdtemp(prefix="fea_bench_")
+    try:
+        for name in PROJECT_FILES:
+            shutil.copy(os.path.join(HERE, name), project_dir)
+        with open(os.path.join(project_dir, geometry_catalog.GEOMETRY_FILE), "w") as f:
+            f.write("synthetic assembly: {} faces, seed {}\n".format(n_faces, seed))
+        result["catalog"] = time_catalog(n_faces, seed, project_dir)
+        for script in scripts:
+            catalog = os.path.join(project_dir, geometry_catalog.CATALOG_NAME)
+            if os.path.exists(catalog):
+                os.remove(catalog)
+            cold, made = time_script(script, n_faces, seed, project_dir)
+            warm, _ = time_script(script, n_faces, seed, project_dir)
+            result["scripts"][script] = dict(cold_seconds=cold, warm_seconds=warm, **made)
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = dict((r["faces"], r) for r in json.load(f)["results"])
+    print("\n--- vs {} (new / old warm seconds) ---".format(baseline_path))
+    for r in results:
+        old = baseline.get(r["faces"])
+        if not old:
+            continue
+        ratios = ["{} {:.2f}x".format(name, r["scripts"][name]["warm_seconds"] / old["scripts"][name]["warm_seconds"])
+                  for name in r["scripts"] if old["scripts"].get(name, {}).get("warm_seconds")]
+        print("{:>8} faces  ".format(r["faces"]) + "  ".join(ratios))
+
+
+def main(args):
+    results = []
+    for n_faces in (int(float(s)) for s in args.sizes):
+        r = run_size(n_faces, args.scripts, args.seed)
+        results.append(r)
+        c = r["catalog"]
+        print("{:>8} faces {:>6} bodies  catalog {:.2f}/{:.3f}/{:.2f}s  ".format(
+            r["faces"], r["bodies"], c["cold_seconds"], c["warm_seconds"], c["verify_seconds"]) + "  ".join(
+            "{} {:.2f}/{:.2f}s".format(name[:-3], s["cold_seconds"], s["warm_seconds"])
+            for name, s in r["scripts"].items()))
+
+    report = {
+        "meta": {"commit": git_commit(), "date": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                 "python": platform.python_version(), "machine": platform.machine(),
+                 "platform": platform.platform(), "seed": args.seed},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Results saved to {} (cold / warm seconds per script; catalog cold / warm / verify)".format(
+        args.output))
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the FEA ACT scripts on synthetic assemblies.")
+    parser.add_argument("--sizes", nargs="+", default=BENCH_SIZES, help="Face counts (e.g. 1e3 1e5)")
+    parser.add_argument("--scripts", nargs="+", default=BENCH_SCRIPTS, choices=BENCH_SCRIPTS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=BENCH_OUTPUT)
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    main(parser.parse_args())
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import math
+import os
+
+# ==========================================
+# SHARED GEOMETRY CATALOG
+# ==========================================
+# One walk over Assemblies -> Parts -> Bodies -> Faces (and one over the
+# Geometry tree) builds everything the ACT scripts look up:
+#   bodies    - GeoBody Id -> name, part, tree object Id, tree name, material
+#   faces     - GeoFace Id -> body Id, surface type, area (m^2)
+#   cylinders - cylindrical faces: Id, body Id, radius / centroid (mm), axis
+# The catalog is saved next to the project (.geometry_catalog.json, like
+# .project_cache) and keyed by the attached geometry file (path, size,
+# timestamp) and the body Ids, so bolt_detection, bolt_creation,
+# contacts_setup and materials reuse it until the geometry changes. The
+# geometry file is the one batch_config.json names (batch_driver.py), else
+# GEOMETRY_FILE next to the project. Checking the key only walks the bodies,
+# not their faces. load_catalog(..., verify=True) also compares a hash of
+# every body's volume and face Ids, and that check is always made when the
+# geometry file can't be found.
+#
+# Tree object Ids change when the model is rebuilt or the geometry is
+# reattached, even if the geometry itself doesn't. body_nodes() checks each
+# saved Id against its GeoBody and maps the tree again if any are stale.
+#
+# Usage (any ACT script, with this file in the project folder):
+#   import sys
+#   sys.path.append(ExtAPI.DataModel.Project.ProjectDirectory)
+#   import geometry_catalog
+#   catalog = geometry_catalog.load_catalog(ExtAPI)
+
+CATALOG_NAME = ".geometry_catalog.json"
+CATALOG_VERSION = 3
+# batch_driver.py writes the design point's geometry path here
+BATCH_CONFIG_NAME = "batch_config.json"
+# Else looked up in the project folder and the folder above it (see the journals)
+GEOMETRY_FILE = "V6_STEP.STEP"
+GEO_TO_MM = 1000.0  # GeoData lengths are in metres
+
+
+def _unit(d):
+    n = math.sqrt(d[0]*d[0] + d[1]*d[1] + d[2]*d[2])
+    if n == 0:
+        return None
+    return [d[0]/n, d[1]/n, d[2]/n]
+
+
+def hole_axis(face):
+    """Unit axis of a cylindrical face from the centres of its two circular
+    edges, or None if the edges don't tell."""
+    try:
+        centers = [e.Centroid for e in face.Edges if "Circle" in str(e.CurveType)]
+        if len(centers) >= 2:
+            a, b = centers[0], centers[-1]
+            return _unit((a[0]-b[0], a[1]-b[1], a[2]-b[2]))
+    except:
+        pass
+    return None
+
+
+def geometry_source(project_dir):
+    """Path of the attached geometry file, or None if it can't be found."""
+    config = os.path.join(project_dir, BATCH_CONFIG_NAME)
+    if os.path.exists(config):
+        try:
+            with open(config, "r") as f:
+                path = json.load(f).get("geometry")
+            if path:
+                return path
+        except Exception as e:
+            print("Could not read {} ({}).".format(config, e))
+    for folder in (project_dir, os.path.dirname(project_dir.rstrip("\\/"))):
+        path = os.path.join(folder, GEOMETRY_FILE)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _geo_bodies(ExtAPI):
+    for assembly in ExtAPI.DataModel.GeoData.Assemblies:
+        for part in assembly.Parts:
+            for body in part.Bodies:
+                yield part, body
+
+
+def _topology_line(body, face_ids):
+    """One body's share of the topology hash: Id, volume and face Ids."""
+    try: volume = round(body.Volume * 1e9, 3)
+    except: volume = 0.0
+    return "{}:{}:{};".format(body.Id, volume, ",".join(str(i) for i in face_ids)).encode("utf-8")
+
+
+def geometry_key(ExtAPI, project_dir, topology=False):
+    """Geometry file (path, size, mtime) plus the body Ids. With topology,
+    also a hash of every body's volume and face Ids (a walk over all faces),
+    which catches a moved or added hole when the file says nothing."""
+    source = geometry_source(project_dir)
+    key = {"file": None}
+    if source and os.path.exists(source):
+        st = os.stat(source)
+        key = {"file": os.path.abspath(source), "size": st.st_size, "mtime": int(st.st_mtime)}
+    elif source:
+        key = {"file": source}
+    signature = hashlib.md5() if topology else None
+    body_ids = []
+    for part, body in _geo_bodies(ExtAPI):
+        body_ids.append(body.Id)
+        if signature is not None:
+            signature.update(_topology_line(body, [face.Id for face in body.Faces]))
+    key["bodies"] = body_ids
+    if signature is not None:
+        key["topology"] = signature.hexdigest()
+    return key
+
+
+class GeometryCatalog(object):
+    def __init__(self, path, key, data=None):
+        self.path = path
+        self.key = key
+        data = data or {}
+        # JSON keys are strings, Ids are ints
+        self.bodies = dict((int(k), v) for k, v in data.get("bodies", {}).items())
+        self.faces = dict((int(k), v) for k, v in data.get("faces", {}).items())
+        self.cylinders = data.get("cylinders", [])
+
+    # ------------------------------------------
+    # BUILD / PERSIST
+    # ------------------------------------------
+    def build(self, ExtAPI):
+        print("Building geometry catalog (one pass over all faces)...")
+        self.bodies, self.faces, self.cylinders = {}, {}, []
+        signature = hashlib.md5()
+        for part, body in _geo_bodies(ExtAPI):
+            self.bodies[body.Id] = {"name": body.Name, "part": part.Name,
+                                    "tree_id": None, "tree_name": None, "material": None}
+            face_ids = []
+            for face in body.Faces:
+                face_ids.append(face.Id)
+                surface = str(face.SurfaceType)
+                try: area = face.Area
+                except: area = 0.0
+                self.faces[face.Id] = [body.Id, surface, area]
+                if "Cylinder" in surface:
+                    try:
+                        if not hasattr(face, "Radius"):
+                            continue
+                        c = face.Centroid
+                        self.cylinders.append({
+                            "id": face.Id, "body": body.Id, "radius_mm": face.Radius * GEO_TO_MM,
+                            "centroid_mm": [c[0] * GEO_TO_MM, c[1] * GEO_TO_MM, c[2] * GEO_TO_MM],
+                            "axis": hole_axis(face)})
+                    except:
+                        pass
+            signature.update(_topology_line(body, face_ids))
+        # Saved with the topology hash, so a later verify=True load can check it
+        self.key = dict(self.key, topology=signature.hexdigest())
+        self._map_tree(ExtAPI.DataModel.Project.Model.Geometry)
+        print("Catalog: {} bodies, {} faces, {} cylindrical.".format(
+            len(self.bodies), len(self.faces), len(self.cylinders)))
+        return self
+
+    def _map_tree(self, node):
+        """Tree object Id / name / material of each body node."""
+        for rec in self.bodies.values():
+            rec["tree_id"] = rec["tree_name"] = None
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.Children)
+            if "Body" not in node.DataModelObjectCategory.ToString():
+                continue
+            try:
+                geo_body = node.GetGeoBody()
+                if geo_body and geo_body.Id in self.bodies:
+                    rec = self.bodies[geo_body.Id]
+                    rec["tree_id"] = node.ObjectId
+                    rec["tree_name"] = node.Name
+                    rec["material"] = node.Material
+            except:
+                pass
+
+    def save(self):
+        data = {"version": CATALOG_VERSION, "key": self.key, "bodies": self.bodies,
+                "faces": self.faces, "cylinders": self.cylinders}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        if os.path.exists(self.path):
+            os.remove(self.path)  # no os.replace in IronPython 2.7
+        os.rename(tmp, self.path)
+
+    # ------------------------------------------
+    # QUERIES
+    # ------------------------------------------
+    def holes(self, radius_mm=None, tol_mm=None):
+        if radius_mm is None:
+            return list(self.cylinders)
+        return [c for c in self.cylinders if abs(c["radius_mm"] - radius_mm) < tol_mm]
+
+    def radius_histogram(self, decimals=2):
+        counts = {}
+        for c in self.cylinders:
+            r = round(c["radius_mm"], decimals)
+            counts[r] = counts.get(r, 0) + 1
+        return counts
+
+    def body_of(self, face_id):
+        rec = self.faces.get(face_id)
+        return rec[0] if rec else None
+
+    def area_of(self, face_id):
+        rec = self.faces.get(face_id)
+        return rec[2] if rec else 0.0
+
+    def material_of(self, body_id):
+        body = self.bodies.get(body_id)
+        return body["material"] if body and body["material"] else "Unknown"
+
+    def material_of_face(self, face_id):
+        return self.material_of(self.body_of(face_id))
+
+    def _tree_nodes(self, ExtAPI):
+        """([(tree node, body record)], stale count) from the saved tree Ids.
+        A node is stale unless it is the Body node of the same GeoBody."""
+        nodes, stale = [], 0
+        for body_id, rec in self.bodies.items():
+            if rec["tree_id"] is None:
+                continue
+            try:
+                node = ExtAPI.DataModel.GetObjectById(rec["tree_id"])
+                ok = node is not None and "Body" in node.DataModelObjectCategory.ToString() \
+                    and node.GetGeoBody().Id == body_id
+            except:
+                ok = False
+            if ok:
+                nodes.append((node, rec))
+            else:
+                stale += 1
+        return nodes, stale
+
+    def body_nodes(self, ExtAPI):
+        """(tree node, body record) for every body with a tree object. If any
+        saved tree Id is stale (the model was rebuilt), the tree is mapped
+        again and the catalog saved."""
+        nodes, stale = self._tree_nodes(ExtAPI)
+        if stale:
+            print("Geometry catalog: {} stale tree Ids, mapping the tree again.".format(stale))
+            self._map_tree(ExtAPI.DataModel.Project.Model.Geometry)
+            self.save()
+            nodes, stale = self._tree_nodes(ExtAPI)
+        return nodes
+
+    def refresh_materials(self, ExtAPI):
+        """Re-read each body's material from the tree (cheap: bodies only),
+        in case it was changed by hand since the catalog was saved."""
+        for node, rec in self.body_nodes(ExtAPI):
+            try: rec["material"] = node.Material
+            except: pass
+
+
+def load_catalog(ExtAPI, project_dir=None, rebuild=False, verify=False):
+    """The saved catalog if it matches the current geometry, else a fresh
+    one (built and saved). verify also compares the topology hash, which
+    walks every face."""
+    project_dir = project_dir or ExtAPI.DataModel.Project.ProjectDirectory
+    path = os.path.join(project_dir, CATALOG_NAME)
+    key = geometry_key(ExtAPI, project_dir, topology=verify)
+    if not verify and "size" not in key:
+        # No geometry file to tell a changed model by, so check the faces
+        key = geometry_key(ExtAPI, project_dir, topology=True)
+    if not rebuild and os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            saved = data.get("key") or {}
+            if data.get("version") == CATALOG_VERSION and all(saved.get(k) == v for k, v in key.items()):
+                print("Geometry catalog loaded from " + path)
+                return GeometryCatalog(path, saved, data)
+        except Exception as e:
+            print("Geometry catalog unreadable ({}), rebuilding.".format(e))
+    catalog = GeometryCatalog(path, key).build(ExtAPI)
+    catalog.save()
+    return catalog
@@ -0,0 +1,257 @@
+import io
+import sys
+import types
+
+# ==========================================
+# HEADLESS EXTAPI STAND-IN
+# ==========================================
+# Plain-Python versions of the parts of Mechanical's scripting API the ACT
+# scripts in this folder touch, so they can be run and timed without Ansys:
+#   ExtAPI.DataModel.GeoData        Assemblies -> Parts -> Bodies -> Faces,
+#                                   GeoEntityById
+#   ExtAPI.DataModel.Project.Model  Geometry tree (body nodes with Material),
+#                                   Materials, Connections (contact regions,
+#                                   AddBeam), NamedSelections
+#   ExtAPI.DataModel.GetObjectById, ExtAPI.SelectionManager
+#   ContactType, Quantity, SelectionTypeEnum, Transaction, clr / MessageBox
+# Only what the scripts read or write is modelled; everything is a plain
+# attribute, so a run measures the scripts' own Python work plus one
+# attribute access per API call.
+#
+# Usage:
+#   model = synth_assembly.build_model(10000)
+#   run_script("bolt_creation.py", model, project_dir)
+
+
+class _Category(object):
+    """DataModelObjectCategory stand-in (the scripts call .ToString())."""
+    def __init__(self, name):
+        self.name = name
+
+    def ToString(self):
+        return self.name
+
+
+# ------------------------------------------
+# GEODATA
+# ------------------------------------------
+class GeoEdge(object):
+    def __init__(self, curve_type, centroid):
+        self.CurveType = curve_type
+        self.Centroid = centroid
+
+
+class GeoFace(object):
+    def __init__(self, face_id, surface_type, area, centroid, radius=None, edges=()):
+        self.Id = face_id
+        self.SurfaceType = surface_type
+        self.Area = area
+        self.Centroid = centroid
+        if radius is not None:
+            self.Radius = radius
+        self.Edges = list(edges)
+        self.Body = None
+
+
+class GeoBody(object):
+    def __init__(self, body_id, name, volume):
+        self.Id = body_id
+        self.Name = name
+        self.Volume = volume
+        self.Faces = []
+
+
+class GeoPart(object):
+    def __init__(self, name):
+        self.Name = name
+        self.Bodies = []
+
+
+class GeoAssembly(object):
+    def __init__(self):
+        self.Parts = []
+
+
+class GeoData(object):
+    def __init__(self):
+        self.Assemblies = [GeoAssembly()]
+        self.entities = {}
+
+    def GeoEntityById(self, entity_id):
+        return self.entities[entity_id]
+
+
+# ------------------------------------------
+# TREE OBJECTS
+# ------------------------------------------
+class TreeObject(object):
+    category = "TreeObject"
+
+    def __init__(self, object_id, name, parent=None):
+        self.ObjectId = object_id
+        self.Name = name
+        self.Children = []
+        self.DataModelObjectCategory = _Category(self.category)
+        self.parent = parent
+
+    def Delete(self):
+        if self.parent is not None:
+            self.parent.Children.remove(self)
+            self.parent = None
+
+
+class PartNode(TreeObject):
+    category = "Part"
+
+
+class ConnectionGroup(TreeObject):
+    category = "ConnectionGroup"
+
+
+class MaterialNode(TreeObject):
+    category = "Material"
+
+
+class BodyNode(TreeObject):
+    category = "Body"
+
+    def __init__(self, object_id, name, geo_body, material):
+        TreeObject.__init__(self, object_id, name)
+        self.geo_body = geo_body
+        self.Material = material
+
+    def GetGeoBody(self):
+        return self.geo_body
+
+
+class Location(object):
+    def __init__(self, ids):
+        self.Ids = list(ids)
+
+
+class ContactRegion(TreeObject):
+    category = "ContactRegion"
+
+    def __init__(self, object_id, name, source_ids, target_ids, geo_data):
+        TreeObject.__init__(self, object_id, name)
+        self.SourceLocation = Location(source_ids)
+        self.TargetLocation = Location(target_ids)
+        self.TargetLocation.Entities = [geo_data.entities[i] for i in target_ids]
+        self.ContactType = None
+        self.FrictionCoefficient = 0.0
+
+
+class Beam(TreeObject):
+    category = "Beam"
+
+
+class NamedSelection(TreeObject):
+    category = "NamedSelection"
+
+
+class Connections(TreeObject):
+    category = "Connections"
+
+    def AddBeam(self):
+        return self.model.add_object(Beam, "Beam", self)
+
+
+class Model(object):
+    def __init__(self):
+        self.geo_data = GeoData()
+        self.objects = {}
+        self.next_id = 1
+        self.Geometry = self.add_object(TreeObject, "Geometry")
+        self.Materials = self.add_object(TreeObject, "Materials")
+        self.NamedSelections = self.add_object(TreeObject, "Named Selections")
+        self.Connections = self.add_object(Connections, "Connections")
+        self.Connections.model = self
+
+    def _register(self, obj, parent):
+        self.next_id += 1
+        self.objects[obj.ObjectId] = obj
+        if parent is not None:
+            parent.Children.append(obj)
+            obj.parent = parent
+        return obj
+
+    def add_object(self, cls, name, parent=None):
+        return self._register(cls(self.next_id, name), parent)
+
+    def add_body_node(self, parent, geo_body, material):
+        return self._register(BodyNode(self.next_id, geo_body.Name, geo_body, material), parent)
+
+    def add_contact(self, group, name, source_ids, target_ids):
+        return self._register(ContactRegion(self.next_id, name, source_ids, target_ids, self.geo_data), group)
+
+    def AddNamedSelection(self):
+        return self.add_object(NamedSelection, "Selection", self.NamedSelections)
+
+    def count(self, category):
+        """Live (not deleted) tree objects of one category."""
+        return sum(1 for obj in self.objects.values()
+                   if obj.parent is not None and obj.DataModelObjectCategory.ToString() == category)
+
+
+# ------------------------------------------
+# EXTAPI + SCRIPT GLOBALS
+# ------------------------------------------
+class Transaction(object):
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+
+class _ContactType(object):
+    Bonded, NoSeparation, Frictionless, Rough, Frictional = range(5)
+
+
+class _SelectionTypeEnum(object):
+    GeometryEntities = 0
+
+
+def Quantity(text):
+    return text
+
+
+def make_extapi(model, project_dir):
+    project = types.SimpleNamespace(ProjectDirectory=project_dir, Model=model)
+    data_model = types.SimpleNamespace(Project=project, GeoData=model.geo_data,
+                                       GetObjectById=model.objects.get)
+    selection_manager = types.SimpleNamespace(
+        CreateSelectionInfo=lambda selection_type: types.SimpleNamespace(Ids=[]))
+    return types.SimpleNamespace(DataModel=data_model, SelectionManager=selection_manager)
+
+
+def install_clr():
+    """clr / System.Windows.Forms modules for materials.py's pop-ups."""
+    clr = types.ModuleType("clr")
+    clr.AddReference = lambda name: None
+    forms = types.ModuleType("System.Windows.Forms")
+    forms.MessageBox = types.SimpleNamespace(Show=lambda *args: None)
+    system = types.ModuleType("System")
+    windows = types.ModuleType("System.Windows")
+    system.Windows, windows.Forms = windows, forms
+    sys.modules.update({"clr": clr, "System": system, "System.Windows": windows,
+                        "System.Windows.Forms": forms})
+
+
+def script_globals(model, project_dir):
+    return {"__name__": "__main__", "ExtAPI": make_extapi(model, project_dir),
+            "ContactType": _ContactType, "Quantity": Quantity,
+            "SelectionTypeEnum": _SelectionTypeEnum, "Transaction": Transaction}
+
+
+def run_script(path, model, project_dir, quiet=True):
+    """exec one ACT script against model. Returns the script's output."""
+    install_clr()
+    with open(path) as f:
+        code = compile(f.read(), path, "exec")
+    out = io.StringIO()
+    saved = sys.stdout
+    if quiet:
+        sys.stdout = out
+    try:
+        exec(code, script_globals(model, project_dir))
+    finally:
+        sys.stdout = saved
+    return out.getvalue()
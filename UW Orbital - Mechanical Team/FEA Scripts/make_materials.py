@@ -1,6 +1,24 @@
 # RUN THIS IN WORKBENCH ACT CONSOLE
+import os
+import sys
 import System.Collections.Generic
 
+# ==========================================
+# CONFIGURATION
+# ==========================================
+# Project files folder (<project>_files): holds dp0/ and, next to this
+# script, material_library.csv and engineering_data.py
+files_dir = os.path.splitext(GetProjectFile())[0] + "_files"
+sys.path.append(files_dir)
+import engineering_data
+
+# Library: material_library.csv (or .json) in the files folder or the one above
+library_path = None
+for folder in (files_dir, os.path.dirname(files_dir)):
+    for name in (engineering_data.LIBRARY_NAME, os.path.splitext(engineering_data.LIBRARY_NAME)[0] + ".json"):
+        if library_path is None and os.path.exists(os.path.join(folder, name)):
+            library_path = os.path.join(folder, name)
+
 # ==========================================
 # 1. AUTO-DETECT ENGINEERING DATA
 # ==========================================
@@ -9,58 +27,76 @@ eng_data = None
 
 print("--- SEARCHING FOR ENGINEERING DATA ---")
 # Loop through all systems to find one with an Engineering Data container
-for sys in GetAllSystems():
+for system in GetAllSystems():
     try:
-        container = sys.GetContainer(ComponentName="Engineering Data")
+        container = system.GetContainer(ComponentName="Engineering Data")
         if container:
-            target_system = sys
+            target_system = system
             eng_data = container
-            print("Target System Found: " + sys.Name)
+            print("Target System Found: " + system.Name)
             break
     except:
         pass
 
 if eng_data is None:
     print("CRITICAL ERROR: No system with 'Engineering Data' found in the Schematic.")
+elif library_path is None:
+    print("CRITICAL ERROR: {} not found in {}".format(engineering_data.LIBRARY_NAME, files_dir))
 else:
     # ==========================================
-    # 2. DEFINE ALL MATERIALS
+    # 2. LIBRARY vs CURRENT ENGINEERING DATA
     # ==========================================
-    # Format: "Name": [Density (kg/m^3), Youngs (Pa), Poisson, Yield (Pa)]
-    new_mats = {
-        "FR-4 (PCB)":        [1850.0, 24.0e9, 0.16, 300.0e6],  # Approx Yield
-        "PLA (3D Printed)":  [1240.0, 3.5e9, 0.36, 40.0e6],    # 40 MPa
-        "Stainless Steel":   [8000.0, 1.93e11, 0.29, 215.0e6], # 304 SS
-        "Aluminum Alloy":    [2770.0, 7.1e10, 0.33, 280.0e6]   # 6061-T6
-    }
+    # Format: {"Name": {"Density": kg/m^3, "Young's Modulus": Pa, ...}}
+    library = engineering_data.load_library(library_path)
+    library_key = engineering_data.file_key(library_path)
+    xml_path = os.path.join(files_dir, "dp0", target_system.Name, "ENGD", "EngineeringData.xml")
+    state = engineering_data.load_state(files_dir)
+    print("Library: {} materials from {}".format(len(library), library_path))
 
-    print("--- GENERATING MATERIALS ---")
-    for name, props in new_mats.items():
-        try:
-            # 1. Create Material
-            mat = eng_data.CreateMaterial(Name=name)
-            
-            # 2. Add Density
-            rho = mat.CreateProperty(Name="Density")
-            rho.SetData(Variables=["Density"], Values=[str(props[0])])
-            
-            # 3. Add Elasticity
-            elas = mat.CreateProperty(Name="Isotropic Elasticity")
-            elas.SetData(Variables=["Young's Modulus"], Values=[str(props[1])])
-            elas.SetData(Variables=["Poisson's Ratio"], Values=[str(props[2])])
-            
-            # 4. Add Yield Strength (Optional but good for reporting)
+    synced = state["synced"]
+    if synced and synced["library"] == library_key and synced["xml"] == engineering_data.file_key(xml_path):
+        print("--- NOTHING CHANGED: Engineering Data already matches the library ---")
+    else:
+        snapshot, xml_key = engineering_data.snapshot_for(state, xml_path)
+        changes = engineering_data.diff(library, snapshot)
+
+        # ==========================================
+        # 3. APPLY ONLY WHAT CHANGED
+        # ==========================================
+        print("--- SYNCING MATERIALS ({} to create / update) ---".format(len(changes)))
+        failed = 0
+        for name, is_new, variables in changes:
             try:
-                yld = mat.CreateProperty(Name="Tensile Yield Strength")
-                yld.SetData(Variables=["Tensile Yield Strength"], Values=[str(props[3])])
-            except:
-                pass # Some material types might reject yield if not configured right
-            
-            print("Created: " + name)
-        except Exception as e:
-            # If it fails, it usually means the material already exists.
-            # We print the name so you know it's there.
-            print("Skipped (Exists): " + name)
+                if is_new:
+                    mat = eng_data.CreateMaterial(Name=name)
+                else:
+                    mat = eng_data.GetMaterial(Name=name)
+
+                for prop_name, values in engineering_data.by_property(variables).items():
+                    try:
+                        prop = mat.GetProperty(Name=prop_name)
+                    except:
+                        prop = None
+                    if prop is None:
+                        prop = mat.CreateProperty(Name=prop_name)
+                    for var, val in values:
+                        prop.SetData(Variables=[var], Values=[str(val)])
+
+                # What Engineering Data holds now (the XML is rewritten on Save)
+                snapshot.setdefault(name, {}).update(variables)
+                print("{}: {} ({})".format("Created" if is_new else "Updated", name,
+                                            ", ".join(sorted(variables))))
+            except Exception as e:
+                failed += 1
+                print("FAILED: {} ({})".format(name, str(e)))
+
+        state["xml"] = xml_key
+        state["snapshot"] = snapshot
+        # A clean sync lets the next rebuild skip all of this
+        state["synced"] = None if failed else {"library": library_key, "xml": xml_key}
+        engineering_data.save_state(files_dir, state)
 
-    print("--- UPDATE COMPLETE ---")
-    print("IMPORTANT: Right-click 'Model' in the Schematic and select 'Refresh'!")
\ No newline at end of file
+        print("--- UPDATE COMPLETE: {} changed, {} failed, {} unchanged ---".format(
+            len(changes) - failed, failed, len(library) - len(changes)))
+        if changes:
+            print("IMPORTANT: Right-click 'Model' in the Schematic and select 'Refresh'!")
\ No newline at end of file
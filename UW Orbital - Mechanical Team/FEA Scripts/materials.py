@@ -1,13 +1,82 @@
 import csv
 import os
+import re
 import sys
 import clr
 
+# Shared geometry catalog (geometry_catalog.py in the project folder)
+sys.path.append(ExtAPI.DataModel.Project.ProjectDirectory)
+import geometry_catalog
+
 # 1. SETUP .NET POP-UPS (So you know it started)
 clr.AddReference("System.Windows.Forms")
 from System.Windows.Forms import MessageBox
 
+# Pop-ups block a batch (-B) Workbench run; act_preprocess.py turns them off.
+# Without them a crash is logged and re-raised, so the batch sees the failure.
+SHOW_POPUPS = True
+globals().update(globals().get("CONFIG_OVERRIDES") or {})
+
+# Transaction() holds tree / model updates until the block ends (2019 R1+)
+try:
+    Transaction
+except NameError:
+    Transaction = None
+
+class _NoTransaction(object):
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+# ==========================================
+# PART-CODE MATCHER
+# ==========================================
+# Part codes look like "E-SP1" (group letter, two letters, a digit) and show
+# up as a segment of the body name, e.g. "Assem1|E-BA0-6A0|E-PS1-6A0|Cut-
+# Extrude1". One regex scan pulls every such segment out of the name and a
+# dict lookup finds its rule, so the cost doesn't grow with the number of
+# rules. Codes of any other shape go into one compiled alternation.
+# When several codes match, the innermost part (rightmost in the name) wins.
+CODE_TOKEN = re.compile(r"[A-Z]-[A-Z]{2}[0-9]")
+
+class PartCodeMatcher(object):
+    def __init__(self, code_map):
+        self.tokens = {}
+        other = []
+        for code, target in code_map.items():
+            if CODE_TOKEN.match(code) and len(code) == 5:
+                self.tokens[code] = target
+            else:
+                other.append(code)
+        self.other = dict((code, code_map[code]) for code in other)
+        self.other_re = None
+        if other:
+            # Longest first, so a code that contains another still wins
+            other.sort(key=len, reverse=True)
+            self.other_re = re.compile("|".join(re.escape(code) for code in other))
+        self.cache = {}
+
+    def match(self, name):
+        """(code, material) of the innermost matching code, or None."""
+        if name in self.cache:
+            return self.cache[name]
+        best = None  # (position, code)
+        for m in CODE_TOKEN.finditer(name):
+            if m.group(0) in self.tokens:
+                best = (m.start(), m.group(0))
+        if self.other_re is not None:
+            for m in self.other_re.finditer(name):
+                if best is None or m.start() >= best[0]:
+                    best = (m.start(), m.group(0))
+        found = None
+        if best is not None:
+            code = best[1]
+            found = (code, self.tokens.get(code, self.other.get(code)))
+        self.cache[name] = found
+        return found
+
 def step2_project_dir_debug():
+    log_lines = []
+    log_file_path = None
     try:
         # GET PROJECT DIRECTORY
         # This is where Ansys looks for files (usually the 'user_files' folder)
@@ -19,19 +88,18 @@ def step2_project_dir_debug():
         DEFAULT_MATERIAL = "Stainless Steel"
 
         # 2. START LOGGING
-        with open(log_file_path, "w") as f:
-            f.write("--- ANSYS ASSIGNMENT LOG ---\n")
-            f.write("Log saved to: " + log_file_path + "\n")
-            f.write("Looking for CSV at: " + mat_csv_path + "\n")
-
-        # Helper function to append to log
+        # Messages are buffered and written once at the end (or on a crash)
         def log(msg):
-            with open(log_file_path, "a") as f:
-                f.write(msg + "\n")
+            log_lines.append(msg)
+
+        log("--- ANSYS ASSIGNMENT LOG ---")
+        log("Log saved to: " + log_file_path)
+        log("Looking for CSV at: " + mat_csv_path)
 
         # POP-UP 1: NOTIFICATION
         # We show the path so you know exactly where to find it
-        MessageBox.Show("Script Started.\nLog file will be saved to:\n" + log_file_path, "Debug")
+        if SHOW_POPUPS:
+            MessageBox.Show("Script Started.\nLog file will be saved to:\n" + log_file_path, "Debug")
 
         # 3. GET MATERIALS
         materials = ExtAPI.DataModel.Project.Model.Materials
@@ -55,48 +123,66 @@ def step2_project_dir_debug():
             log("CRITICAL: CSV NOT FOUND at " + mat_csv_path)
 
         # 5. ASSIGNMENT LOOP
-        geometry = ExtAPI.DataModel.Project.Model.Geometry
+        # Body nodes come straight from the geometry catalog (no tree walk).
+        # The material of each distinct body name is worked out once; the
+        # writes are then grouped by material and done in one Transaction.
+        catalog = geometry_catalog.load_catalog(ExtAPI)
+        matcher = PartCodeMatcher(code_map)
+        resolved = {}  # Body name -> (material, log line)
+        by_material = {}
         
-        def process_node(node):
-            for child in node.Children:
-                process_node(child)
-            
-            if "Body" in node.DataModelObjectCategory.ToString():
-                assigned = False
-                for code, target in code_map.items():
-                    if code in node.Name:
-                        if target in available_mats:
-                            node.Material = target
-                            log("[MATCH] " + node.Name + " -> " + target)
-                        else:
-                            node.Material = DEFAULT_MATERIAL
-                            log("[MISSING] " + target + " not found. Used Default.")
-                        assigned = True
-                        break
-                
-                if not assigned:
-                    if DEFAULT_MATERIAL in available_mats:
-                        node.Material = DEFAULT_MATERIAL
-                        log("[DEFAULT] " + node.Name + " -> " + DEFAULT_MATERIAL)
+        for node, rec in catalog.body_nodes(ExtAPI):
+            name = rec["tree_name"] or node.Name
+            if name not in resolved:
+                found = matcher.match(name)
+                if found is not None:
+                    target = found[1]
+                    if target in available_mats:
+                        resolved[name] = (target, "[MATCH] " + name + " -> " + target)
                     else:
-                        log("[FAIL] Default material not found!")
+                        resolved[name] = (DEFAULT_MATERIAL, "[MISSING] " + target + " not found. Used Default.")
+                elif DEFAULT_MATERIAL in available_mats:
+                    resolved[name] = (DEFAULT_MATERIAL, "[DEFAULT] " + name + " -> " + DEFAULT_MATERIAL)
+                else:
+                    resolved[name] = (None, "[FAIL] Default material not found!")
+            material, line = resolved[name]
+            log(line)
+            if material is not None:
+                by_material.setdefault(material, []).append((node, rec))
+        
+        with (Transaction() if Transaction is not None else _NoTransaction()):
+            for material, bodies in by_material.items():
+                for node, rec in bodies:
+                    node.Material = material
+                    rec["material"] = material
+                log("Assigned {} to {} bodies.".format(material, len(bodies)))
+        log("{} bodies, {} distinct names.".format(
+            sum(len(b) for b in by_material.values()), len(resolved)))
 
-        process_node(geometry)
+        # Keep the catalog's Body -> Material map current for contacts_setup
+        catalog.save()
         
         log("--- EXECUTION FINISHED ---")
+        with open(log_file_path, "w") as f:
+            f.write("\n".join(log_lines) + "\n")
         
         # POP-UP 2: COMPLETION
-        MessageBox.Show("Script Complete!\nCheck 'Ansys_Assignment_Log.txt' in your project folder.", "Success")
+        if SHOW_POPUPS:
+            MessageBox.Show("Script Complete!\nCheck 'Ansys_Assignment_Log.txt' in your project folder.", "Success")
 
     except Exception as e:
         # If the script crashes, try to log it, or show a pop-up
         try:
-            with open(log_file_path, "a") as f:
+            with open(log_file_path, "w") as f:
+                f.write("\n".join(log_lines) + "\n")
                 f.write("\nCRITICAL SCRIPT ERROR: " + str(e))
         except:
             pass # If we can't write to file, just show the box
             
-        MessageBox.Show("Error: " + str(e), "Script Crashed")
+        if SHOW_POPUPS:
+            MessageBox.Show("Error: " + str(e), "Script Crashed")
+        else:
+            raise
 
 # RUN IT
 step2_project_dir_debug()
\ No newline at end of file
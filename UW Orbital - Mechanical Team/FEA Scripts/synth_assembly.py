@@ -0,0 +1,135 @@
+import csv
+import math
+import os
+import random
+
+import headless_extapi as hx
+
+# ==========================================
+# SYNTHETIC ASSEMBLY GENERATOR
+# ==========================================
+# Builds a headless_extapi model of any size that looks like the chassis to
+# the ACT scripts:
+#   - body names and starting materials cycle through Part_Material_Log.csv
+#     (so names repeat, as they do in the real tree)
+#   - each body is a box (PLANE_FACES) with HOLES_PER_BODY bolt holes and a
+#     few fillets; bodies come in pairs whose holes line up along z, with
+#     radii in the M4-M12 bands plus some no bolt spec covers
+#   - contacts join bodies whose materials form a contact_rules.csv pair
+#     (RULE_FRACTION of them, the rest are random), and NOISE_FRACTION of
+#     them target a sliver face below contacts_setup's MIN_CONTACT_AREA
+# Sizes are given in faces; the same seed gives the same model.
+#
+# Usage: model = build_model(10000)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PART_LOG = os.path.join(HERE, "Part_Material_Log.csv")
+RULES_CSV = os.path.join(HERE, "contact_rules.csv")
+MATERIALS_CSV = os.path.join(HERE, "materials.csv")
+
+PLANE_FACES = 6
+HOLES_PER_BODY = 4
+FILLETS_PER_BODY = 3
+FACES_PER_BODY = PLANE_FACES + 1 + HOLES_PER_BODY + FILLETS_PER_BODY  # + 1 sliver
+HOLE_RADII_MM = [2.05, 3.1, 4.1, 5.1, 6.1, 1.6]  # M4 (= TARGET_RADIUS_MM), M6, M8, M10, M12, off-band
+PAIR_SPACING_M = 0.3   # Between body pairs (well over any bolt length)
+HOLE_OFFSET_M = 0.008  # Head to thread, along z
+CONTACTS_PER_BODY = 1.5
+RULE_FRACTION = 0.9
+NOISE_FRACTION = 0.1
+BASE_MATERIALS = ["Structural Steel", "Stainless Steel"]
+
+
+def read_rows(path):
+    with open(path, "r") as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [row for row in reader if len(row) >= 2]
+
+
+class _Ids(object):
+    """GeoData Ids: bodies and faces share one counter, as in Mechanical."""
+    def __init__(self):
+        self.next = 1
+
+    def __call__(self):
+        self.next += 1
+        return self.next - 1
+
+
+def _add_face(geo, ids, body, surface, area, centroid, radius=None, edges=()):
+    face = hx.GeoFace(ids(), surface, area, centroid, radius, edges)
+    face.Body = body
+    body.Faces.append(face)
+    geo.entities[face.Id] = face
+    return face
+
+
+def _add_hole(geo, ids, body, radius_mm, c):
+    """Cylindrical hole along z with its two circular edges, 4 mm deep."""
+    depth = 0.004
+    edges = [hx.GeoEdge("Circle", (c[0], c[1], c[2] - depth / 2)),
+             hx.GeoEdge("Circle", (c[0], c[1], c[2] + depth / 2))]
+    radius = radius_mm / 1000.0
+    return _add_face(geo, ids, body, "Cylinder", 2 * math.pi * radius * depth, c, radius, edges)
+
+
+def build_model(n_faces, seed=0):
+    """A headless_extapi.Model with about n_faces faces."""
+    rng = random.Random(seed)
+    parts = read_rows(PART_LOG)
+    rules = [(row[0].strip(), row[1].strip()) for row in read_rows(RULES_CSV)]
+    materials = set(BASE_MATERIALS)
+    materials.update(row[1].strip() for row in read_rows(MATERIALS_CSV))
+    for m1, m2 in rules:
+        materials.update((m1, m2))
+
+    model = hx.Model()
+    geo = model.geo_data
+    ids = _Ids()
+    for name in sorted(materials):
+        model.add_object(hx.MaterialNode, name, model.Materials)
+
+    n_bodies = max(2, int(round(n_faces / float(FACES_PER_BODY))))
+    n_bodies += n_bodies % 2
+    assembly = geo.Assemblies[0]
+    bodies = []  # (geo body, material)
+    by_material = {}
+
+    for k in range(n_bodies):
+        name, material = parts[k % len(parts)][0], parts[k % len(parts)][1]
+        part = hx.GeoPart(name.split("|")[-2] if "|" in name else name)
+        body = hx.GeoBody(ids(), name, rng.uniform(1e-6, 1e-4))
+        geo.entities[body.Id] = body
+        part.Bodies.append(body)
+        assembly.Parts.append(part)
+
+        # Body pair p sits on a grid; the second body's holes are the first's, raised
+        p = k // 2
+        x0, y0 = (p % 50) * PAIR_SPACING_M, (p // 50) * PAIR_SPACING_M
+        z0 = 0.0 if k % 2 == 0 else HOLE_OFFSET_M
+        for i in range(PLANE_FACES):
+            _add_face(geo, ids, body, "Plane", rng.uniform(2e-4, 2e-3), (x0, y0, z0 + 0.001 * i))
+        _add_face(geo, ids, body, "Plane", 1e-6, (x0, y0, z0))  # sliver (1 mm^2)
+        hole_rng = random.Random(seed * 1000003 + p)  # same radii for both bodies of a pair
+        for i in range(HOLES_PER_BODY):
+            _add_hole(geo, ids, body, hole_rng.choice(HOLE_RADII_MM), (x0 + 0.02 * i, y0 + 0.05, z0))
+        for i in range(FILLETS_PER_BODY):
+            _add_face(geo, ids, body, "Cylinder", 1e-6, (x0 + 0.01 * i, y0 + 0.1, z0), 0.0005)
+
+        part_node = model.add_object(hx.PartNode, part.Name, model.Geometry)
+        model.add_body_node(part_node, body, material)
+        bodies.append((body, material))
+        by_material.setdefault(material, []).append(body)
+
+    group = model.add_object(hx.ConnectionGroup, "Contacts", model.Connections)
+    for i in range(int(n_bodies * CONTACTS_PER_BODY)):
+        m1, m2 = rng.choice(rules)
+        if rng.random() < RULE_FRACTION and m1 in by_material and m2 in by_material:
+            a, b = rng.choice(by_material[m1]), rng.choice(by_material[m2])
+        else:
+            a, b = rng.choice(bodies)[0], rng.choice(bodies)[0]
+        target = b.Faces[PLANE_FACES] if rng.random() < NOISE_FRACTION else b.Faces[rng.randrange(PLANE_FACES)]
+        model.add_contact(group, "Contact Region {}".format(i), [a.Faces[0].Id], [target.Id])
+
+    return model